@@ -0,0 +1,346 @@
+"""
+Async HTTP API (plain ASGI) for quotes, orders, holdings and history.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Every request carries "Authorization: Bearer <token>" (tokens are created
+on the API Access page; a resolved token is cached for a minute). Handlers
+call the same functions as the Streamlit UI; blocking pymysql calls run on
+a fixed pool of connections in worker threads, so the event loop never
+waits on the database. Concurrent quote requests are coalesced into one
+batched download per window.
+
+Routes:
+    GET    /health
+    GET    /quotes?symbols=TCS,INFY
+    GET    /holdings
+    GET    /orders                  pending orders (and waiting bracket legs)
+    POST   /orders                  {"symbol", "action", "qty", "order_type", ...}
+    DELETE /orders/{id}
+    POST   /baskets                 {"orders": [{"symbol", "action", "qty"}, ...], "mode"}
+    GET    /history?limit=100&before_id=
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import pandas as pd
+import pymysql
+
+from auth import resolve_api_token
+from baskets import execute_basket
+from db import get_connection
+from lots import get_open_positions
+from market_data import get_live_prices
+from orders import place_order, place_oco, place_bracket, cancel_order, process_pending_limit_orders
+
+API_POOL_SIZE = int(os.environ.get("QUANTIFY_API_POOL_SIZE", 8))
+QUOTE_BATCH_WINDOW = 0.02  # seconds to collect symbols before one download
+QUOTE_TTL = 2.0            # seconds a fetched quote is served from memory
+TOKEN_CACHE_TTL = 60.0
+# Background trigger-engine tick so API orders fire without a UI session (0 = off)
+ENGINE_TICK_SECONDS = float(os.environ.get("QUANTIFY_API_ENGINE_TICK", 5))
+MAX_BODY_BYTES = 1 << 20
+TRIGGER_TYPES = ("LIMIT BUY", "LIMIT SELL", "STOP-LOSS")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ==========================================
+# ASYNC DB POOL
+# ==========================================
+class DBPool:
+    """
+    Fixed set of pymysql connections handed out through an asyncio.Queue.
+    run(fn, *args) calls fn(conn, *args) on a worker thread and rolls back
+    afterwards, so a pooled connection never carries an open read snapshot.
+    """
+
+    def __init__(self, size=API_POOL_SIZE):
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="api-db")
+        self._idle = None
+
+    @staticmethod
+    def _call(fn, conn, args):
+        try:
+            return fn(conn, *args)
+        finally:
+            conn.rollback()
+
+    async def run(self, fn, *args):
+        if self._idle is None:
+            # Connections are opened lazily on first use
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(None)
+
+        loop = asyncio.get_running_loop()
+        conn = await self._idle.get()
+        try:
+            if conn is None:
+                conn = await loop.run_in_executor(self._executor, get_connection)
+            return await loop.run_in_executor(self._executor, self._call, fn, conn, args)
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            # Broken connection: drop it, a fresh one is opened next time
+            conn = None
+            raise
+        finally:
+            self._idle.put_nowait(conn)
+
+
+# ==========================================
+# QUOTE MICRO-BATCHING
+# ==========================================
+class QuoteBatcher:
+    """
+    Requests arriving within QUOTE_BATCH_WINDOW share one get_live_prices
+    call; results are kept for QUOTE_TTL so hot symbols are served from memory.
+    """
+
+    def __init__(self, window=QUOTE_BATCH_WINDOW, ttl=QUOTE_TTL):
+        self.window = window
+        self.ttl = ttl
+        self._cache = {}    # symbol -> (expires, quote)
+        self._batch = None  # (symbols, future) being collected
+
+    async def get(self, symbols):
+        now = time.monotonic()
+        out = {s: self._cache[s][1] for s in symbols if s in self._cache and self._cache[s][0] > now}
+        missing = [s for s in symbols if s not in out]
+        if missing:
+            if self._batch is None:
+                self._batch = (set(), asyncio.get_running_loop().create_future())
+                asyncio.ensure_future(self._flush())
+            wanted, fut = self._batch
+            wanted.update(missing)
+            fetched = await asyncio.shield(fut)
+            out.update({s: fetched[s] for s in missing if s in fetched})
+        return out
+
+    async def _flush(self):
+        await asyncio.sleep(self.window)
+        wanted, fut = self._batch
+        self._batch = None
+        try:
+            quotes = await asyncio.get_running_loop().run_in_executor(None, get_live_prices, sorted(wanted))
+        except Exception as e:
+            fut.set_exception(e)
+            return
+        fetched = {s: {"price": float(q["price"]), "time": q["time"]} for s, q in quotes.iterrows()}
+        expires = time.monotonic() + self.ttl
+        self._cache.update({s: (expires, q) for s, q in fetched.items()})
+        fut.set_result(fetched)
+
+
+# ==========================================
+# BLOCKING HANDLER BODIES (RUN ON THE POOL)
+# ==========================================
+def _records(df):
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _pending_orders(conn, email):
+    return _records(pd.read_sql("""
+        SELECT id, symbol, qty, action, order_type, trigger_price, status,
+               trail_pct, oco_group, parent_id, expires_at
+        FROM transactions
+        WHERE email=%s AND status IN ('PENDING', 'WAITING')
+        ORDER BY id
+    """, conn, params=(email,)))
+
+
+def _history(conn, email, limit, before_id):
+    where, params = "email=%s", [email]
+    if before_id:
+        where += " AND id < %s"
+        params.append(before_id)
+    params.append(limit)
+    return _records(pd.read_sql(f"""
+        SELECT id, symbol, qty, price, action, order_type, status, timestamp
+        FROM transactions WHERE {where}
+        ORDER BY id DESC LIMIT %s
+    """, conn, params=params))
+
+
+def _place(conn, email, body, price):
+    order_type = body["order_type"]
+    expires_at = datetime.fromisoformat(body["expires_at"]) if body.get("expires_at") else None
+    qty = int(body["qty"])
+    if qty <= 0:
+        raise ValueError("qty must be positive")
+
+    if order_type == "MARKET":
+        # A single-row all-or-nothing basket is exactly a MARKET order
+        row = execute_basket(conn, email, pd.DataFrame([{
+            "symbol": body["symbol"], "action": body["action"], "qty": qty
+        }]))
+        row = _records(row)[0]
+        if row["status"] != "FILLED":
+            raise ValueError(row["reason"])
+        return row
+    if order_type == "TRAILING STOP":
+        trail_pct = float(body["trail_pct"])
+        if not 0 < trail_pct < 1:
+            raise ValueError("trail_pct is a fraction between 0 and 1")
+        oid = place_order(conn, email, body["symbol"], qty, price, "SELL", order_type, None,
+                          trail_pct=trail_pct, expires_at=expires_at)
+    elif order_type in TRIGGER_TYPES:
+        if body["action"] not in ("BUY", "SELL"):
+            raise ValueError("action must be BUY or SELL")
+        oid = place_order(conn, email, body["symbol"], qty, price, body["action"], order_type,
+                          float(body["trigger_price"]), expires_at=expires_at)
+    elif order_type == "OCO":
+        oid = place_oco(conn, email, body["symbol"], qty, price,
+                        float(body["target_price"]), float(body["stop_price"]), expires_at=expires_at)
+    elif order_type == "BRACKET":
+        oid = place_bracket(conn, email, body["symbol"], qty, price, float(body["trigger_price"]),
+                            float(body["target_price"]), float(body["stop_price"]), expires_at=expires_at)
+    else:
+        raise ValueError(f"Unknown order_type: {order_type}")
+    return {"id": oid, "status": "PENDING"}
+
+
+# ==========================================
+# APPLICATION
+# ==========================================
+class API:
+    def __init__(self):
+        self.pool = DBPool()
+        self.quotes = QuoteBatcher()
+        self._tokens = {}  # token -> (expires, email)
+        self._ticker = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        try:
+            status, payload = 200, await self._dispatch(scope, receive)
+        except HTTPError as e:
+            status, payload = e.status, {"error": e.message}
+        except (ValueError, KeyError, TypeError) as e:
+            status, payload = 400, {"error": f"Invalid request: {e}"}
+        except Exception as e:
+            print(f"API error on {scope['method']} {scope['path']}: {e}")
+            status, payload = 500, {"error": "Internal error"}
+
+        body = json.dumps(payload, default=str).encode()
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if ENGINE_TICK_SECONDS > 0:
+                    self._ticker = asyncio.ensure_future(self._engine_loop())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._ticker:
+                    self._ticker.cancel()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _engine_loop(self):
+        while True:
+            await asyncio.sleep(ENGINE_TICK_SECONDS)
+            try:
+                await self.pool.run(process_pending_limit_orders)
+            except Exception as e:
+                print(f"Trigger engine tick failed: {e}")
+
+    async def _authenticate(self, scope):
+        header = dict(scope["headers"]).get(b"authorization", b"").decode()
+        token = header[7:] if header.lower().startswith("bearer ") else ""
+        cached = self._tokens.get(token)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        email = await self.pool.run(resolve_api_token, token)
+        if email is None:
+            raise HTTPError(401, "Missing or invalid API token")
+        self._tokens[token] = (time.monotonic() + TOKEN_CACHE_TTL, email)
+        return email
+
+    @staticmethod
+    async def _json_body(receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise HTTPError(413, "Request body too large")
+            chunks.append(chunk)
+            if not message.get("more_body"):
+                break
+        try:
+            return json.loads(b"".join(chunks) or b"{}")
+        except json.JSONDecodeError:
+            raise HTTPError(400, "Body must be JSON")
+
+    async def _dispatch(self, scope, receive):
+        method, parts = scope["method"], [p for p in scope["path"].split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+        if parts == ["health"]:
+            return {"status": "ok"}
+
+        email = await self._authenticate(scope)
+        route = (method, parts[0] if parts else "", len(parts))
+
+        if route == ("GET", "quotes", 1):
+            symbols = list(dict.fromkeys(s.strip().upper() for s in query.get("symbols", "").split(",") if s.strip()))
+            if not symbols:
+                raise HTTPError(400, "symbols is required")
+            return await self.quotes.get(symbols)
+
+        if route == ("GET", "holdings", 1):
+            return _records(await self.pool.run(get_open_positions, email))
+
+        if route == ("GET", "orders", 1):
+            return await self.pool.run(_pending_orders, email)
+
+        if route == ("POST", "orders", 1):
+            body = await self._json_body(receive)
+            body["symbol"] = str(body["symbol"]).upper()
+            body.setdefault("order_type", "MARKET")
+            price = None
+            if body["order_type"] != "MARKET":
+                quote = (await self.quotes.get([body["symbol"]])).get(body["symbol"])
+                if quote is None:
+                    raise HTTPError(400, f"No live price for {body['symbol']}")
+                price = quote["price"]
+            return await self.pool.run(_place, email, body, price)
+
+        if route == ("DELETE", "orders", 2):
+            await self.pool.run(cancel_order, email, int(parts[1]))
+            return {"id": int(parts[1]), "status": "CANCELLED"}
+
+        if route == ("POST", "baskets", 1):
+            body = await self._json_body(receive)
+            result = await self.pool.run(execute_basket, email, pd.DataFrame(body["orders"]),
+                                         body.get("mode", "all_or_nothing"))
+            return _records(result)
+
+        if route == ("GET", "history", 1):
+            limit = min(int(query.get("limit", 100)), 1000)
+            return await self.pool.run(_history, email, limit, int(query.get("before_id", 0)))
+
+        raise HTTPError(404, f"No route for {method} {scope['path']}")
+
+
+app = API()
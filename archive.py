@@ -0,0 +1,231 @@
+"""
+Hot / cold storage for the transactions table.
+
+Hot: transactions is RANGE-partitioned by month on timestamp (primary key
+(id, timestamp)); ensure_partitions keeps a few future months ahead of
+the catch-all pmax partition.
+
+Cold: archive_transactions moves closed orders (COMPLETE, CANCELLED,
+EXPIRED, REJECTED) older than QUANTIFY_ARCHIVE_DAYS into one
+zstd-compressed Parquet file per month under QUANTIFY_ARCHIVE_DIR, then
+deletes them from the hot table and drops month partitions left empty.
+Files are written before rows are deleted, and readers drop duplicate
+ids, so a crash in between never loses or double-counts an order.
+
+read_history / read_transactions read across both transparently.
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pymysql
+
+ARCHIVE_DIR = os.path.join(os.environ.get("QUANTIFY_ARCHIVE_DIR", "archive"), "transactions")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("QUANTIFY_ARCHIVE_DAYS", 365))
+CLOSED_STATUSES = ("COMPLETE", "CANCELLED", "EXPIRED", "REJECTED")
+MONTHS_AHEAD = 3
+DELETE_CHUNK = 1000  # ids per DELETE ... WHERE id IN (...)
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+# ==========================================
+# PARTITIONING (HOT TABLE)
+# ==========================================
+def _partitions(c):
+    c.execute("""
+        SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'transactions' AND PARTITION_NAME IS NOT NULL
+    """)
+    return {row[0] for row in c.fetchall()}
+
+
+def _partition_sql(months):
+    return ", ".join(
+        f"PARTITION p{m:%Y%m} VALUES LESS THAN (TO_DAYS('{_next_month(m):%Y-%m-%d}'))" for m in months
+    )
+
+
+def ensure_partitions(conn, months_ahead=MONTHS_AHEAD):
+    """
+    Partition transactions by month on first call (one table rebuild),
+    afterwards only split pmax to add the coming months.
+    Returns the partitions added.
+    """
+    c = conn.cursor(pymysql.cursors.Cursor)
+    existing = _partitions(c)
+    this_month = _month_start(datetime.now().date())
+    horizon = [this_month]
+    for _ in range(months_ahead):
+        horizon.append(_next_month(horizon[-1]))
+
+    if not existing:
+        c.execute("SELECT MIN(timestamp) FROM transactions")
+        first = c.fetchone()[0]
+        months = [_month_start(first.date()) if first else this_month]
+        while months[-1] < horizon[-1]:
+            months.append(_next_month(months[-1]))
+        # The partition column must be part of every unique key
+        c.execute("ALTER TABLE transactions DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)")
+        c.execute(f"""
+            ALTER TABLE transactions PARTITION BY RANGE (TO_DAYS(timestamp)) (
+                PARTITION p_old VALUES LESS THAN (TO_DAYS('{months[0]:%Y-%m-%d}')),
+                {_partition_sql(months)},
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        """)
+        conn.commit()
+        return [f"p{m:%Y%m}" for m in months]
+
+    missing = [m for m in horizon if f"p{m:%Y%m}" not in existing]
+    # Only months after the newest existing partition can be carved out of pmax
+    newest = max((n for n in existing if n[1:].isdigit()), default=None)
+    missing = [m for m in missing if newest is None or f"{m:%Y%m}" > newest[1:]]
+    if missing:
+        c.execute(f"""
+            ALTER TABLE transactions REORGANIZE PARTITION pmax INTO (
+                {_partition_sql(missing)},
+                PARTITION pmax VALUES LESS THAN MAXVALUE
+            )
+        """)
+        conn.commit()
+    return [f"p{m:%Y%m}" for m in missing]
+
+
+# ==========================================
+# ARCHIVAL (COLD PARQUET)
+# ==========================================
+def _month_path(month):
+    return os.path.join(ARCHIVE_DIR, f"{month:%Y-%m}.parquet")
+
+
+def _write_month(month, rows):
+    """Merge rows into the month's Parquet file (atomic replace)"""
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    path = _month_path(month)
+    if os.path.exists(path):
+        rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+    rows = rows.drop_duplicates("id", keep="last").sort_values("id")
+    tmp = path + ".tmp"
+    rows.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, path)
+
+
+def archive_transactions(conn, older_than_days=ARCHIVE_AFTER_DAYS):
+    """Move closed orders older than the horizon to Parquet. Returns rows archived."""
+    cutoff = _month_start(datetime.now().date() - timedelta(days=older_than_days))
+    c = conn.cursor(pymysql.cursors.Cursor)
+    placeholders = ", ".join(["%s"] * len(CLOSED_STATUSES))
+    archived = 0
+
+    # Whole months only, oldest first, so each file is written once per run
+    c.execute("SELECT MIN(timestamp) FROM transactions")
+    first = c.fetchone()[0]
+    month = _month_start(first.date()) if first else cutoff
+    while month < cutoff:
+        end = _next_month(month)
+        rows = pd.read_sql(f"""
+            SELECT * FROM transactions
+            WHERE timestamp >= %s AND timestamp < %s AND status IN ({placeholders})
+        """, conn, params=(month, end, *CLOSED_STATUSES))
+
+        if not rows.empty:
+            _write_month(month, rows)
+            # By id, not by the read's predicate: an order closed since the read is not in the file
+            ids = [int(i) for i in rows["id"]]
+            for i in range(0, len(ids), DELETE_CHUNK):
+                chunk = ids[i:i + DELETE_CHUNK]
+                c.execute(f"DELETE FROM transactions WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            conn.commit()
+            archived += len(ids)
+
+            # Drop the month's partition once nothing is left in it
+            name = f"p{month:%Y%m}"
+            c.execute("SELECT COUNT(*) FROM transactions WHERE timestamp >= %s AND timestamp < %s", (month, end))
+            if c.fetchone()[0] == 0 and name in _partitions(c):
+                c.execute(f"ALTER TABLE transactions DROP PARTITION {name}")
+        month = end
+    return archived
+
+
+# ==========================================
+# READERS (HOT + ARCHIVE)
+# ==========================================
+def _archive_files(newest_first=True):
+    if not os.path.isdir(ARCHIVE_DIR):
+        return []
+    files = sorted(f for f in os.listdir(ARCHIVE_DIR) if f.endswith(".parquet"))
+    return [os.path.join(ARCHIVE_DIR, f) for f in (reversed(files) if newest_first else files)]
+
+
+def _file_month_end(path):
+    """First day after the month an archive file holds"""
+    month = datetime.strptime(os.path.basename(path)[:7], "%Y-%m").date()
+    return pd.Timestamp(_next_month(month))
+
+
+def _read_archive(path, columns, filters):
+    return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+
+def read_history(conn, email=None, limit=None, columns=None):
+    """
+    Newest-first orders for one user (or everyone). With a limit, archive
+    months are only opened until the limit-th newest row collected is newer
+    than anything left in them: the hot table also keeps old orders that
+    are still open, so its rows alone do not decide where the limit falls.
+    """
+    cols = columns or ["id", "email", "symbol", "qty", "price", "action", "order_type", "status", "timestamp"]
+    where, params = ("WHERE email=%s", [email]) if email else ("", [])
+    query = f"SELECT {', '.join(cols)} FROM transactions {where} ORDER BY timestamp DESC, id DESC"
+    if limit:
+        query += " LIMIT %s"
+        params.append(int(limit))
+    frames = [pd.read_sql(query, conn, params=params)]
+
+    filters = [("email", "==", email)] if email else None
+    for path in _archive_files():
+        if limit:
+            stamps = pd.concat([pd.to_datetime(f["timestamp"]) for f in frames], ignore_index=True)
+            if len(stamps) >= limit and stamps.nlargest(int(limit)).iloc[-1] >= _file_month_end(path):
+                break
+        frames.append(_read_archive(path, cols, filters))
+
+    history = pd.concat(frames, ignore_index=True).drop_duplicates("id")
+    history = history.sort_values(["timestamp", "id"], ascending=False)
+    return (history.head(limit) if limit else history).reset_index(drop=True)
+
+
+def read_transactions(conn, statuses=("COMPLETE",), email=None, columns=None):
+    """Every matching order from archive + hot table in time order (for replays)"""
+    cols = columns or ["id", "email", "symbol", "qty", "price", "action", "timestamp"]
+    where = [f"status IN ({', '.join(['%s'] * len(statuses))})"]
+    params = list(statuses)
+    if email:
+        where.append("email=%s")
+        params.append(email)
+
+    filters = [("status", "in", list(statuses))] + ([("email", "==", email)] if email else [])
+    frames = [_read_archive(p, cols + ["status"], filters)[cols] for p in _archive_files(newest_first=False)]
+    frames.append(pd.read_sql(f"SELECT {', '.join(cols)} FROM transactions WHERE {' AND '.join(where)}",
+                              conn, params=params))
+    tx = pd.concat(frames, ignore_index=True).drop_duplicates("id")
+    return tx.sort_values(["timestamp", "id"]).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        added = ensure_partitions(conn)
+        moved = archive_transactions(conn)
+    finally:
+        conn.close()
+    print(f"Partitions added: {', '.join(added) or 'none'}; {moved} closed orders archived to {ARCHIVE_DIR}")
@@ -0,0 +1,251 @@
+import hashlib
+import os
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from shared_state import get_shared_state
+
+# Work factor for new hashes; existing hashes with another cost are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get("QUANTIFY_BCRYPT_ROUNDS", 12))
+# Upper bound on CPU spent hashing at once (one process per concurrent hash)
+AUTH_WORKERS = int(os.environ.get("QUANTIFY_AUTH_WORKERS", 2))
+HASH_TIMEOUT = 30
+
+# Brute-force throttling (failed attempts per sliding window)
+MAX_FAILS_PER_EMAIL = 5
+MAX_FAILS_PER_IP = 20
+THROTTLE_WINDOW = 15 * 60
+
+# API tokens are shown once; only their SHA-256 is stored
+API_TOKEN_PREFIX = "qk_"
+
+# Login sessions live in the shared state so any worker can resume them
+SESSION_TTL = int(os.environ.get("QUANTIFY_SESSION_TTL", 12 * 3600))
+
+
+# ==========================================
+# HASHING (PROCESS POOL)
+# ==========================================
+def _hashpw(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode()
+
+
+def _checkpw(password, hashed):
+    return bcrypt.checkpw(password, hashed)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hash_pool():
+    """Bounded pool shared by every session; bcrypt never runs on the script thread"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=AUTH_WORKERS)
+    return _pool
+
+
+def hash_password(password, rounds=None):
+    future = get_hash_pool().submit(_hashpw, password.encode(), rounds or BCRYPT_ROUNDS)
+    return future.result(timeout=HASH_TIMEOUT)
+
+
+def hash_passwords(passwords, rounds=None):
+    """Hash many passwords across the pool (bulk imports)"""
+    rounds = rounds or BCRYPT_ROUNDS
+    return list(get_hash_pool().map(_hashpw, [p.encode() for p in passwords],
+                                    [rounds] * len(passwords), timeout=HASH_TIMEOUT * max(1, len(passwords))))
+
+
+def check_password_async(password, hashed):
+    """Returns a Future[bool]"""
+    return get_hash_pool().submit(_checkpw, password.encode(), hashed.encode())
+
+
+def check_password(password, hashed):
+    return check_password_async(password, hashed).result(timeout=HASH_TIMEOUT)
+
+
+def hash_cost(hashed):
+    match = re.match(r'^\$2[abxy]?\$(\d{2})\$', hashed or "")
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(hashed):
+    return hash_cost(hashed) != BCRYPT_ROUNDS
+
+
+def verify_and_upgrade(conn, email, password, stored_hash):
+    """
+    Check a password and, if it matches but was hashed with a different
+    work factor, transparently store a new hash at the current cost.
+    """
+    if not check_password(password, stored_hash):
+        return False
+
+    if needs_rehash(stored_hash):
+        c = conn.cursor()
+        c.execute("UPDATE users SET password=%s WHERE email=%s AND password=%s",
+                  (hash_password(password), email, stored_hash))
+        conn.commit()
+    return True
+
+
+# ==========================================
+# LOGIN THROTTLING
+# ==========================================
+class LoginThrottle:
+    """
+    Sliding-window failure counter per email and per client IP, kept in the
+    shared state so every worker process counts the same attempts.
+    Checked BEFORE any hashing so brute-force attempts cost no bcrypt CPU.
+    """
+
+    def __init__(self, max_per_email=MAX_FAILS_PER_EMAIL, max_per_ip=MAX_FAILS_PER_IP,
+                 window=THROTTLE_WINDOW):
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self.window = window
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind, value):
+        # Hashed like session ids: the store never sees the email or IP
+        return f"login_fails:{kind}:" + hashlib.sha256(value.encode()).hexdigest()
+
+    def _keys(self, email, ip):
+        keys = [(self._key("email", email.lower()), self.max_per_email)]
+        if ip is not None:
+            keys.append((self._key("ip", ip), self.max_per_ip))
+        return keys
+
+    def retry_after(self, email, ip=None):
+        """Seconds until another attempt is allowed (0 = allowed now)"""
+        now = time.time()
+        keys = self._keys(email, ip)
+        stored = get_shared_state().get_many(k for k, _ in keys)
+        wait = 0.0
+        for key, limit in keys:
+            hits = [t for t in stored.get(key, []) if t > now - self.window]
+            if len(hits) >= limit:
+                wait = max(wait, hits[0] + self.window - now)
+        return wait
+
+    def record_failure(self, email, ip=None):
+        # Wall-clock times: the timestamps are compared across processes
+        now = time.time()
+        store = get_shared_state()
+        with self._lock:
+            keys = self._keys(email, ip)
+            stored = store.get_many(k for k, _ in keys)
+            # Only the newest `limit` failures decide the wait
+            store.set_many({k: ([t for t in stored.get(k, []) if t > now - self.window] + [now])[-limit:]
+                            for k, limit in keys}, ttl=self.window)
+
+    def record_success(self, email):
+        get_shared_state().delete(self._key("email", email.lower()))
+
+
+_throttle = LoginThrottle()
+
+
+def get_login_throttle():
+    return _throttle
+
+
+# ==========================================
+# LOGIN SESSIONS
+# ==========================================
+def _session_key(sid):
+    # Like API tokens, the store only ever sees a hash of the session id
+    return "session:" + hashlib.sha256(sid.encode()).hexdigest()
+
+
+def create_session(email, name):
+    """New session id for a logged-in user (kept in a first-party cookie)"""
+    sid = secrets.token_urlsafe(24)
+    session = {"email": email, "name": name, "menu": None, "expires": time.time() + SESSION_TTL}
+    get_shared_state().set(_session_key(sid), session, ttl=SESSION_TTL)
+    return sid
+
+
+def load_session(sid):
+    """{email, name, menu, expires} of a live session, or None. Loading never extends it."""
+    if not sid:
+        return None
+    session = get_shared_state().get(_session_key(sid))
+    if session is None or session.get("expires", 0) <= time.time():
+        return None
+    return session
+
+
+def save_session(sid, **fields):
+    """Update a live session, keeping its original expiry"""
+    session = load_session(sid)
+    if session is not None:
+        session.update(fields)
+        get_shared_state().set(_session_key(sid), session, ttl=session["expires"] - time.time())
+
+
+def end_session(sid):
+    if sid:
+        get_shared_state().delete(_session_key(sid))
+
+
+# ==========================================
+# API TOKENS
+# ==========================================
+def _token_hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def create_api_token(conn, email, label=""):
+    """Returns the plain token (only time it is available)"""
+    token = API_TOKEN_PREFIX + secrets.token_urlsafe(32)
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO api_tokens (token_hash, email, label)
+        VALUES (%s, %s, %s)
+    """, (_token_hash(token), email, label))
+    conn.commit()
+    return token
+
+
+def list_api_tokens(conn, email):
+    c = conn.cursor()
+    c.execute("""
+        SELECT id, label, created_at, last_used_at FROM api_tokens
+        WHERE email=%s AND revoked=0 ORDER BY created_at
+    """, (email,))
+    return c.fetchall()
+
+
+def revoke_api_token(conn, email, token_id):
+    c = conn.cursor()
+    c.execute("UPDATE api_tokens SET revoked=1 WHERE id=%s AND email=%s", (token_id, email))
+    conn.commit()
+
+
+def resolve_api_token(conn, token):
+    """Email of an active user owning the token, or None"""
+    if not token or not token.startswith(API_TOKEN_PREFIX):
+        return None
+    c = conn.cursor()
+    c.execute("""
+        SELECT t.id, t.email FROM api_tokens t JOIN users u ON u.email = t.email
+        WHERE t.token_hash=%s AND t.revoked=0 AND u.status='ACTIVE'
+    """, (_token_hash(token),))
+    row = c.fetchone()
+    if row is None:
+        return None
+    c.execute("UPDATE api_tokens SET last_used_at=NOW() WHERE id=%s", (row[0],))
+    conn.commit()
+    return row[1]
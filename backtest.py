@@ -0,0 +1,204 @@
+"""
+Vectorized backtests for the order types the live engine supports.
+
+Strategy per (parameter set, symbol) slot, evaluated on each daily close
+exactly like process_pending_limit_orders evaluates the live price:
+
+    flat      -> LIMIT BUY   trigger = prev close * (1 - entry_pct)   fills if close <= trigger
+    in trade  -> LIMIT SELL  trigger = entry * (1 + take_profit_pct)  fills if close >= trigger
+                 STOP-LOSS   trigger = entry * (1 - stop_loss_pct)    fills if close <= trigger
+
+Fills happen at the close, brokerage is max(₹20, 0.05%) per side. The
+time loop runs once; every step updates a (params x symbols) matrix.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from orders import COMMISSION_FLAT, COMMISSION_PCT
+from warehouse import load_closes
+
+TRADING_DAYS = 252
+ORDER_TYPES = np.array(["LIMIT BUY", "LIMIT SELL", "STOP-LOSS"])
+ACTIONS = np.array(["BUY", "SELL"])
+DEFAULT_CAPITAL = 100000.0  # per symbol slot
+
+
+def param_grid(entry_pct, take_profit_pct, stop_loss_pct):
+    """Cartesian product of parameter lists as a DataFrame (one row per run)"""
+    return pd.DataFrame(
+        list(itertools.product(entry_pct, take_profit_pct, stop_loss_pct)),
+        columns=["entry_pct", "take_profit_pct", "stop_loss_pct"]
+    )
+
+
+def _brokerage(value):
+    return np.maximum(COMMISSION_FLAT, value * COMMISSION_PCT)
+
+
+# ==========================================
+# CORE ENGINE
+# ==========================================
+def backtest_matrix(dates, symbols, close, grid, capital=DEFAULT_CAPITAL):
+    """
+    close: (T, S) array of daily closes (NaN where a symbol has no bar).
+    grid: DataFrame of entry_pct / take_profit_pct / stop_loss_pct (P rows).
+    Returns (equity DataFrame T x P, trades DataFrame, summary DataFrame).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    T, S = close.shape
+    P = len(grid)
+
+    entry_pct = grid["entry_pct"].to_numpy(dtype=np.float64)[:, None]
+    tp_pct = grid["take_profit_pct"].to_numpy(dtype=np.float64)[:, None]
+    sl_pct = grid["stop_loss_pct"].to_numpy(dtype=np.float64)[:, None]
+
+    # Last known price per symbol, used for marking positions on missing bars
+    marked = pd.DataFrame(close).ffill().to_numpy()
+
+    cash = np.full((P, S), capital)
+    qty = np.zeros((P, S))
+    entry = np.zeros((P, S))
+    cost_basis = np.zeros((P, S))
+    equity = np.empty((T, P))
+    events = []
+
+    for t in range(T):
+        px = close[t]
+        valid = ~np.isnan(px)
+
+        if t > 0:
+            holding = qty > 0
+
+            # --- Exits: LIMIT SELL (take profit) or STOP-LOSS ---
+            hit_tp = px >= entry * (1 + tp_pct)
+            hit_sl = px <= entry * (1 - sl_pct)
+            sell = holding & valid & (hit_tp | hit_sl)
+            if sell.any():
+                value = np.where(sell, qty * px, 0.0)
+                fee = np.where(sell, _brokerage(value), 0.0)
+                cash += value - fee
+                pnl = value - fee - cost_basis
+                pi, si = np.nonzero(sell)
+                events.append((np.full(len(pi), t), pi, si, np.ones(len(pi), dtype=np.int8), qty[pi, si],
+                               px[si], fee[pi, si], pnl[pi, si], np.where(hit_tp[pi, si], 1, 2)))
+                qty[sell] = 0
+                entry[sell] = 0
+                cost_basis[sell] = 0
+
+            # --- Entries: LIMIT BUY below previous close ---
+            prev = marked[t - 1]
+            buy = (qty == 0) & valid & (px <= prev * (1 - entry_pct))
+            if buy.any():
+                # Largest quantity whose value + brokerage fits the slot's cash
+                q = np.floor((cash - COMMISSION_FLAT) / (px * (1 + COMMISSION_PCT)))
+                buy &= q >= 1
+                if buy.any():
+                    value = np.where(buy, q * px, 0.0)
+                    fee = np.where(buy, _brokerage(value), 0.0)
+                    cash -= value + fee
+                    qty = np.where(buy, q, qty)
+                    entry = np.where(buy, px, entry)
+                    cost_basis = np.where(buy, value + fee, cost_basis)
+                    pi, si = np.nonzero(buy)
+                    events.append((np.full(len(pi), t), pi, si, np.zeros(len(pi), dtype=np.int8), q[pi, si],
+                                   px[si], fee[pi, si], np.zeros(len(pi)), np.zeros(len(pi), dtype=np.int8)))
+
+        equity[t] = (cash + qty * np.nan_to_num(marked[t])).sum(axis=1)
+
+    dates = pd.DatetimeIndex(dates)
+    equity_df = pd.DataFrame(equity, index=dates, columns=grid.index)
+    trades = _trades_frame(events, dates, symbols, grid.index.to_numpy())
+    summary = _summary(equity_df, trades, grid, capital * S)
+    return equity_df, trades, summary
+
+
+def _trades_frame(events, dates, symbols, runs):
+    cols = ["date", "run", "symbol", "action", "qty", "price", "brokerage", "pnl", "order_type"]
+    if not events:
+        return pd.DataFrame(columns=cols)
+    # Events are kept as arrays per bar and concatenated once at the end
+    t, pi, si, side, q, price, fee, pnl, kind = (np.concatenate(f) for f in zip(*events))
+    # Categoricals keep millions of fills cheap to build and to group by
+    return pd.DataFrame({
+        "date": dates[t], "run": runs[pi],
+        "symbol": pd.Categorical.from_codes(si, categories=list(symbols)),
+        "action": pd.Categorical.from_codes(side, categories=list(ACTIONS)),
+        "qty": q.astype(np.int64), "price": price, "brokerage": fee, "pnl": pnl,
+        "order_type": pd.Categorical.from_codes(kind, categories=list(ORDER_TYPES)),
+    })[cols]
+
+
+def _summary(equity, trades, grid, start_value):
+    eq = equity.to_numpy()
+    years = max(len(eq) / TRADING_DAYS, 1 / TRADING_DAYS)
+    final = eq[-1]
+
+    rets = np.diff(eq, axis=0) / eq[:-1] if len(eq) > 1 else np.zeros((1, eq.shape[1]))
+    std = rets.std(axis=0)
+    sharpe = np.where(std > 0, rets.mean(axis=0) / np.where(std > 0, std, 1) * np.sqrt(TRADING_DAYS), 0.0)
+    peak = np.maximum.accumulate(eq, axis=0)
+    max_dd = ((eq - peak) / peak).min(axis=0)
+
+    summary = grid.copy()
+    summary["final_equity"] = final.round(2)
+    summary["total_return_pct"] = ((final / start_value - 1) * 100).round(2)
+    summary["cagr_pct"] = (((final / start_value) ** (1 / years) - 1) * 100).round(2)
+    summary["max_drawdown_pct"] = (max_dd * 100).round(2)
+    summary["sharpe"] = sharpe.round(2)
+
+    if not trades.empty:
+        closed = trades[trades["action"] == "SELL"]
+        by_run = closed.groupby("run")["pnl"]
+        summary["trades"] = by_run.size().reindex(grid.index, fill_value=0)
+        summary["win_rate_pct"] = ((closed["pnl"] > 0).groupby(closed["run"]).mean() * 100).reindex(grid.index).fillna(0).round(2)
+        summary["brokerage_paid"] = trades.groupby("run")["brokerage"].sum().reindex(grid.index, fill_value=0).round(2)
+    else:
+        summary["trades"] = 0
+        summary["win_rate_pct"] = 0.0
+        summary["brokerage_paid"] = 0.0
+    return summary
+
+
+# ==========================================
+# RUNNERS
+# ==========================================
+def load_universe(symbols, start=None, end=None):
+    closes = load_closes(symbols, start, end)
+    return closes.index, list(closes.columns), closes.to_numpy()
+
+
+def run_backtest(symbols, grid, start=None, end=None, capital=DEFAULT_CAPITAL):
+    """Backtest every parameter row over the warehouse history of the symbols"""
+    dates, syms, close = load_universe(symbols, start, end)
+    if len(dates) == 0:
+        raise ValueError("No warehouse history for the requested symbols/range")
+    return backtest_matrix(dates, syms, close, grid, capital)
+
+
+def _run_chunk(args):
+    symbols, grid, start, end, capital = args
+    return run_backtest(symbols, grid, start, end, capital)
+
+
+def run_sweep(symbols, grid, start=None, end=None, capital=DEFAULT_CAPITAL, workers=None):
+    """
+    Split a large parameter grid across a process pool. Each worker maps
+    the warehouse files itself, so only the grid chunk is pickled.
+    Returns the same (equity, trades, summary) as run_backtest.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(grid) < 2:
+        return run_backtest(symbols, grid, start, end, capital)
+
+    chunks = [grid.iloc[idx] for idx in np.array_split(np.arange(len(grid)), min(workers, len(grid)))]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        results = list(pool.map(_run_chunk, [(symbols, c, start, end, capital) for c in chunks]))
+
+    equity = pd.concat([r[0] for r in results], axis=1)
+    trades = pd.concat([r[1] for r in results], ignore_index=True)
+    summary = pd.concat([r[2] for r in results])
+    return equity, trades, summary
@@ -0,0 +1,139 @@
+"""
+Basket orders: many MARKET orders validated and filled together.
+
+The whole basket is checked against one balance read and one holdings
+read, priced from one batched quote call and written in one DB
+transaction. SELL rows are applied before BUY rows so sale proceeds can
+fund the buys of a rebalance.
+
+Modes:
+  * all_or_nothing - any invalid row rolls the whole basket back
+  * best_effort    - invalid rows are skipped, the rest are filled
+"""
+import pandas as pd
+
+from lots import LotBook
+from market_data import get_live_prices
+from orders import calc_brokerage, ADMIN_EMAIL
+from tradelog import append_trades
+
+BASKET_COLUMNS = ["symbol", "action", "qty"]
+MODES = ("all_or_nothing", "best_effort")
+
+
+def normalize_basket(df):
+    """Editor/CSV frame -> clean symbol/action/qty rows (blank rows dropped)"""
+    df = df.rename(columns=str.lower)
+    missing = [c for c in BASKET_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Basket is missing column(s): {', '.join(missing)}")
+
+    df = df[BASKET_COLUMNS].dropna(how="all").copy()
+    df["symbol"] = df["symbol"].astype(str).str.strip().str.upper()
+    df["action"] = df["action"].astype(str).str.strip().str.upper()
+    df["qty"] = pd.to_numeric(df["qty"], errors="coerce")
+    df = df[df["symbol"].ne("") & df["symbol"].ne("NAN")]
+    return df.reset_index(drop=True)
+
+
+def execute_basket(conn, email, basket, mode="all_or_nothing"):
+    """
+    Returns the basket with price, brokerage, status ('FILLED', 'SKIPPED',
+    'REJECTED') and reason per row. Nothing is written unless at least
+    one row fills (and, in all_or_nothing mode, every row is valid).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown basket mode: {mode}")
+
+    basket = normalize_basket(basket)
+    if basket.empty:
+        raise ValueError("Basket is empty")
+    symbols = basket["symbol"].unique().tolist()
+    placeholders = ", ".join(["%s"] * len(symbols))
+
+    # One batched quote for the whole basket, fetched before any row is locked
+    quotes = get_live_prices(symbols)["price"]
+
+    c = conn.cursor()
+    try:
+        # One balance read and one holdings read, locked until the basket commits
+        c.execute("SELECT balance FROM users WHERE email=%s FOR UPDATE", (email,))
+        cash = c.fetchone()[0]
+        c.execute(f"""
+            SELECT symbol, SUM(qty_open) FROM tax_lots
+            WHERE email=%s AND symbol IN ({placeholders})
+            GROUP BY symbol
+        """, (email, *symbols))
+        holdings = {sym: int(q) for sym, q in c.fetchall()}
+        c.execute(f"SELECT symbol FROM stocks WHERE symbol IN ({placeholders})", symbols)
+        listed = {row[0] for row in c.fetchall()}
+
+        basket["price"] = basket["symbol"].map(quotes)
+        basket["brokerage"] = 0.0
+        basket["status"] = "REJECTED"
+        basket["reason"] = ""
+
+        # --- Validate in execution order: sells free cash for the buys ---
+        order = basket.sort_values("action", key=lambda a: a.ne("SELL"), kind="stable").index
+        for i in order:
+            row = basket.loc[i]
+            qty = row["qty"]
+            if row["action"] not in ("BUY", "SELL"):
+                reason = "Action must be BUY or SELL"
+            elif pd.isna(qty) or qty <= 0 or qty != int(qty):
+                reason = "Quantity must be a positive whole number"
+            elif row["symbol"] not in listed:
+                reason = "Symbol is not listed"
+            elif pd.isna(row["price"]):
+                reason = "No live price"
+            else:
+                qty = int(qty)
+                value = row["price"] * qty
+                brokerage = calc_brokerage(value)
+                if row["action"] == "SELL" and holdings.get(row["symbol"], 0) < qty:
+                    reason = f"Only {holdings.get(row['symbol'], 0)} shares held"
+                elif row["action"] == "BUY" and cash < value + brokerage:
+                    reason = f"Insufficient funds (₹{value + brokerage - cash:,.2f} short)"
+                else:
+                    reason = ""
+                    if row["action"] == "SELL":
+                        holdings[row["symbol"]] -= qty
+                        cash += value - brokerage
+                    else:
+                        holdings[row["symbol"]] = holdings.get(row["symbol"], 0) + qty
+                        cash -= value + brokerage
+                    basket.loc[i, ["qty", "brokerage", "status"]] = [qty, round(brokerage, 2), "FILLED"]
+            basket.loc[i, "reason"] = reason
+
+        filled = basket.loc[order][basket.loc[order, "status"] == "FILLED"]
+        if mode == "all_or_nothing" and len(filled) < len(basket):
+            conn.rollback()
+            basket.loc[basket["status"] == "FILLED", ["status", "reason"]] = ["SKIPPED", "Basket rolled back"]
+            return basket
+        if filled.empty:
+            conn.rollback()
+            return basket
+
+        # --- One transaction for every fill ---
+        lots = LotBook(c, [(email, s) for s in filled.loc[filled["action"] == "SELL", "symbol"]])
+        for row in filled.itertuples():
+            c.execute("""
+                INSERT INTO transactions (email, symbol, qty, price, action, order_type, status)
+                VALUES (%s, %s, %s, %s, %s, 'MARKET', 'COMPLETE')
+            """, (email, row.symbol, int(row.qty), float(row.price), row.action))
+            fill = lots.buy if row.action == "BUY" else lots.sell
+            fill(email, row.symbol, int(row.qty), float(row.price), float(row.brokerage), c.lastrowid)
+        lots.flush()
+
+        signed = filled["price"] * filled["qty"] * filled["action"].map({"BUY": -1, "SELL": 1})
+        total_brokerage = float(filled["brokerage"].sum())
+        c.execute("UPDATE users SET balance = balance + %s WHERE email=%s",
+                  (float(signed.sum()) - total_brokerage, email))
+        c.execute("UPDATE users SET balance = balance + %s WHERE email=%s", (total_brokerage, ADMIN_EMAIL))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    append_trades(email, [(r.symbol, int(r.qty), float(r.price), float(r.brokerage), r.action, "MARKET")
+                          for r in filled.itertuples()])
+    return basket
@@ -0,0 +1,85 @@
+"""
+Load generator for the HTTP API (start it first: uvicorn api:app).
+
+    python bench_api.py --token qk_... --path "/quotes?symbols=TCS,INFY"
+    python bench_api.py --token qk_... --path /holdings --concurrency 64 --duration 30
+
+Keeps N keep-alive HTTP/1.1 connections busy for the duration and reports
+sustained requests per second, latency percentiles and status counts.
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    status = int(lines[0].split()[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith("content-length:"):
+            length = int(line.split(":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, request, deadline, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            statuses[await _read_response(reader)] += 1
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+async def run(url, path, token, concurrency, duration, method="GET", body=b""):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = (
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Authorization: Bearer {token}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode() + body
+
+    latencies, statuses = [], Counter()
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*[
+        _worker(host, port, request, deadline, latencies, statuses) for _ in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1e3
+    print(f"{method} {path}  concurrency={concurrency}  duration={elapsed:.1f}s")
+    print(f"requests: {len(lat)}  throughput: {len(lat) / elapsed:,.0f} req/s")
+    if len(lat):
+        print(f"latency ms  p50={np.percentile(lat, 50):.2f}  p95={np.percentile(lat, 95):.2f}  "
+              f"p99={np.percentile(lat, 99):.2f}  max={lat.max():.2f}")
+    print(f"status codes: {dict(statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--token", default="")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", default="", help="JSON body for POST requests")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.path, args.token, args.concurrency, args.duration,
+                    args.method, args.body.encode()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Group commit vs one commit per order for MARKET fills.
+
+    python setup_db.py                       # once, creates the trading_app schema
+    python bench_fills.py --threads 32 --orders 50
+
+Seeds the scratch database of bench_sessions.py (QUANTIFY_DB_NAME, default
+trading_app_loadtest), then has N threads place MARKET buys and sells
+twice: each order written and committed on its own, and through the
+group committer (submit_market_order). Reported: orders per second,
+order latency percentiles, fills per commit and commit latency.
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from bench_sessions import seed_db
+from db import get_connection
+from orders import get_fill_stats, reset_fill_stats, submit_market_order, write_fills
+
+
+def _orders(email, n, symbols, rng):
+    # Buys first so the sells always have lots to consume
+    buys = [(email, rng.choice(symbols), "BUY", rng.randint(1, 5), round(rng.uniform(100, 500), 2))
+            for _ in range(n // 2)]
+    sells = [(e, s, "SELL", q, p) for e, s, _, q, p in buys]
+    return buys + sells
+
+
+def run(mode, emails, n_orders, symbols, seed=11):
+    reset_fill_stats()
+    latencies, lock = [], threading.Lock()
+
+    def trader(email):
+        rng = random.Random(f"{seed}{email}")
+        conn = get_connection() if mode == "single" else None
+        own = []
+        try:
+            for e, symbol, action, qty, price in _orders(email, n_orders, symbols, rng):
+                t0 = time.perf_counter()
+                if mode == "single":
+                    write_fills(conn, [{"email": e, "symbol": symbol, "qty": qty, "action": action,
+                                        "price": price, "order_type": "MARKET"}])
+                else:
+                    submit_market_order(e, symbol, action, qty, price)
+                own.append(time.perf_counter() - t0)
+        finally:
+            if conn is not None:
+                conn.close()
+        with lock:
+            latencies.extend(own)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(emails)) as pool:
+        list(pool.map(trader, emails))
+    wall = time.perf_counter() - t0
+
+    lat = np.array(latencies) * 1e3
+    stats = get_fill_stats()
+    print(f"{mode:>6}: {len(lat) / wall:,.0f} orders/s  "
+          f"order p50={np.percentile(lat, 50):.1f} ms p99={np.percentile(lat, 99):.1f} ms  "
+          f"fills/commit avg={stats['avg_batch']:.1f} max={stats['max_batch']}  "
+          f"commit p50={stats['p50_commit_ms']:.2f} ms p99={stats['p99_commit_ms']:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=40, help="MARKET orders per thread and mode")
+    parser.add_argument("--stocks", type=int, default=30)
+    args = parser.parse_args()
+
+    emails = seed_db(args.threads, args.stocks)
+    symbols = [f"LT{i:03d}" for i in range(args.stocks)]
+    for mode in ("single", "group"):
+        run(mode, emails, args.orders, symbols)
+
+
+if __name__ == "__main__":
+    main()
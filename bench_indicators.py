@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from indicators import INDICATORS, IndicatorCache
+
+HISTORY_SIZES = (5000, 100000)  # ~ 65 and ~ 1,300 sessions of 5m bars
+N_NEW = 50                      # live bars arriving one rerun at a time
+
+
+def synthetic_bars(n, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 1000 + np.cumsum(rng.normal(0, 1.5, n))
+    return pd.DataFrame({
+        "Datetime": pd.date_range("2025-01-01 09:15", periods=n, freq="5min"),
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": rng.integers(1000, 50000, n).astype(float),
+    })
+
+
+def run(n_bars):
+    bars = synthetic_bars(n_bars + N_NEW)
+    print(f"{n_bars} history bars, then {N_NEW} new bars one rerun at a time")
+    print(f"{'indicator':<20}{'full recompute/bar':>20}{'incremental/bar':>18}{'speedup':>10}")
+
+    for name in INDICATORS:
+        # Baseline: recompute the whole series on every rerun
+        t0 = time.perf_counter()
+        for i in range(N_NEW):
+            INDICATORS[name]().compute(bars.iloc[:n_bars + i + 1])
+        full = (time.perf_counter() - t0) / N_NEW
+
+        cache = IndicatorCache()
+        cache.get("BENCH", "5m", name, bars.iloc[:n_bars])
+        t0 = time.perf_counter()
+        for i in range(N_NEW):
+            cache.get("BENCH", "5m", name, bars.iloc[:n_bars + i + 1])
+        inc = (time.perf_counter() - t0) / N_NEW
+
+        print(f"{name:<20}{full * 1e3:>17.2f} ms{inc * 1e3:>15.2f} ms{full / inc:>9.1f}x")
+    print()
+
+
+def main():
+    for n_bars in HISTORY_SIZES:
+        run(n_bars)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from market_state import MarketState
+
+N_SYMBOLS = 10000
+N_LOOKUPS = 100000
+
+
+def make_frame(n):
+    rng = np.random.default_rng(7)
+    prev = rng.uniform(50, 5000, n).round(2)
+    return pd.DataFrame({
+        "symbol": [f"SYM{i:05d}" for i in range(n)],
+        "prev_close": prev,
+        "today_open": (prev * rng.uniform(0.97, 1.03, n)).round(2),
+    })
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def main():
+    df = make_frame(N_SYMBOLS)
+    symbols = df["symbol"].tolist()
+    prices = dict(zip(symbols, (df["today_open"] * 1.01).tolist()))
+
+    def build_state():
+        state = MarketState()
+        state.load_frame(df)
+        state.update_prices(prices)
+        return state
+
+    def build_dicts():
+        return {
+            r.symbol: {"last": prices[r.symbol], "open": r.today_open,
+                       "prev_close": r.prev_close, "ts": 0, "change_pct": 0.0}
+            for r in df.itertuples()
+        }
+
+    state, state_bytes = measure(build_state)
+    dicts, dict_bytes = measure(build_dicts)
+    # Symbol strings are shared with the source frame, so count them once for both
+    print(f"Symbols: {N_SYMBOLS}")
+    print(f"MarketState:   {state_bytes / N_SYMBOLS:7.1f} bytes/symbol")
+    print(f"dict of dicts: {dict_bytes / N_SYMBOLS:7.1f} bytes/symbol")
+
+    snap = state.snapshot()
+    t0 = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        snap.get(symbols[i % N_SYMBOLS])
+    t1 = time.perf_counter()
+    print(f"Lookup:        {(t1 - t0) / N_LOOKUPS * 1e6:7.2f} us/lookup")
+
+    t0 = time.perf_counter()
+    state.update_prices(prices)
+    t1 = time.perf_counter()
+    print(f"Batch update + change % for all symbols: {(t1 - t0) * 1e3:.2f} ms")
+
+    t0 = time.perf_counter()
+    df["Change %"] = ((df["today_open"] - df["prev_close"]) / df["prev_close"] * 100).round(2)
+    t1 = time.perf_counter()
+    print(f"pandas change % (Dashboard baseline): {(t1 - t0) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Symbol search latency: sorted-index SymbolIndex vs filtering a DataFrame.
+
+    python bench_search.py --stocks 10000 --queries 5000
+
+Builds a synthetic universe (no DB needed) and runs the same random 1-4
+character prefixes of symbols and company-name words through
+SymbolIndex.search and through the str.contains filter a page would
+otherwise run on every keystroke. Reported: build time and per-query
+latency percentiles.
+"""
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+import pandas as pd
+
+from symbol_search import SymbolIndex
+
+WORDS = ["Bank", "Finance", "Steel", "Power", "Motors", "Pharma", "Industries", "Cement",
+         "Textiles", "Chemicals", "Energy", "Infra", "Holdings", "Foods", "Systems", "Tech"]
+
+
+def _universe(n, rng):
+    symbols = set()
+    while len(symbols) < n:
+        symbols.add("".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 10))))
+    return [(s, f"{s.title()} {' '.join(rng.sample(WORDS, 2))} Ltd") for s in sorted(symbols)]
+
+
+def _report(label, times):
+    us = np.array(times) * 1e6
+    print(f"  {label:<22} p50 {np.percentile(us, 50):9.1f} us   p99 {np.percentile(us, 99):9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    rows = _universe(args.stocks, rng)
+    t0 = time.perf_counter()
+    index = SymbolIndex(rows)
+    print(f"Built index over {len(index)} stocks in {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    queries = []
+    for _ in range(args.queries):
+        symbol, name = rng.choice(rows)
+        source = rng.choice([symbol, rng.choice(name.split())])
+        queries.append(source[:rng.randint(1, 4)].lower())
+
+    df = pd.DataFrame(rows, columns=["symbol", "company_name"])
+    indexed, scanned = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, args.k)
+        indexed.append(time.perf_counter() - t0)
+    for q in queries[:500]:
+        t0 = time.perf_counter()
+        mask = df["symbol"].str.lower().str.startswith(q) | df["company_name"].str.lower().str.contains(q, regex=False)
+        df.loc[mask, "symbol"].head(args.k).tolist()
+        scanned.append(time.perf_counter() - t0)
+
+    print(f"Top-{args.k} search:")
+    _report("SymbolIndex", indexed)
+    _report("DataFrame filter", scanned)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Concurrent-session load test for Quantify.py, built on Streamlit's AppTest.
+
+    python setup_db.py                          # once, creates the trading_app schema
+    python bench_sessions.py --users 20 --rounds 5
+
+Copies the trading_app schema into a scratch database (QUANTIFY_DB_NAME,
+default trading_app_loadtest) and seeds it with users, stocks, trades,
+tax lots and watchlists. Quote, chart and news providers are replaced by
+deterministic in-process fakes, so no network is involved. N logged-in
+sessions then run in parallel threads, each cycling through Dashboard,
+Live Market & Trade, Portfolio, Watchlist and History.
+
+Reported: per-page latency percentiles, DB queries per page render,
+script exceptions, and process memory growth per session.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import types
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Scratch DB and data dirs must be set before the app modules are imported
+os.environ.setdefault("QUANTIFY_DB_NAME", "trading_app_loadtest")
+_scratch = tempfile.mkdtemp(prefix="quantify_bench_")
+os.environ.setdefault("QUANTIFY_WAREHOUSE_DIR", os.path.join(_scratch, "warehouse"))
+os.environ.setdefault("QUANTIFY_RISK_CACHE_DIR", os.path.join(_scratch, "risk_cache"))
+
+import feedparser
+import numpy as np
+import pandas as pd
+import pymysql
+import yfinance
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.testing.v1 import AppTest
+
+from db import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME, get_connection
+from lots import rebuild_lots
+from orders import ADMIN_EMAIL
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Quantify.py")
+SOURCE_DB = "trading_app"
+PAGES = ["Dashboard", "Live Market & Trade", "Portfolio", "Watchlist", "History"]
+SCRIPT_TIMEOUT = 60
+
+
+# ==========================================
+# FAKE PROVIDERS
+# ==========================================
+def _bars(ticker, interval):
+    """Deterministic intraday random walk per ticker (tz-aware like yfinance)"""
+    step, n = (5, 75) if interval == "5m" else (1, 375)
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    close = 100 + rng.integers(0, 2000) + np.cumsum(rng.normal(0, 0.5, n))
+    start = pd.Timestamp(datetime.now().date()).tz_localize("Asia/Kolkata") + pd.Timedelta(hours=9, minutes=15)
+    index = pd.date_range(start, periods=n, freq=f"{step}min", name="Datetime")
+    return pd.DataFrame({
+        "Open": close, "High": close + 0.5, "Low": close - 0.5, "Close": close,
+        "Volume": rng.integers(1000, 50000, n).astype(float),
+    }, index=index)
+
+
+class _FakeTicker:
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.info = {"longName": ticker, "sector": "Load Test"}
+
+    def history(self, period="1d", interval="1m", **kwargs):
+        return _bars(self.ticker, interval)
+
+
+def _fake_download(tickers, interval="1d", **kwargs):
+    # No daily history: warehouse-backed features see an empty provider
+    if interval != "1m":
+        return pd.DataFrame()
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    frames = pd.concat({t: _bars(t, interval) for t in tickers}, axis=1)
+    return frames.swaplevel(axis=1).sort_index(axis=1)  # (field, ticker) like yf.download
+
+
+def install_fake_providers():
+    yfinance.Ticker = _FakeTicker
+    yfinance.download = _fake_download
+    feedparser.parse = lambda url, *a, **k: types.SimpleNamespace(entries=[])
+
+
+# ==========================================
+# QUERY COUNTING (PER SESSION)
+# ==========================================
+_queries = defaultdict(int)
+
+
+def _session_key():
+    ctx = get_script_run_ctx()
+    return ctx.session_state["user_email"] if ctx is not None and "user_email" in ctx.session_state else None
+
+
+def install_query_counter():
+    for name in ("execute", "executemany"):
+        original = getattr(pymysql.cursors.Cursor, name)
+
+        def counted(self, query, args=None, _original=original):
+            _queries[_session_key()] += 1
+            return _original(self, query, args)
+
+        setattr(pymysql.cursors.Cursor, name, counted)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ==========================================
+# SEEDED DATABASE
+# ==========================================
+def seed_db(n_users, n_stocks=30, trades_per_user=20, watch_per_user=8, seed=7):
+    if DB_NAME == SOURCE_DB:
+        raise SystemExit("Refusing to seed the live trading_app database; set QUANTIFY_DB_NAME")
+
+    server = pymysql.connect(host=DB_HOST, port=DB_PORT, user=DB_USER, password=DB_PASSWORD)
+    try:
+        c = server.cursor()
+        c.execute(f"CREATE DATABASE IF NOT EXISTS {DB_NAME}")
+        c.execute(f"SHOW TABLES FROM {SOURCE_DB}")
+        for (table,) in c.fetchall():
+            c.execute(f"DROP TABLE IF EXISTS {DB_NAME}.{table}")
+            c.execute(f"CREATE TABLE {DB_NAME}.{table} LIKE {SOURCE_DB}.{table}")
+        server.commit()
+    finally:
+        server.close()
+
+    rng = random.Random(seed)
+    symbols = [f"LT{i:03d}" for i in range(n_stocks)]
+    emails = [f"trader{i}@loadtest.local" for i in range(n_users)]
+    now = datetime.now()
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.executemany("""
+            INSERT INTO stocks (symbol, company_name, category, prev_close, today_open)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(s, f"Load Test {s}", f"Sector {i % 5}", float(_bars(s + ".NS", "1m")["Close"].iloc[0]),
+               float(_bars(s + ".NS", "1m")["Open"].iloc[0])) for i, s in enumerate(symbols)])
+        c.executemany("""
+            INSERT INTO users (email, username, password, balance, status)
+            VALUES (%s, %s, 'x', %s, 'ACTIVE')
+        """, [(e, e.split("@")[0], 1_000_000.0) for e in emails] + [(ADMIN_EMAIL, "admin", 0.0)])
+        c.executemany("""
+            INSERT INTO transactions (email, symbol, qty, price, action, order_type, status, timestamp)
+            VALUES (%s, %s, %s, %s, 'BUY', 'MARKET', 'COMPLETE', %s)
+        """, [(e, rng.choice(symbols), rng.randint(1, 50), round(rng.uniform(100, 2000), 2),
+               now - timedelta(days=rng.randint(1, 700)))
+              for e in emails for _ in range(trades_per_user)])
+        c.executemany("INSERT IGNORE INTO watchlist (email, symbol) VALUES (%s, %s)",
+                      [(e, s) for e in emails for s in rng.sample(symbols, min(watch_per_user, n_stocks))])
+        conn.commit()
+        rebuild_lots(conn)
+    finally:
+        conn.close()
+    return emails
+
+
+# ==========================================
+# SESSIONS
+# ==========================================
+def run_session(email, rounds, samples, errors):
+    at = AppTest.from_file(APP, default_timeout=SCRIPT_TIMEOUT)
+    at.session_state["logged_in"] = True
+    at.session_state["user_email"] = email
+    at.session_state["user_name"] = email.split("@")[0]
+
+    for _ in range(rounds):
+        for page in PAGES:
+            at.session_state["menu_choice"] = page
+            before = _queries[email]
+            t0 = time.perf_counter()
+            at.run()
+            elapsed = time.perf_counter() - t0
+            samples.append((page, elapsed, _queries[email] - before))
+            for exc in at.exception:
+                errors.append((page, exc.message))
+    return at  # kept alive so its session state counts towards memory
+
+
+def report(samples, errors, wall, n_users, rss_before, rss_after):
+    df = pd.DataFrame(samples, columns=["page", "seconds", "queries"])
+    ms = df.assign(ms=df["seconds"] * 1e3).groupby("page", sort=False)
+    table = pd.DataFrame({
+        "renders": ms.size(),
+        "p50 ms": ms["ms"].median(),
+        "p95 ms": ms["ms"].quantile(0.95),
+        "p99 ms": ms["ms"].quantile(0.99),
+        "max ms": ms["ms"].max(),
+        "queries/render": ms["queries"].mean(),
+    }).round(1)
+
+    print(table.to_string())
+    print(f"\n{len(df)} renders by {n_users} concurrent sessions in {wall:.1f}s "
+          f"({len(df) / wall:.1f} renders/s)")
+    print(f"RSS {rss_before:.0f} MB -> {rss_after:.0f} MB "
+          f"({(rss_after - rss_before) / n_users:.2f} MB per session)")
+    if errors:
+        print(f"\n{len(errors)} script exceptions, first few:")
+        for page, message in errors[:5]:
+            print(f"  [{page}] {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--stocks", type=int, default=30)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the scratch DB from a previous run")
+    args = parser.parse_args()
+
+    install_fake_providers()
+    install_query_counter()
+    emails = ([f"trader{i}@loadtest.local" for i in range(args.users)] if args.no_seed
+              else seed_db(args.users, args.stocks))
+
+    # Warm-up: imports, module singletons and Streamlit caches are not per-session cost
+    run_session(emails[0], 1, [], [])
+    rss_before = rss_mb()
+
+    samples, errors = [], []
+    lock = threading.Lock()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        def one(email):
+            s, e = [], []
+            at = run_session(email, args.rounds, s, e)
+            with lock:
+                samples.extend(s)
+                errors.extend(e)
+            return at
+
+        sessions = list(pool.map(one, emails))
+    wall = time.perf_counter() - t0
+
+    report(samples, errors, wall, args.users, rss_before, rss_mb())
+    del sessions
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+End-of-day settlement on a synthetic day (no DB needed).
+
+    python bench_settlement.py --fills 1000000 --users 5000 --workers 8 --pdf
+
+Generates one day of fills, then times the vectorized steps of
+settlement.py (price_fills + user_totals) against a per-row loop over a
+sample, and the contract notes written with one process and with
+--workers processes. Notes go to a temporary directory.
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from orders import calc_brokerage
+from settlement import price_fills, user_totals, write_contract_notes
+
+LOOP_SAMPLE = 50_000
+
+
+def _day(n_fills, n_users, day, seed=7):
+    rng = np.random.default_rng(seed)
+    symbols = np.array([f"SYM{i:03d}" for i in range(200)])
+    seconds = np.sort(rng.integers(9 * 3600 + 15 * 60, 15 * 3600 + 30 * 60, n_fills))
+    return pd.DataFrame({
+        "id": np.arange(1, n_fills + 1),
+        "email": np.array([f"trader{i}@loadtest.local" for i in range(n_users)])[rng.integers(0, n_users, n_fills)],
+        "symbol": symbols[rng.integers(0, len(symbols), n_fills)],
+        "qty": rng.integers(1, 200, n_fills),
+        "price": rng.uniform(50, 5000, n_fills).round(2),
+        "action": np.where(rng.random(n_fills) < 0.5, "BUY", "SELL"),
+        "order_type": "MARKET",
+        "timestamp": day + pd.to_timedelta(seconds, unit="s"),
+    })
+
+
+def _loop_totals(fills):
+    """What the job would do without set-based processing"""
+    totals = {}
+    for row in fills.itertuples(index=False):
+        gross = row.price * row.qty
+        brokerage = calc_brokerage(gross)
+        t = totals.setdefault(row.email, {"fills": 0, "brokerage": 0.0, "net_amount": 0.0})
+        t["fills"] += 1
+        t["brokerage"] += brokerage
+        t["net_amount"] += (-gross if row.action == "BUY" else gross) - brokerage
+    return totals
+
+
+def _notes(fills, totals, day, workers, pdf):
+    with tempfile.TemporaryDirectory() as out_dir:
+        t0 = time.perf_counter()
+        n = sum(len(chunk) for chunk in write_contract_notes(fills, totals, day, out_dir, workers, pdf))
+        return n, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fills", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--pdf", action="store_true")
+    args = parser.parse_args()
+    day = pd.Timestamp("2026-10-16")
+
+    fills = _day(args.fills, args.users, day)
+    print(f"{len(fills):,} fills for {fills['email'].nunique():,} users")
+
+    t0 = time.perf_counter()
+    priced = price_fills(fills)
+    totals = user_totals(priced)
+    vectorized = time.perf_counter() - t0
+    sample = fills.iloc[:LOOP_SAMPLE]
+    t0 = time.perf_counter()
+    _loop_totals(sample)
+    loop = (time.perf_counter() - t0) * len(fills) / len(sample)
+    print(f"Totals:  vectorized {vectorized:6.2f}s   per-row loop {loop:6.2f}s (extrapolated from {len(sample):,} rows)")
+    print(f"         brokerage credited to admin: INR {totals['brokerage'].sum():,.2f}")
+
+    for workers in dict.fromkeys([1, args.workers]):
+        n, seconds = _notes(priced, totals, day, workers, args.pdf)
+        print(f"Notes:   {n:,} users with {workers} process(es) in {seconds:6.2f}s"
+              f"{' (CSV + PDF)' if args.pdf else ' (CSV)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark for Quantify.py.
+
+    python bench_startup.py                      # login page only, no DB needed
+    python bench_startup.py --email trader0@loadtest.local --page Portfolio
+
+Every measurement runs in a fresh interpreter so nothing is cached:
+import time of the heavy third-party libraries on their own, then the time
+to first paint of a page (first AppTest script run after `import
+streamlit`) together with the heavy modules that page pulled in.
+Logged-in pages need the database (e.g. the bench_sessions.py scratch DB).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Quantify.py")
+HEAVY = ["pandas", "numpy", "yfinance", "plotly.graph_objects", "feedparser", "bcrypt", "pymysql"]
+
+_IMPORT = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps(time.perf_counter() - t0))
+"""
+
+_PAINT = """
+import json, sys, time
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file({app!r}, default_timeout=120)
+if {email!r}:
+    at.session_state["logged_in"] = True
+    at.session_state["user_email"] = {email!r}
+    at.session_state["user_name"] = {email!r}.split("@")[0]
+    at.session_state["menu_choice"] = {page!r}
+t0 = time.perf_counter()
+at.run()
+print(json.dumps({{
+    "seconds": time.perf_counter() - t0,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+    "errors": [e.message for e in at.exception],
+}}))
+"""
+
+
+def _run(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", default="", help="log in as this user (needs the DB)")
+    parser.add_argument("--page", default="Dashboard")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Import time (fresh interpreter, best of runs):")
+    for module in HEAVY:
+        best = min(_run(_IMPORT.format(module=module)) for _ in range(args.repeat))
+        print(f"  {module:<22} {best * 1e3:8.1f} ms")
+
+    label = f"{args.page} as {args.email}" if args.email else "login page"
+    runs = [_run(_PAINT.format(app=APP, email=args.email, page=args.page, heavy=HEAVY))
+            for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r["seconds"])
+    print(f"\nTime to first paint, {label}: {best['seconds'] * 1e3:.0f} ms (best of {args.repeat})")
+    print(f"Heavy modules loaded: {', '.join(best['loaded']) or 'none'}")
+    if best["errors"]:
+        print(f"Script exceptions: {best['errors'][:3]}")
+
+
+if __name__ == "__main__":
+    main()
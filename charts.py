@@ -0,0 +1,159 @@
+"""
+Server-side chart reduction and figure caching.
+
+Payloads scale with the chart's width instead of the data:
+  * ohlc_rebucket(df, n)  - merges consecutive candles into at most n
+                            (first open, max high, min low, last close)
+  * bucket_last(df, n)    - the matching series values at each bucket's close
+  * lttb(x, y, n)         - Largest-Triangle-Three-Buckets for line series
+  * top_n(series, n)      - biggest n categories plus "Others" (pie / bar)
+
+FigureCache keeps built figures per key, e.g. (symbol, timeframe, last bar,
+options), so a rerun with unchanged data reuses the figure instead of
+rebuilding every trace.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CHART_WIDTH_PX = int(os.environ.get("QUANTIFY_CHART_WIDTH_PX", 1200))  # full-width chart on a typical screen
+PX_PER_CANDLE = 4  # narrower candles are unreadable anyway
+PX_PER_POINT = 2   # line points per pixel column beyond this add nothing visible
+
+
+def max_points(width_px=CHART_WIDTH_PX, px_per_point=PX_PER_POINT):
+    return max(int(width_px // px_per_point), 16)
+
+
+# ==========================================
+# DOWNSAMPLING
+# ==========================================
+def _bucket_starts(length, n):
+    """Start index of each of n near-equal consecutive buckets over length rows"""
+    return np.unique(np.arange(n) * length // n)
+
+
+def ohlc_rebucket(df, n, time_col="Datetime"):
+    """At most n candles; each keeps the true range of the bars it replaces"""
+    if len(df) <= n:
+        return df
+    starts = _bucket_starts(len(df), n)
+    ends = np.append(starts[1:], len(df)) - 1
+    out = {
+        time_col: df[time_col].to_numpy()[starts],
+        "Open": df["Open"].to_numpy()[starts],
+        "High": np.maximum.reduceat(df["High"].to_numpy(dtype=np.float64), starts),
+        "Low": np.minimum.reduceat(df["Low"].to_numpy(dtype=np.float64), starts),
+        "Close": df["Close"].to_numpy()[ends],
+    }
+    if "Volume" in df:
+        out["Volume"] = np.add.reduceat(df["Volume"].to_numpy(dtype=np.float64), starts)
+    return pd.DataFrame(out)
+
+
+def bucket_last(df, n):
+    """Rows of df at the close of each ohlc_rebucket bucket (indicators stay aligned with candles)"""
+    if len(df) <= n:
+        return df
+    starts = _bucket_starts(len(df), n)
+    ends = np.append(starts[1:], len(df)) - 1
+    return df.iloc[ends]
+
+
+def lttb(x, y, n):
+    """
+    Indices of the n points Largest-Triangle-Three-Buckets keeps from a
+    finite series (first and last always included). x may be datetimes or
+    datetime.date objects (an object column from a MySQL DATE).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    length = len(y)
+    if n >= length or n < 3:
+        return np.arange(length)
+    xs = pd.Series(x)
+    if not pd.api.types.is_numeric_dtype(xs):
+        xs = pd.to_datetime(xs)
+    xs = pd.to_numeric(xs).to_numpy(dtype=np.float64)
+
+    # Inner points split into n - 2 buckets; each keeps the point forming the
+    # largest triangle with the previous pick and the next bucket's average
+    edges = 1 + np.arange(n - 1) * (length - 2) // (n - 2)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, length - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (length - 1, length)
+        cx, cy = xs[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((xs[a] - cx) * (y[lo:hi] - y[a]) - (xs[a] - xs[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def lttb_frame(df, x_col, y_col, n):
+    """Rows of df picked by LTTB on one column (other columns follow the same rows)"""
+    if len(df) <= n:
+        return df
+    return df.iloc[lttb(df[x_col], df[y_col], n)]
+
+
+def top_n(series, n, other="Others"):
+    """Largest n values by magnitude; the rest summed into one entry"""
+    if len(series) <= n:
+        return series
+    order = series.abs().sort_values(ascending=False).index
+    head = series[order[:n - 1]]
+    return pd.concat([head, pd.Series({other: series[order[n - 1:]].sum()})])
+
+
+# ==========================================
+# FIGURE CACHE
+# ==========================================
+class FigureCache:
+    """
+    LRU of built figures. Keys must change whenever the plotted data does
+    (e.g. include the last bar's time and values); figures are shared by
+    all sessions, so callers must not mutate what get() returns.
+    """
+
+    def __init__(self, max_entries=256):
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+        fig = build()
+        with self._lock:
+            self._figures[key] = fig
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+def frame_key(*frames):
+    """Cheap content key for small frames / series (e.g. holdings valued at live prices)"""
+    return tuple(int(pd.util.hash_pandas_object(f, index=True).sum()) for f in frames)
+
+
+_cache = FigureCache()
+
+
+def get_figure_cache():
+    return _cache
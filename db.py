@@ -0,0 +1,93 @@
+"""
+Connections: writes on the primary, heavy reads optionally on a replica.
+
+Set QUANTIFY_DB_REPLICA_HOST (and _PORT / _USER / _PASSWORD / _NAME if
+they differ from the primary) to send report reads to a MySQL/MariaDB
+replica. Without it, or while the replica is unreachable, reads use the
+primary. To try it locally run a second server (e.g. on port 3307) fed
+by replication or a dump of trading_app and point the replica settings
+at it; `python db.py` shows where reads are routed.
+
+Every query on these connections is timed by querylog.TracedCursor.
+"""
+import os
+import time
+
+import pymysql
+
+from querylog import TracedCursor
+
+# ==========================================
+# DATABASE CONFIG
+# ==========================================
+DB_HOST = os.environ.get("QUANTIFY_DB_HOST", "localhost")
+DB_PORT = int(os.environ.get("QUANTIFY_DB_PORT", 3306))
+DB_USER = os.environ.get("QUANTIFY_DB_USER", "root")
+DB_PASSWORD = os.environ.get("QUANTIFY_DB_PASSWORD", "")
+DB_NAME = os.environ.get("QUANTIFY_DB_NAME", "trading_app")
+
+REPLICA_HOST = os.environ.get("QUANTIFY_DB_REPLICA_HOST")  # unset: everything on the primary
+REPLICA_PORT = int(os.environ.get("QUANTIFY_DB_REPLICA_PORT", DB_PORT))
+REPLICA_USER = os.environ.get("QUANTIFY_DB_REPLICA_USER", DB_USER)
+REPLICA_PASSWORD = os.environ.get("QUANTIFY_DB_REPLICA_PASSWORD", DB_PASSWORD)
+REPLICA_NAME = os.environ.get("QUANTIFY_DB_REPLICA_NAME", DB_NAME)
+
+# A session that wrote within this window reads from the primary (replication lag)
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("QUANTIFY_DB_READ_YOUR_WRITES", 10))
+REPLICA_RETRY_SECONDS = 30  # after a failed connect, don't retry the replica for a while
+
+_replica = {"down_until": 0.0}
+
+
+def get_connection():
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME,
+        cursorclass=TracedCursor
+    )
+
+
+def get_replica_connection():
+    """Read-only connection to the replica, or None if unconfigured / unreachable"""
+    if not REPLICA_HOST or time.time() < _replica["down_until"]:
+        return None
+    try:
+        return pymysql.connect(
+            host=REPLICA_HOST,
+            port=REPLICA_PORT,
+            user=REPLICA_USER,
+            password=REPLICA_PASSWORD,
+            database=REPLICA_NAME,
+            connect_timeout=2,
+            cursorclass=TracedCursor,
+            # A write routed here by mistake fails instead of diverging from the primary
+            init_command="SET SESSION TRANSACTION READ ONLY"
+        )
+    except pymysql.err.OperationalError as e:
+        _replica["down_until"] = time.time() + REPLICA_RETRY_SECONDS
+        print(f"Replica {REPLICA_HOST}:{REPLICA_PORT} unavailable, reading from the primary: {e}")
+        return None
+
+
+def get_read_connection(primary=None, last_write_at=None):
+    """
+    Connection for read-only report queries: the replica, unless the caller
+    wrote within READ_YOUR_WRITES_SECONDS or the replica is unavailable, in
+    which case the primary (the one passed in, else a new one).
+    """
+    recent_write = last_write_at is not None and time.time() - last_write_at < READ_YOUR_WRITES_SECONDS
+    replica = None if recent_write else get_replica_connection()
+    return replica or primary or get_connection()
+
+
+if __name__ == "__main__":
+    replica = get_replica_connection()
+    conn = replica or get_connection()
+    c = conn.cursor()
+    c.execute("SELECT @@hostname, @@port, @@read_only")
+    host, port, read_only = c.fetchone()
+    print(f"Reads go to {host}:{port} ({'replica' if replica else 'primary'}, read_only={read_only})")
+    conn.close()
@@ -0,0 +1,275 @@
+"""
+Technical indicators for chart overlays.
+
+Every indicator has two paths that give the same numbers:
+  * compute(df)  - vectorized over a full OHLCV frame (first load)
+  * update(bar)  - O(1) per new bar from carried state (live updates)
+
+IndicatorCache keeps one state per (symbol, timeframe, indicator, params).
+On a rerun only the still-forming last bar and anything newer are pushed
+through update(), so the series is never recomputed from scratch.
+"""
+import copy
+import math
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# INDICATORS
+# ==========================================
+class SMA:
+    def __init__(self, period=20):
+        self.period = period
+        self.params = (period,)
+        self.columns = [f"SMA {period}"]
+        self._window = deque()
+        self._sum = 0.0
+
+    def compute(self, df):
+        out = df["Close"].rolling(self.period).mean()
+        self._window = deque(df["Close"].iloc[-self.period:].tolist())
+        self._sum = sum(self._window)
+        return pd.DataFrame({self.columns[0]: out})
+
+    def update(self, bar):
+        self._window.append(bar["Close"])
+        self._sum += bar["Close"]
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        value = self._sum / self.period if len(self._window) == self.period else math.nan
+        return {self.columns[0]: value}
+
+
+class EMA:
+    def __init__(self, period=20):
+        self.period = period
+        self.params = (period,)
+        self.columns = [f"EMA {period}"]
+        self.alpha = 2 / (period + 1)
+        self.value = None
+
+    def compute(self, df):
+        out = df["Close"].ewm(span=self.period, adjust=False).mean()
+        self.value = float(out.iloc[-1]) if len(out) else None
+        return pd.DataFrame({self.columns[0]: out})
+
+    def step(self, x):
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def update(self, bar):
+        return {self.columns[0]: self.step(bar["Close"])}
+
+
+class RSI:
+    """Wilder's RSI (smoothing factor 1/period)"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.params = (period,)
+        self.columns = [f"RSI {period}"]
+        self._prev = None
+        self._gain = None
+        self._loss = None
+
+    def compute(self, df):
+        delta = df["Close"].diff()
+        gain = delta.clip(lower=0).ewm(alpha=1 / self.period, adjust=False).mean()
+        loss = (-delta.clip(upper=0)).ewm(alpha=1 / self.period, adjust=False).mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + gain / loss)
+        if len(df):
+            self._prev = float(df["Close"].iloc[-1])
+            self._gain = float(gain.iloc[-1]) if len(df) > 1 else None
+            self._loss = float(loss.iloc[-1]) if len(df) > 1 else None
+        return pd.DataFrame({self.columns[0]: rsi.where(delta.notna())})
+
+    def update(self, bar):
+        x = bar["Close"]
+        if self._prev is None:
+            self._prev = x
+            return {self.columns[0]: math.nan}
+        d = x - self._prev
+        self._prev = x
+        g, l = max(d, 0.0), max(-d, 0.0)
+        a = 1 / self.period
+        self._gain = g if self._gain is None else self._gain + a * (g - self._gain)
+        self._loss = l if self._loss is None else self._loss + a * (l - self._loss)
+        if self._loss == 0:
+            return {self.columns[0]: 100.0 if self._gain > 0 else math.nan}
+        return {self.columns[0]: 100 - 100 / (1 + self._gain / self._loss)}
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.params = (fast, slow, signal)
+        self.columns = ["MACD", "MACD Signal", "MACD Hist"]
+        self._fast, self._slow, self._signal = EMA(fast), EMA(slow), EMA(signal)
+
+    def compute(self, df):
+        fast = self._fast.compute(df).iloc[:, 0]
+        slow = self._slow.compute(df).iloc[:, 0]
+        macd = fast - slow
+        signal = macd.ewm(span=self._signal.period, adjust=False).mean()
+        self._signal.value = float(signal.iloc[-1]) if len(signal) else None
+        return pd.DataFrame({"MACD": macd, "MACD Signal": signal, "MACD Hist": macd - signal})
+
+    def update(self, bar):
+        macd = self._fast.step(bar["Close"]) - self._slow.step(bar["Close"])
+        signal = self._signal.step(macd)
+        return {"MACD": macd, "MACD Signal": signal, "MACD Hist": macd - signal}
+
+
+class Bollinger:
+    def __init__(self, period=20, width=2.0):
+        self.period = period
+        self.width = width
+        self.params = (period, width)
+        self.columns = ["BB Upper", "BB Mid", "BB Lower"]
+        self._window = deque()
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def compute(self, df):
+        roll = df["Close"].rolling(self.period)
+        mid, std = roll.mean(), roll.std(ddof=0)
+        tail = df["Close"].iloc[-self.period:].tolist()
+        self._window = deque(tail)
+        self._sum = sum(tail)
+        self._sumsq = sum(x * x for x in tail)
+        return pd.DataFrame({
+            "BB Upper": mid + self.width * std, "BB Mid": mid, "BB Lower": mid - self.width * std
+        })
+
+    def update(self, bar):
+        x = bar["Close"]
+        self._window.append(x)
+        self._sum += x
+        self._sumsq += x * x
+        if len(self._window) > self.period:
+            old = self._window.popleft()
+            self._sum -= old
+            self._sumsq -= old * old
+        if len(self._window) < self.period:
+            return dict.fromkeys(self.columns, math.nan)
+        mid = self._sum / self.period
+        std = math.sqrt(max(self._sumsq / self.period - mid * mid, 0.0))
+        return {"BB Upper": mid + self.width * std, "BB Mid": mid, "BB Lower": mid - self.width * std}
+
+
+class VWAP:
+    """Intraday VWAP on typical price, reset at the start of each session"""
+
+    def __init__(self):
+        self.params = ()
+        self.columns = ["VWAP"]
+        self._day = None
+        self._pv = 0.0
+        self._vol = 0.0
+
+    def compute(self, df):
+        typical = (df["High"] + df["Low"] + df["Close"]) / 3
+        day = pd.to_datetime(df["Datetime"]).dt.date
+        pv = (typical * df["Volume"]).groupby(day).cumsum()
+        vol = df["Volume"].groupby(day).cumsum()
+        if len(df):
+            self._day = day.iloc[-1]
+            self._pv, self._vol = float(pv.iloc[-1]), float(vol.iloc[-1])
+        return pd.DataFrame({"VWAP": pv / vol.replace(0, np.nan)})
+
+    def update(self, bar):
+        day = pd.Timestamp(bar["Datetime"]).date()
+        if day != self._day:
+            self._day, self._pv, self._vol = day, 0.0, 0.0
+        self._pv += (bar["High"] + bar["Low"] + bar["Close"]) / 3 * bar["Volume"]
+        self._vol += bar["Volume"]
+        return {"VWAP": self._pv / self._vol if self._vol else math.nan}
+
+
+INDICATORS = {
+    "SMA 20": lambda: SMA(20),
+    "EMA 20": lambda: EMA(20),
+    "Bollinger (20, 2)": lambda: Bollinger(20, 2.0),
+    "VWAP": VWAP,
+    "RSI 14": lambda: RSI(14),
+    "MACD (12, 26, 9)": lambda: MACD(12, 26, 9),
+}
+# Drawn on the price axis; the rest get their own panel
+PRICE_OVERLAYS = {"SMA 20", "EMA 20", "Bollinger (20, 2)", "VWAP"}
+
+
+# ==========================================
+# INCREMENTAL CACHE
+# ==========================================
+class IndicatorCache:
+    """
+    Holds (indicator state, result frame, last bar time) per key
+    (symbol, timeframe, indicator name, params). get() computes the full
+    series once, then only feeds bars from the last one seen onwards
+    (the last bar is re-applied because the live candle keeps changing).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, timeframe, name, df, time_col="Datetime"):
+        fresh = INDICATORS[name]()
+        if df.empty:
+            return pd.DataFrame(columns=fresh.columns)
+
+        key = (symbol, timeframe, name, fresh.params)
+        times = df[time_col]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            # Position of the last bar we stored; it must line up with the same bar in df
+            pos = entry["n"] - 1 if entry else -1
+
+            if (entry is None or entry["first"] != times.iloc[0]
+                    or pos >= len(df) or times.iloc[pos] != entry["last"]):
+                # New key, or the bars no longer extend what we have (new session) -> vectorized pass
+                head = fresh.compute(df.iloc[:-1]).to_numpy(dtype=np.float64)
+                values = np.full((max(2 * len(df), 64), len(fresh.columns)), np.nan)
+                values[:len(head)] = head
+                entry = {"first": times.iloc[0], "base": fresh, "values": values}
+                self._entries[key] = entry
+                pos = len(df) - 1
+
+            # The last stored bar may still be forming: roll it back and re-apply it
+            tail = df.iloc[pos:]
+            if len(df) > len(entry["values"]):
+                grown = np.full((2 * len(df), len(fresh.columns)), np.nan)
+                grown[:pos] = entry["values"][:pos]
+                entry["values"] = grown
+
+            ind = entry["base"]
+            records = tail.to_dict("records")
+            for i, bar in enumerate(records):
+                if i == len(records) - 1:
+                    # Keep the state from before the newest bar for the next rollback
+                    entry["base"] = copy.deepcopy(ind)
+                row = ind.update(bar)
+                entry["values"][pos + i] = [row[c] for c in fresh.columns]
+
+            entry["n"] = len(df)
+            entry["last"] = times.iloc[-1]
+            return pd.DataFrame(entry["values"][:len(df)].copy(), index=df.index, columns=fresh.columns)
+
+    def clear(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries = {k: v for k, v in self._entries.items() if k[0] != symbol}
+
+
+_cache = IndicatorCache()
+
+
+def get_indicator_cache():
+    return _cache
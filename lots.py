@@ -0,0 +1,242 @@
+"""
+FIFO tax lots per (user, symbol).
+
+Every BUY fill opens a lot (cost per share includes its brokerage). Every
+SELL fill consumes the oldest open lots first: fully used lots are deleted,
+a partly used lot is shrunk in place, and one realized_pnl row is written
+per lot touched. The open lots of a position behave like a deque kept in
+the tax_lots table, so a fill costs O(lots consumed) and the Portfolio page
+reads open lots plus realized totals without replaying transactions.
+"""
+from collections import deque
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from archive import read_transactions
+
+LONG_TERM_DAYS = 365  # listed equity held for more than 12 months is long-term
+
+
+def _term(buy_date, sell_date):
+    return "LONG" if sell_date - buy_date > timedelta(days=LONG_TERM_DAYS) else "SHORT"
+
+
+# ==========================================
+# FILLS (CALLER COMMITS)
+# ==========================================
+class LotBook:
+    """
+    FIFO lots of a set of positions, loaded once (locked FOR UPDATE) and
+    consumed in memory; flush() writes every change of a batch of fills
+    with one executemany per statement. Nothing is written until flush,
+    so a fill that raises leaves the batch untouched.
+    """
+
+    def __init__(self, cursor, positions=()):
+        self.cursor = cursor
+        self._open = {}      # (email, symbol) -> deque of lots, oldest first
+        self._new = []       # lots opened by this batch (no id until flush)
+        self._touched = {}   # id(lot) -> loaded lot whose qty changed
+        self._realized = []  # (lot, row without lot_id)
+        self.load(positions)
+
+    def load(self, positions):
+        """Read the open lots of positions not loaded yet in one query"""
+        missing = [p for p in dict.fromkeys(positions) if p not in self._open]
+        if not missing:
+            return
+        for p in missing:
+            self._open[p] = deque()
+        # Oldest lots first; locked so concurrent fills of the same position queue up
+        self.cursor.execute(f"""
+            SELECT id, email, symbol, buy_date, qty_open, cost_per_share FROM tax_lots
+            WHERE {" OR ".join(["(email=%s AND symbol=%s)"] * len(missing))}
+            ORDER BY buy_date, id
+            FOR UPDATE
+        """, [v for p in missing for v in p])
+        for lot_id, email, symbol, buy_date, qty, cost in self.cursor.fetchall():
+            self._open[(email, symbol)].append(
+                {"id": lot_id, "buy_date": buy_date, "qty": qty, "cost": float(cost)})
+        # Lots bought earlier in this batch come after everything already stored
+        for lot in self._new:
+            if (lot["email"], lot["symbol"]) in missing:
+                self._open[(lot["email"], lot["symbol"])].append(lot)
+
+    def open_qty(self, email, symbol):
+        self.load([(email, symbol)])
+        return sum(lot["qty"] for lot in self._open[(email, symbol)])
+
+    def buy(self, email, symbol, qty, price, brokerage, txn_id, filled_at=None):
+        lot = {"id": None, "email": email, "symbol": symbol, "buy_txn_id": txn_id,
+               "buy_date": filled_at or datetime.now(), "qty": qty, "cost": (price * qty + brokerage) / qty}
+        self._new.append(lot)
+        if (email, symbol) in self._open:
+            self._open[(email, symbol)].append(lot)
+        return 0.0
+
+    def sell(self, email, symbol, qty, price, brokerage, txn_id, filled_at=None):
+        """Consume the oldest lots; returns the realized P&L"""
+        if self.open_qty(email, symbol) < qty:
+            raise ValueError(f"Not enough open lots of {symbol} to sell {qty}")
+        filled_at = filled_at or datetime.now()
+        net_per_share = (price * qty - brokerage) / qty
+        lots = self._open[(email, symbol)]
+        remaining, pnl = qty, 0.0
+        while remaining:
+            lot = lots[0]
+            used = min(lot["qty"], remaining)
+            gain = used * (net_per_share - lot["cost"])
+            self._realized.append((lot, (email, symbol, txn_id, used, lot["buy_date"], filled_at,
+                                         used * lot["cost"], used * net_per_share, gain,
+                                         _term(lot["buy_date"], filled_at))))
+            lot["qty"] -= used
+            if lot["id"] is not None:
+                self._touched[id(lot)] = lot
+            if lot["qty"] == 0:
+                lots.popleft()
+            remaining -= used
+            pnl += gain
+        return pnl
+
+    def flush(self):
+        """Write the batch: lots opened, shrunk and emptied, then realized rows"""
+        c = self.cursor
+        referenced = {id(lot) for lot, _ in self._realized if lot["id"] is None}
+        bulk = []
+        for lot in self._new:
+            row = (lot["email"], lot["symbol"], lot["buy_txn_id"], lot["buy_date"], lot["qty"], lot["cost"])
+            if id(lot) in referenced:
+                # Sold within the same batch: realized rows need its id
+                c.execute("""
+                    INSERT INTO tax_lots (email, symbol, buy_txn_id, buy_date, qty_open, cost_per_share)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                """, row)
+                lot["id"] = c.lastrowid
+                if not lot["qty"]:
+                    self._touched[id(lot)] = lot
+            elif lot["qty"]:
+                bulk.append(row)
+        if bulk:
+            c.executemany("""
+                INSERT INTO tax_lots (email, symbol, buy_txn_id, buy_date, qty_open, cost_per_share)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, bulk)
+
+        touched = list(self._touched.values())
+        shrunk = [(lot["qty"], lot["id"]) for lot in touched if lot["qty"]]
+        emptied = [(lot["id"],) for lot in touched if not lot["qty"]]
+        if shrunk:
+            c.executemany("UPDATE tax_lots SET qty_open=%s WHERE id=%s", shrunk)
+        if emptied:
+            c.executemany("DELETE FROM tax_lots WHERE id=%s", emptied)
+        if self._realized:
+            c.executemany("""
+                INSERT INTO realized_pnl
+                    (email, symbol, sell_txn_id, lot_id, qty, buy_date, sell_date, cost, proceeds, pnl, term)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, [row[:3] + (lot["id"],) + row[3:] for lot, row in self._realized])
+
+        self._new, self._touched, self._realized = [], {}, []
+
+
+def apply_fill(cursor, email, symbol, action, qty, price, brokerage, txn_id, filled_at=None):
+    """
+    Update the lots for one completed fill inside the caller's transaction.
+    Returns the realized P&L of a SELL (0.0 for a BUY).
+    Raises ValueError if a SELL needs more shares than the open lots hold.
+    """
+    book = LotBook(cursor)
+    fill = book.buy if action == "BUY" else book.sell
+    realized = fill(email, symbol, qty, price, brokerage, txn_id, filled_at)
+    book.flush()
+    return realized
+
+
+def rebuild_lots(conn, email=None):
+    """
+    One-time backfill: replay COMPLETE transactions in time order into
+    empty lot tables (all users, or one user). Returns the fills replayed.
+    """
+    from orders import calc_brokerage  # orders imports this module
+
+    # Archived months included, so lots survive cold archival
+    tx = read_transactions(conn, email=email)
+    params = [email] if email else []
+
+    c = conn.cursor()
+    for table in ("tax_lots", "realized_pnl"):
+        c.execute(f"DELETE FROM {table}" + (" WHERE email=%s" if email else ""), params)
+
+    # The whole replay is one batch: lots live in memory and are written once
+    book = LotBook(c)
+    for t in tx.itertuples(index=False):
+        fill = book.buy if t.action == "BUY" else book.sell
+        try:
+            fill(t.email, t.symbol, int(t.qty), float(t.price), calc_brokerage(t.price * t.qty), int(t.id),
+                 filled_at=pd.Timestamp(t.timestamp).to_pydatetime())
+        except ValueError as e:
+            # History with more sold than bought can't be matched; report and move on
+            print(f"Skipping transaction {t.id}: {e}")
+    book.flush()
+    conn.commit()
+    return len(tx)
+
+
+# ==========================================
+# READS
+# ==========================================
+def get_open_positions(conn, email):
+    """qty, cost basis and average cost per symbol from the open lots"""
+    return pd.read_sql("""
+        SELECT symbol,
+               SUM(qty_open) qty,
+               SUM(qty_open * cost_per_share) invested,
+               SUM(qty_open * cost_per_share) / SUM(qty_open) avg_cost,
+               MIN(buy_date) first_buy
+        FROM tax_lots
+        WHERE email=%s
+        GROUP BY symbol
+        ORDER BY symbol
+    """, conn, params=(email,))
+
+
+def get_open_lots(conn, email):
+    return pd.read_sql("""
+        SELECT symbol, buy_date, qty_open, cost_per_share
+        FROM tax_lots WHERE email=%s
+        ORDER BY symbol, buy_date, id
+    """, conn, params=(email,))
+
+
+def financial_year_start(day=None):
+    """1 April of the Indian financial year containing the day"""
+    day = day or datetime.now().date()
+    return day.replace(year=day.year if day.month >= 4 else day.year - 1, month=4, day=1)
+
+
+def get_realized_summary(conn, email, since=None):
+    """Realized P&L split into SHORT / LONG term (optionally from a date)"""
+    where, params = "email=%s", [email]
+    if since is not None:
+        where += " AND sell_date >= %s"
+        params.append(since)
+    df = pd.read_sql(f"""
+        SELECT term, SUM(pnl) pnl FROM realized_pnl
+        WHERE {where} GROUP BY term
+    """, conn, params=params)
+    totals = df.set_index("term")["pnl"].reindex(["SHORT", "LONG"]).fillna(0.0)
+    return {"SHORT": float(totals["SHORT"]), "LONG": float(totals["LONG"])}
+
+
+if __name__ == "__main__":
+    import sys
+
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        n = rebuild_lots(conn, sys.argv[1] if len(sys.argv) > 1 else None)
+    finally:
+        conn.close()
+    print(f"Replayed {n} fills into tax_lots / realized_pnl")
@@ -0,0 +1,127 @@
+import os
+
+import pandas as pd
+import pytz
+import yfinance as yf
+
+from market_state import get_market_state
+from shared_state import get_shared_state, quote_key
+
+IST = pytz.timezone("Asia/Kolkata")
+# Quotes are cached in the shared state, so workers share one fetch per symbol per window
+QUOTE_TTL = float(os.environ.get("QUANTIFY_QUOTE_TTL", 5))
+
+
+def to_ticker(symbol):
+    """Auto-handle suffix if missing (default to NSE); indices like ^NSEI pass through"""
+    return symbol if "." in symbol or symbol.startswith("^") else f"{symbol}.NS"
+
+
+# ==========================================
+# LIVE QUOTES
+# ==========================================
+def get_live_exchange_price(symbol):
+    """
+    Fetch LIVE NSE price from exchange
+    symbol: TCS, RELIANCE, INFY, ITC
+    """
+    cached = get_shared_state().get(quote_key(symbol))
+    if cached is not None:
+        return cached["price"], cached["time"]
+
+    try:
+        ticker = yf.Ticker(to_ticker(symbol))
+
+        # Get the latest 1-minute interval data
+        data = ticker.history(period="1d", interval="1m")
+
+        if data.empty:
+            return None, None
+
+        # Extract Last Traded Price as a float
+        ltp_val = data['Close'].iloc[-1]
+
+        if pd.isna(ltp_val):
+            return None, None
+
+        ltp = float(round(ltp_val, 2))
+
+        # Exchange timestamp
+        last_time = data.index[-1].tz_convert(IST).strftime("%I:%M:%S %p")
+
+        get_shared_state().set(quote_key(symbol), {"price": ltp, "time": last_time}, ttl=QUOTE_TTL)
+        return ltp, last_time
+
+    except Exception as e:
+        print(f"Live price error for {symbol}: {e}")
+        return None, None
+
+
+def get_live_prices(symbols):
+    """
+    Batched version of get_live_exchange_price: quotes fetched by any worker
+    within QUOTE_TTL come from the shared state, the rest in ONE download.
+    Returns a DataFrame indexed by symbol with 'price' and 'time' columns;
+    symbols without data are left out.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    quotes = pd.DataFrame(columns=["price", "time"], index=pd.Index([], name="symbol"))
+    if not symbols:
+        return quotes
+
+    store = get_shared_state()
+    cached = store.get_many(quote_key(s) for s in symbols)
+    hits = {s: cached[quote_key(s)] for s in symbols if quote_key(s) in cached}
+    fetched = _download_prices([s for s in symbols if s not in hits])
+    store.set_many({quote_key(s): {"price": float(q["price"]), "time": q["time"]}
+                    for s, q in fetched.iterrows()}, ttl=QUOTE_TTL)
+
+    if hits:
+        cached_df = pd.DataFrame.from_dict(hits, orient="index")[["price", "time"]]
+        fetched = pd.concat([cached_df, fetched]) if len(fetched) else cached_df
+        fetched.index.name = "symbol"
+    if fetched.empty:
+        return quotes
+    quotes = fetched.reindex([s for s in symbols if s in fetched.index])
+
+    # Every batched fetch also refreshes this process's market state
+    get_market_state().update_prices(quotes["price"].to_dict())
+    return quotes
+
+
+def _download_prices(symbols):
+    """One yfinance download for symbols; same frame as get_live_prices"""
+    quotes = pd.DataFrame(columns=["price", "time"], index=pd.Index([], name="symbol"))
+    if not symbols:
+        return quotes
+
+    tickers = [to_ticker(s) for s in symbols]
+    try:
+        raw = yf.download(tickers, period="1d", interval="1m",
+                          auto_adjust=False, progress=False)
+    except Exception as e:
+        print(f"Batched live price error: {e}")
+        return quotes
+
+    if raw.empty:
+        return quotes
+
+    closes = raw["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    closes = closes.rename(columns=dict(zip(tickers, symbols)))
+
+    last_idx = closes.apply(pd.Series.last_valid_index)
+    last_idx = last_idx.dropna()
+    if last_idx.empty:
+        return quotes
+
+    prices = closes.ffill().iloc[-1][last_idx.index].astype(float).round(2)
+    times = pd.DatetimeIndex(last_idx.values)
+    if times.tz is None:
+        times = times.tz_localize("UTC")
+    quotes = pd.DataFrame({
+        "price": prices.values,
+        "time": times.tz_convert(IST).strftime("%I:%M:%S %p"),
+    }, index=pd.Index(last_idx.index, name="symbol"))
+    return quotes
@@ -0,0 +1,559 @@
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import datetime, time as dt_time, timedelta
+
+import pandas as pd
+
+from db import get_connection
+from lots import LotBook
+from market_data import get_live_prices
+from tradelog import append_trades
+from triggers import get_trigger_book
+
+# Brokerage Configuration
+COMMISSION_FLAT = 20.0  # Minimum ₹20
+COMMISSION_PCT = 0.0005 # 0.05% of trade value
+ADMIN_EMAIL = "admin@quantify.com"
+MARKET_CLOSE = dt_time(15, 30)  # NSE close; good-till-date orders lapse here
+
+
+def calc_brokerage(trade_value):
+    return max(COMMISSION_FLAT, trade_value * COMMISSION_PCT)
+
+
+def last_completed_session(now=None):
+    """Latest weekday whose close has passed (exchange holidays are not known here)"""
+    now = now or datetime.now()
+    day = now.date() if now.time() >= MARKET_CLOSE else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+# ==========================================
+# PLACING / CANCELLING TRIGGER ORDERS
+# ==========================================
+ORDER_COLUMNS = "id, email, symbol, qty, action, order_type, trigger_price, trail_pct, oco_group, parent_id, expires_at"
+RESYNC_SECONDS = 300  # full reload of the book, picks up orders placed by other processes
+ARM_SLACK_SECONDS = 60  # bracket legs armed by a transaction that commits after the sync that followed it
+
+_sync = {"at": 0.0, "max_id": 0, "armed_since": None}
+
+
+def _insert_order(c, email, symbol, qty, price, action, order_type, trigger_price,
+                  status="PENDING", trail_pct=None, oco_group=None, parent_id=None, expires_at=None):
+    c.execute("""
+        INSERT INTO transactions
+            (email, symbol, qty, price, action, order_type, trigger_price, status,
+             trail_pct, oco_group, parent_id, expires_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (email, symbol, qty, price, action, order_type, trigger_price, status,
+          trail_pct, oco_group, parent_id, expires_at))
+    return {"id": c.lastrowid, "email": email, "symbol": symbol, "qty": qty, "action": action,
+            "order_type": order_type, "trigger_price": trigger_price, "trail_pct": trail_pct,
+            "oco_group": oco_group, "parent_id": parent_id, "expires_at": expires_at}
+
+
+def place_order(conn, email, symbol, qty, price, action, order_type, trigger_price,
+                trail_pct=None, expires_at=None):
+    """LIMIT BUY / LIMIT SELL / STOP-LOSS / TRAILING STOP (trail_pct as a fraction)"""
+    if order_type == "TRAILING STOP":
+        trigger_price = round(price * (1 - trail_pct), 2)
+    c = conn.cursor()
+    order = _insert_order(c, email, symbol, qty, price, action, order_type, trigger_price,
+                          trail_pct=trail_pct, expires_at=expires_at)
+    conn.commit()
+    get_trigger_book().add(order)
+    return order["id"]
+
+
+def place_oco(conn, email, symbol, qty, price, target_price, stop_price, expires_at=None):
+    """Exit pair: LIMIT SELL at the target and STOP-LOSS at the stop; one fill cancels the other"""
+    c = conn.cursor()
+    target = _insert_order(c, email, symbol, qty, price, "SELL", "LIMIT SELL", target_price, expires_at=expires_at)
+    c.execute("UPDATE transactions SET oco_group=%s WHERE id=%s", (target["id"], target["id"]))
+    target["oco_group"] = target["id"]
+    stop = _insert_order(c, email, symbol, qty, price, "SELL", "STOP-LOSS", stop_price,
+                         oco_group=target["id"], expires_at=expires_at)
+    conn.commit()
+    book = get_trigger_book()
+    book.add(target)
+    book.add(stop)
+    return target["id"]
+
+
+def place_bracket(conn, email, symbol, qty, price, entry_price, target_price, stop_price, expires_at=None):
+    """
+    LIMIT BUY entry with a take-profit / stop-loss OCO pair that waits
+    (status WAITING) until the entry fills. Only the entry expires.
+    """
+    c = conn.cursor()
+    entry = _insert_order(c, email, symbol, qty, price, "BUY", "LIMIT BUY", entry_price, expires_at=expires_at)
+    pid = entry["id"]
+    _insert_order(c, email, symbol, qty, price, "SELL", "LIMIT SELL", target_price,
+                  status="WAITING", oco_group=pid, parent_id=pid)
+    _insert_order(c, email, symbol, qty, price, "SELL", "STOP-LOSS", stop_price,
+                  status="WAITING", oco_group=pid, parent_id=pid)
+    conn.commit()
+    get_trigger_book().add(entry)
+    return pid
+
+
+def cancel_order(conn, email, order_id):
+    """Cancel a pending order together with any bracket legs still waiting on it (kept as history)"""
+    c = conn.cursor()
+    c.execute("""
+        UPDATE transactions SET status='CANCELLED'
+        WHERE id=%s AND email=%s AND status IN ('PENDING', 'WAITING')
+    """, (order_id, email))
+    c.execute("""
+        UPDATE transactions SET status='CANCELLED'
+        WHERE parent_id=%s AND email=%s AND status='WAITING'
+    """, (order_id, email))
+    conn.commit()
+    get_trigger_book().remove(order_id)
+
+
+# ==========================================
+# GROUP COMMIT (FILL WRITE PATH)
+# ==========================================
+GROUP_COMMIT_WINDOW = float(os.environ.get("QUANTIFY_GROUP_COMMIT_MS", 5)) / 1000
+GROUP_COMMIT_MAX = 200  # fills per commit
+
+
+class FillStats:
+    """Rolling batch sizes and commit latency of the fill write path (per process)"""
+
+    def __init__(self, size=1000):
+        self._lock = threading.Lock()
+        self._batches = deque(maxlen=size)  # (fills, write seconds, commit seconds)
+
+    def clear(self):
+        with self._lock:
+            self._batches.clear()
+
+    def record(self, fills, write_seconds, commit_seconds):
+        with self._lock:
+            self._batches.append((fills, write_seconds, commit_seconds))
+
+    def summary(self):
+        with self._lock:
+            df = pd.DataFrame(list(self._batches), columns=["fills", "write", "commit"])
+        if df.empty:
+            return {"batches": 0, "fills": 0, "avg_batch": 0.0, "max_batch": 0,
+                    "p50_commit_ms": 0.0, "p99_commit_ms": 0.0, "p50_write_ms": 0.0, "p99_write_ms": 0.0}
+        return {
+            "batches": len(df),
+            "fills": int(df["fills"].sum()),
+            "avg_batch": float(df["fills"].mean()),
+            "max_batch": int(df["fills"].max()),
+            "p50_commit_ms": float(df["commit"].quantile(0.5) * 1e3),
+            "p99_commit_ms": float(df["commit"].quantile(0.99) * 1e3),
+            "p50_write_ms": float(df["write"].quantile(0.5) * 1e3),
+            "p99_write_ms": float(df["write"].quantile(0.99) * 1e3),
+        }
+
+
+_fill_stats = FillStats()
+
+
+def get_fill_stats():
+    return _fill_stats.summary()
+
+
+def reset_fill_stats():
+    _fill_stats.clear()
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def write_fills(conn, fills):
+    """
+    Fill a batch of orders in one DB transaction and one commit.
+
+    fills: dicts with email, symbol, qty, action, price and order_type;
+    "id" is the PENDING order being filled (None inserts a new MARKET order),
+    oco_group is taken from trigger orders. Every fill is validated against
+    the running balances and lots of the batch before anything of it is
+    written, so each order lands completely or not at all:
+
+        FILLED    written, with brokerage and realized P&L
+        UNFUNDED  BUY without enough balance, nothing written
+        REJECTED  SELL without enough shares (a PENDING order is marked REJECTED)
+        GONE      order no longer PENDING (cancelled, expired, filled elsewhere)
+        ERROR     its own transaction failed too, nothing written
+
+    If a statement fails the batch is rolled back and every fill is retried
+    in its own transaction, so one bad order cannot sink the others. A
+    single fill that fails raises.
+    """
+    t0 = time.perf_counter()
+    c = conn.cursor()
+    try:
+        # Claim fired orders; anything no longer PENDING was cancelled, expired or filled elsewhere
+        claim = [f["id"] for f in fills if f.get("id") is not None]
+        live = set()
+        if claim:
+            c.execute(f"SELECT id FROM transactions WHERE id IN ({_placeholders(claim)}) AND status='PENDING' FOR UPDATE",
+                      claim)
+            live = {r[0] for r in c.fetchall()}
+
+        emails = list(dict.fromkeys(f["email"] for f in fills))
+        c.execute(f"SELECT email, balance FROM users WHERE email IN ({_placeholders(emails)}) FOR UPDATE", emails)
+        balance = {e: float(b) for e, b in c.fetchall()}
+        lots = LotBook(c, [(f["email"], f["symbol"]) for f in fills if f["action"] == "SELL"])
+
+        results, completed, rejected, groups = [], [], [], {}
+        delta = defaultdict(float)  # balance change per user, brokerage collected by admin
+        for f in fills:
+            oid, email, symbol, qty, price = f.get("id"), f["email"], f["symbol"], f["qty"], f["price"]
+            value = price * qty
+            brokerage = calc_brokerage(value)
+            result = {"id": oid, "status": "FILLED", "brokerage": brokerage, "realized": 0.0}
+            results.append(result)
+
+            # The other leg of an OCO pair fired in the same batch
+            if (oid is not None and oid not in live) or f.get("oco_group") in groups:
+                result["status"] = "GONE"
+                continue
+            if f["action"] == "BUY":
+                if balance.get(email, 0.0) < value + brokerage:
+                    result["status"] = "UNFUNDED"
+                    continue
+                balance[email] -= value + brokerage
+                delta[email] -= value + brokerage
+            else:
+                if lots.open_qty(email, symbol) < qty:
+                    result["status"] = "REJECTED"
+                    if oid is not None:
+                        rejected.append((oid,))
+                    continue
+                balance[email] = balance.get(email, 0.0) + value - brokerage
+                delta[email] += value - brokerage
+            delta[ADMIN_EMAIL] += brokerage
+
+            if oid is None:
+                # New MARKET order; inserted one by one because lots and realized rows need its id
+                oid = result["id"] = _insert_order(c, email, symbol, qty, price, f["action"],
+                                                   f.get("order_type", "MARKET"), None, status="COMPLETE")["id"]
+            else:
+                completed.append((price, oid))
+                if f.get("oco_group") is not None:
+                    groups[f["oco_group"]] = oid
+            fill = lots.buy if f["action"] == "BUY" else lots.sell
+            result["realized"] = fill(email, symbol, qty, price, brokerage, oid)
+
+        if completed:
+            c.executemany("UPDATE transactions SET status='COMPLETE', price=%s WHERE id=%s", completed)
+        if rejected:
+            # Shares were sold elsewhere since the order was placed
+            c.executemany("UPDATE transactions SET status='REJECTED' WHERE id=%s", rejected)
+        if delta:
+            c.executemany("UPDATE users SET balance = balance + %s WHERE email=%s",
+                          [(amount, email) for email, amount in delta.items()])
+        lots.flush()
+
+        # One-cancels-other: the rest of each filled group goes
+        siblings = []
+        if groups:
+            c.execute(f"SELECT id FROM transactions WHERE oco_group IN ({_placeholders(groups)}) AND status='PENDING'",
+                      list(groups))
+            siblings = [r[0] for r in c.fetchall()]
+            c.executemany("""
+                UPDATE transactions SET status='CANCELLED'
+                WHERE oco_group=%s AND id<>%s AND status='PENDING'
+            """, list(groups.items()))
+
+        # Bracket entries filled: arm their exit legs
+        children = []
+        parents = [oid for _, oid in completed]
+        if parents:
+            c.execute(f"""
+                SELECT {ORDER_COLUMNS} FROM transactions
+                WHERE parent_id IN ({_placeholders(parents)}) AND status='WAITING'
+            """, parents)
+            names = [d[0] for d in c.description]
+            children = [_book_order(dict(zip(names, r))) for r in c.fetchall()]
+            if children:
+                c.executemany("""
+                    UPDATE transactions SET status='PENDING', armed_at=NOW()
+                    WHERE parent_id=%s AND status='WAITING'
+                """,
+                              [(pid,) for pid in {child["parent_id"] for child in children}])
+
+        t1 = time.perf_counter()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        if len(fills) == 1:
+            raise
+        return [_write_one(conn, f) for f in fills]
+
+    t2 = time.perf_counter()
+    _fill_stats.record(sum(r["status"] == "FILLED" for r in results), t2 - t0, t2 - t1)
+
+    book = get_trigger_book()
+    for sid in siblings:
+        book.remove(sid)
+    for child in children:
+        book.add(child)
+    return results
+
+
+def _write_one(conn, fill):
+    """write_fills for one fill, with a failure reported as an ERROR result instead of raised"""
+    try:
+        return write_fills(conn, [fill])[0]
+    except Exception as e:
+        print(f"Fill of {fill['action']} {fill['qty']} {fill['symbol']} (order {fill.get('id')}) failed: {e}")
+        return {"id": fill.get("id"), "status": "ERROR", "brokerage": 0.0, "realized": 0.0}
+
+
+class FillWriter:
+    """
+    Group committer for MARKET orders: fills submitted from any session
+    thread within GROUP_COMMIT_WINDOW are written by one background thread
+    with write_fills, i.e. one transaction and one commit per window.
+    """
+
+    def __init__(self, window=GROUP_COMMIT_WINDOW, max_batch=GROUP_COMMIT_MAX):
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, fill):
+        """Queue a fill; the Future resolves to its write_fills result"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="fill-writer", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((fill, future))
+        return future
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = None
+        while True:
+            batch = self._next_batch()
+            fills = [fill for fill, _ in batch]
+            try:
+                conn = conn or get_connection()
+                # A failing fill comes back as its own ERROR result; the rest of the batch still lands
+                results = write_fills(conn, fills) if len(fills) > 1 else [_write_one(conn, fills[0])]
+            except Exception as e:
+                # No connection, or it died during the rollback
+                for _, future in batch:
+                    future.set_exception(e)
+                results = None
+            for (_, future), result in zip(batch, results or []):
+                future.set_result(result)
+            if results is None or any(r["status"] == "ERROR" for r in results):
+                # Start over on a fresh connection next time
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+
+
+_fill_writer = FillWriter()
+
+
+def get_fill_writer():
+    return _fill_writer
+
+
+def submit_market_order(email, symbol, action, qty, price, timeout=10):
+    """
+    Fill a MARKET order through the group committer; returns its write_fills
+    result. Raises concurrent.futures.TimeoutError when no result came within
+    timeout (the fill may still commit) or the error of a lost connection.
+    """
+    fill = {"email": email, "symbol": symbol, "qty": qty, "action": action, "price": price, "order_type": "MARKET"}
+    future = _fill_writer.submit(fill)
+    future.add_done_callback(lambda f: _log_market_fill(fill, f))
+    return future.result(timeout=timeout)
+
+
+def _log_market_fill(fill, future):
+    """Trade-log line once the fill commits, even if the page stopped waiting for it"""
+    if future.exception() is None and future.result()["status"] == "FILLED":
+        append_trades(fill["email"], [(fill["symbol"], fill["qty"], fill["price"], future.result()["brokerage"],
+                                       fill["action"], "MARKET")])
+
+
+# ==========================================
+# AUTO EXECUTE TRIGGER ORDERS + PRICE ALERTS
+# ==========================================
+def _book_order(row):
+    """DB row -> trigger book order (NaN / NaT -> None)"""
+    order = {k: (None if pd.isna(v) else v) for k, v in row.items()}
+    order["id"] = int(order["id"])
+    order["qty"] = int(order["qty"])
+    order["trigger_price"] = float(order["trigger_price"])
+    if order["expires_at"] is not None:
+        order["expires_at"] = pd.Timestamp(order["expires_at"]).to_pydatetime()
+    return order
+
+
+def _sync_book(conn, book):
+    """
+    Load PENDING orders placed since the last sync, and bracket legs armed
+    since then (by a fill in any process); everything again every RESYNC_SECONDS
+    """
+    full = time.time() - _sync["at"] > RESYNC_SECONDS
+    c = conn.cursor()
+    c.execute("SELECT NOW()")
+    db_now = c.fetchone()[0]
+    if full:
+        rows = pd.read_sql(f"SELECT {ORDER_COLUMNS} FROM transactions WHERE status='PENDING'", conn)
+    else:
+        rows = pd.read_sql(f"""
+            SELECT {ORDER_COLUMNS} FROM transactions
+            WHERE status='PENDING' AND (id > %s OR armed_at >= %s)
+        """, conn, params=(_sync["max_id"], _sync["armed_since"]))
+    _sync["armed_since"] = db_now - timedelta(seconds=ARM_SLACK_SECONDS)
+
+    if full:
+        book.clear()
+        _sync["at"] = time.time()
+    for row in rows.to_dict("records"):
+        order = _book_order(row)
+        if order["id"] in book:
+            continue
+        try:
+            book.add(order)
+        except ValueError as e:
+            print(f"Order {order['id']} skipped: {e}")
+    if not rows.empty:
+        _sync["max_id"] = max(_sync["max_id"], int(rows["id"].max()))
+
+
+def process_pending_limit_orders(conn):
+    """
+    One tick of the trigger engine: expire good-till-date orders, take a
+    single batched quote for every symbol with live orders or alerts, and
+    feed each price to the trigger book, which pops only the orders that
+    fire. Sessions that find a tick already running skip it.
+    """
+    book = get_trigger_book()
+    if not book.lock.acquire(blocking=False):
+        return
+    try:
+        _sync_book(conn, book)
+        c = conn.cursor()
+
+        # --- Good-till-date expiry (time-ordered heap) ---
+        expired = [(o["id"],) for o in book.expire(datetime.now())]
+        if expired:
+            c.executemany("UPDATE transactions SET status='EXPIRED' WHERE id=%s AND status='PENDING'", expired)
+            c.executemany("UPDATE transactions SET status='EXPIRED' WHERE parent_id=%s AND status='WAITING'", expired)
+            conn.commit()
+
+        alerts = pd.read_sql("""
+            SELECT id, symbol, direction, target_price
+            FROM price_alerts WHERE status='ACTIVE'
+        """, conn)
+
+        symbols = list(dict.fromkeys(book.symbols() + alerts["symbol"].tolist()))
+        if not symbols:
+            return
+        quotes = get_live_prices(symbols)["price"]
+
+        # --- Price alerts ---
+        if not alerts.empty:
+            price = alerts["symbol"].map(quotes)
+            hit = (
+                ((alerts["direction"] == "ABOVE") & (price >= alerts["target_price"])) |
+                ((alerts["direction"] == "BELOW") & (price <= alerts["target_price"]))
+            )
+            fired = alerts[hit]
+            if not fired.empty:
+                c.executemany("""
+                    UPDATE price_alerts
+                    SET status='TRIGGERED', triggered_price=%s, triggered_at=NOW()
+                    WHERE id=%s AND status='ACTIVE'
+                """, list(zip(price[hit].astype(float), fired["id"].astype(int))))
+                conn.commit()
+
+        # --- Orders: only the ones whose trigger this price crosses, filled as one batch ---
+        fired = [dict(order, price=float(price))
+                 for symbol, price in quotes.items() for order in book.on_price(symbol, float(price))]
+        if fired:
+            results = write_fills(conn, fired) if len(fired) > 1 else [_write_one(conn, fired[0])]
+            for order, result in zip(fired, results):
+                # Still PENDING in the DB: back on the book to fire again
+                if result["status"] in ("UNFUNDED", "ERROR"):
+                    book.add({k: v for k, v in order.items() if k != "price"})
+
+        # Persist raised trailing stops in one batch
+        moved = book.pop_moved()
+        if moved:
+            c.executemany("UPDATE transactions SET trigger_price=%s WHERE id=%s AND status='PENDING'",
+                          [(stop, oid) for oid, stop in moved.items()])
+            conn.commit()
+    finally:
+        book.lock.release()
+
+
+# ==========================================
+# PRICE ALERTS
+# ==========================================
+def add_price_alert(conn, email, symbol, direction, target_price):
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO price_alerts (email, symbol, direction, target_price)
+        VALUES (%s, %s, %s, %s)
+    """, (email, symbol, direction, target_price))
+    conn.commit()
+
+
+def get_user_alerts(conn, email):
+    return pd.read_sql("""
+        SELECT id, symbol, direction, target_price, status, triggered_price, triggered_at
+        FROM price_alerts
+        WHERE email=%s AND status IN ('ACTIVE', 'TRIGGERED')
+        ORDER BY status, symbol
+    """, conn, params=(email,))
+
+
+def delete_price_alert(conn, email, alert_id):
+    c = conn.cursor()
+    c.execute("DELETE FROM price_alerts WHERE id=%s AND email=%s", (alert_id, email))
+    conn.commit()
+
+
+def pop_triggered_alerts(conn, email):
+    """Triggered alerts the user hasn't been notified about yet (marks them notified)"""
+    fired = pd.read_sql("""
+        SELECT id, symbol, direction, target_price, triggered_price
+        FROM price_alerts
+        WHERE email=%s AND status='TRIGGERED' AND notified=0
+    """, conn, params=(email,))
+    if not fired.empty:
+        c = conn.cursor()
+        c.executemany("UPDATE price_alerts SET notified=1 WHERE id=%s",
+                      [(int(i),) for i in fired["id"]])
+        conn.commit()
+    return fired
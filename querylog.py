@@ -0,0 +1,216 @@
+"""
+Query instrumentation for every connection made through db.py.
+
+TracedCursor (the cursorclass of those connections) times each statement
+sent to the server, so cursor.execute, executemany (one round trip per
+row unless pymysql batches an INSERT) and pd.read_sql are all covered. For
+each query it records the fingerprint (SQL with literals and parameters
+replaced by ?), duration and rows returned or affected:
+
+  * process-wide totals per fingerprint (get_query_stats)
+  * the slow-query log: statements over QUANTIFY_SLOW_QUERY_MS are appended
+    to QUANTIFY_SLOW_QUERY_LOG, fingerprint only (no user data)
+  * the current page_budget() scope, if any: a render over
+    QUANTIFY_PAGE_QUERY_BUDGET queries or QUANTIFY_PAGE_TIME_BUDGET_MS, or
+    repeating one fingerprint QUANTIFY_QUERY_REPEAT_LIMIT times (N+1), is
+    flagged in the same log
+
+    python querylog.py      # slow log summarized by fingerprint
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+
+import pymysql
+
+SLOW_QUERY_MS = float(os.environ.get("QUANTIFY_SLOW_QUERY_MS", 200))
+SLOW_QUERY_LOG = os.environ.get("QUANTIFY_SLOW_QUERY_LOG", os.path.join("logs", "slow_queries.log"))
+PAGE_QUERY_BUDGET = int(os.environ.get("QUANTIFY_PAGE_QUERY_BUDGET", 40))
+PAGE_TIME_BUDGET_MS = float(os.environ.get("QUANTIFY_PAGE_TIME_BUDGET_MS", 1500))
+REPEAT_LIMIT = int(os.environ.get("QUANTIFY_QUERY_REPEAT_LIMIT", 10))
+SHOW_QUERY_STATS = os.environ.get("QUANTIFY_QUERY_STATS") == "1"  # per-page summary in the sidebar
+FINGERPRINT_CHARS = 4096  # longer statements (expanded multi-row INSERTs) are fingerprinted by this prefix
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?(?:e[-+]?\d+)?\b|%s|%\(\w+\)s",
+                       re.IGNORECASE)
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_OPEN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*[\s,]*$")  # cut off by FINGERPRINT_CHARS
+_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Statement shape: literals and placeholders as ?, IN lists and VALUES rows collapsed"""
+    if len(sql) > FINGERPRINT_CHARS:
+        return _fingerprint(sql[:FINGERPRINT_CHARS]) + " ..."
+    return _fingerprint(sql)
+
+
+@lru_cache(maxsize=2048)
+def _fingerprint(sql):
+    sql = _LITERALS.sub("?", sql)
+    sql = _LISTS.sub("(?+)", sql)
+    sql = _OPEN_LIST.sub("(?+", sql)
+    sql = _ROWS.sub("(?+), ...", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+# ==========================================
+# SLOW-QUERY LOG
+# ==========================================
+_log = logging.getLogger("quantify.slow_queries")
+_log.propagate = False
+_log_lock = threading.Lock()
+
+
+def _slow_log():
+    if not _log.handlers:
+        with _log_lock:
+            if not _log.handlers:
+                os.makedirs(os.path.dirname(SLOW_QUERY_LOG) or ".", exist_ok=True)
+                handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                _log.addHandler(handler)
+                _log.setLevel(logging.INFO)
+    return _log
+
+
+# ==========================================
+# RECORDING
+# ==========================================
+_totals = defaultdict(lambda: [0, 0.0, 0.0, 0])  # fingerprint -> [count, seconds, max seconds, rows]
+_totals_lock = threading.Lock()
+_local = threading.local()
+
+
+class QueryScope:
+    """Queries issued by one thread between enter and exit of page_budget()"""
+
+    def __init__(self, page):
+        self.page = page
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.wall_seconds = 0.0
+        self.counts = Counter()
+
+    def add(self, fp, seconds, rows):
+        self.queries += 1
+        self.db_seconds += seconds
+        self.rows += max(rows, 0)
+        self.counts[fp] += 1
+
+    def problems(self):
+        found = []
+        if self.queries > PAGE_QUERY_BUDGET:
+            found.append(f"{self.queries} queries > budget {PAGE_QUERY_BUDGET}")
+        if self.wall_seconds * 1000 > PAGE_TIME_BUDGET_MS:
+            found.append(f"{self.wall_seconds * 1000:.0f} ms > budget {PAGE_TIME_BUDGET_MS:.0f} ms "
+                         f"({self.db_seconds * 1000:.0f} ms in the DB)")
+        for fp, n in self.counts.most_common():
+            if n < REPEAT_LIMIT:
+                break
+            found.append(f"repeated {n}x (N+1?): {fp[:200]}")
+        return found
+
+    def summary(self):
+        return (f"{self.queries} queries, {self.rows} rows, {self.db_seconds * 1000:.0f} ms DB "
+                f"/ {self.wall_seconds * 1000:.0f} ms render")
+
+
+def record(sql, seconds, rows):
+    fp = fingerprint(sql if isinstance(sql, str) else sql.decode("utf-8", "replace"))
+    with _totals_lock:
+        t = _totals[fp]
+        t[0] += 1
+        t[1] += seconds
+        t[2] = max(t[2], seconds)
+        t[3] += max(rows, 0)
+    scope = getattr(_local, "scope", None)
+    if scope is not None:
+        scope.add(fp, seconds, rows)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        page = scope.page if scope is not None else "-"
+        _slow_log().info(f"SLOW {seconds * 1000:.0f} ms rows={rows} page={page} | {fp[:2000]}")
+
+
+class TracedCursor(pymysql.cursors.Cursor):
+    _template = None
+
+    def execute(self, query, args=None):
+        t0 = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            # Inside executemany, query is one expanded batch: record the template instead
+            record(self._template or query, time.perf_counter() - t0, self.rowcount)
+
+    def executemany(self, query, args):
+        self._template = query
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._template = None
+
+
+@contextmanager
+def page_budget(page):
+    """Collect this thread's queries for one page render; over-budget renders go to the slow log"""
+    scope = QueryScope(page)
+    outer = getattr(_local, "scope", None)
+    _local.scope = scope
+    t0 = time.perf_counter()
+    try:
+        yield scope
+    finally:
+        scope.wall_seconds = time.perf_counter() - t0
+        _local.scope = outer
+        problems = scope.problems()
+        if problems:
+            _slow_log().info(f"BUDGET page={page} {scope.summary()} | " + "; ".join(problems))
+
+
+def get_query_stats(limit=20):
+    """Fingerprints with the most total time in this process"""
+    with _totals_lock:
+        items = [(fp, *t) for fp, t in _totals.items()]
+    items.sort(key=lambda r: r[2], reverse=True)
+    return [{"fingerprint": fp, "count": n, "total_ms": round(s * 1000, 1), "avg_ms": round(s * 1000 / n, 2),
+             "max_ms": round(m * 1000, 1), "rows": rows} for fp, n, s, m, rows in items[:limit]]
+
+
+def reset_query_stats():
+    with _totals_lock:
+        _totals.clear()
+
+
+def _summarize_log(path=SLOW_QUERY_LOG, limit=20):
+    slow = defaultdict(list)
+    budgets = Counter()
+    line_re = re.compile(r"SLOW (\d+) ms rows=-?\d+ page=(\S+) \| (.*)$")
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            m = line_re.search(line)
+            if m:
+                slow[m.group(3)].append(int(m.group(1)))
+            elif " BUDGET page=" in line:
+                budgets[line.split(" BUDGET page=", 1)[1].split(" ", 1)[0]] += 1
+    print(f"Slow statements (>= {SLOW_QUERY_MS:.0f} ms) by total time:")
+    for fp, ms in sorted(slow.items(), key=lambda kv: -sum(kv[1]))[:limit]:
+        print(f"  {len(ms):6d}x  avg {sum(ms) / len(ms):7.0f} ms  max {max(ms):7d} ms  {fp[:120]}")
+    if budgets:
+        print("\nPage renders over budget:")
+        for page, n in budgets.most_common():
+            print(f"  {n:6d}x  {page}")
+
+
+if __name__ == "__main__":
+    if os.path.exists(SLOW_QUERY_LOG):
+        _summarize_log()
+    else:
+        print(f"No slow-query log at {SLOW_QUERY_LOG}")
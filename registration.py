@@ -0,0 +1,260 @@
+import re
+import sys
+
+import pandas as pd
+import pymysql
+
+from auth import hash_passwords
+from db import get_connection
+
+# Unique KYC columns on users (each one backed by its own unique index)
+KYC_FIELDS = ("email", "pan", "aadhar", "phone", "account_no")
+FIELD_LABELS = {
+    "email": "email",
+    "pan": "PAN",
+    "aadhar": "Aadhar number",
+    "phone": "phone number",
+    "account_no": "bank account number",
+}
+IMPORT_BATCH_SIZE = 500
+
+
+class RegistrationError(Exception):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+
+
+# ==========================================
+# VALIDATION
+# ==========================================
+def validate_email(email):
+    return re.match(r'^[^@]+@[^@]+\.[^@]+$', email)
+
+def validate_aadhar(aadhar):
+    return bool(re.match(r'^\d{12}$', aadhar))
+
+def validate_pan(pan):
+    return bool(re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$', pan.upper()))
+
+def validate_ifsc(ifsc):
+    return bool(re.match(r'^[A-Z]{4}0[A-Z0-9]{6}$', ifsc.upper()))
+
+def validate_mobile(mobile):
+    """
+    Validates a 10-digit Indian mobile number.
+    - Must be exactly 10 digits.
+    - Must start with 6, 7, 8, or 9.
+    """
+    return bool(re.match(r'^[6-9]\d{9}$', str(mobile)))
+
+
+def normalize_record(record):
+    rec = {k: (str(v).strip() if v is not None and not pd.isna(v) else "") for k, v in record.items()}
+    for field in KYC_FIELDS + ("bank_name", "ifsc_code"):
+        rec.setdefault(field, "")
+    rec["pan"] = rec["pan"].upper()
+    rec["ifsc_code"] = rec["ifsc_code"].upper()
+    return rec
+
+
+def validate_record(rec, check_password=True):
+    """Returns an error message, or None if the record is valid"""
+    if not validate_email(rec["email"]):
+        return "Invalid email format."
+    if check_password and len(rec.get("password", "")) < 6:
+        return "Password must be at least 6 characters."
+    if not validate_aadhar(rec["aadhar"]):
+        return "Invalid Aadhar format (12 digits required)."
+    if not validate_pan(rec["pan"]):
+        return "Invalid PAN format."
+    if not validate_ifsc(rec["ifsc_code"]):
+        return "Invalid IFSC code."
+    if not validate_mobile(rec["phone"]):
+        return "Please enter a valid 10-digit mobile number starting with 6-9."
+    if not rec["account_no"].isdigit():
+        return "Account number should only contain digits."
+    if not rec.get("bank_name"):
+        return "Please fill all banking details."
+    return None
+
+
+# ==========================================
+# UNIQUENESS PROBE
+# ==========================================
+def find_kyc_conflicts(cursor, records, lock=False):
+    """
+    ONE indexed query for every unique KYC field of every record
+    (MySQL resolves the ORed IN-lists with an index merge).
+    Returns {(field, value): (existing_email, status)}.
+    """
+    where, params = [], []
+    for field in KYC_FIELDS:
+        values = sorted({r[field] for r in records if r.get(field)})
+        if values:
+            where.append(f"{field} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+    if not where:
+        return {}
+
+    query = f"SELECT {', '.join(KYC_FIELDS)}, status FROM users WHERE {' OR '.join(where)}"
+    if lock:
+        query += " FOR UPDATE"
+    cursor.execute(query, params)
+
+    taken = {}
+    for row in cursor.fetchall():
+        existing = dict(zip(KYC_FIELDS + ("status",), row))
+        for field in KYC_FIELDS:
+            if existing[field] is not None:
+                taken[(field, str(existing[field]))] = (existing["email"], existing["status"])
+    return taken
+
+
+def conflict_message(rec, taken):
+    """First conflicting field of one record, as (field, message), or None"""
+    # Suspended PAN wins over every other conflict: it blocks signup completely
+    pan_owner = taken.get(("pan", rec["pan"]))
+    if pan_owner and pan_owner[1] == "SUSPENDED":
+        return "pan", "🚫 This PAN is linked to a suspended account. You cannot register again."
+
+    for field in KYC_FIELDS:
+        if (field, rec[field]) in taken:
+            if field == "email":
+                return field, "This email is already registered. Please login instead."
+            return field, f"This {FIELD_LABELS[field]} is already registered with another account."
+    return None
+
+
+def field_from_integrity_error(err):
+    """Map MySQL 'Duplicate entry ... for key ...' to the KYC field"""
+    match = re.search(r"for key '(?:users\.)?([^']+)'", str(err))
+    key = match.group(1) if match else ""
+    return "email" if key == "PRIMARY" else (key if key in KYC_FIELDS else None)
+
+
+# ==========================================
+# SINGLE SIGN UP
+# ==========================================
+INSERT_USER = """
+    INSERT INTO users (
+        email, username, password, aadhar, pan,
+        phone, gender, dob, bank_name, account_no, ifsc_code, balance
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def _insert_row(rec, password_hash):
+    return (
+        rec["email"], rec.get("username") or rec["email"].split("@")[0], password_hash, rec["aadhar"], rec["pan"],
+        rec["phone"], rec.get("gender") or None, rec.get("dob") or None,
+        rec["bank_name"], rec["account_no"], rec["ifsc_code"],
+        float(rec.get("balance") or 0.0)
+    )
+
+
+def register_user(conn, record):
+    """
+    Probe all unique KYC fields in one round trip and insert, inside one
+    transaction. Raises RegistrationError naming the conflicting field.
+    """
+    rec = normalize_record(record)
+    error = validate_record(rec)
+    if error:
+        raise RegistrationError(None, error)
+
+    password_hash = hash_passwords([rec["password"]])[0]
+
+    c = conn.cursor()
+    try:
+        conn.begin()
+        conflict = conflict_message(rec, find_kyc_conflicts(c, [rec], lock=True))
+        if conflict:
+            conn.rollback()
+            raise RegistrationError(*conflict)
+
+        c.execute(INSERT_USER, _insert_row(rec, password_hash))
+        conn.commit()
+    except pymysql.err.IntegrityError as e:
+        # Lost a race with a concurrent sign up between probe and insert
+        conn.rollback()
+        field = field_from_integrity_error(e)
+        label = FIELD_LABELS.get(field, "account detail")
+        raise RegistrationError(field, f"This {label} is already registered with another account.")
+
+
+# ==========================================
+# BULK IMPORT (BROKER ACCOUNT MIGRATION)
+# ==========================================
+def import_users(conn, records, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import existing accounts in batches: one conflict probe and one
+    executemany per batch. Records may carry either a plain 'password'
+    or an existing bcrypt 'password_hash'.
+    Returns (inserted_count, rejects) where rejects is a list of (email, field, reason).
+    """
+    inserted, rejects = 0, []
+    c = conn.cursor()
+
+    for start in range(0, len(records), batch_size):
+        batch, seen = [], set()
+        for raw in records[start:start + batch_size]:
+            rec = normalize_record(raw)
+            error = validate_record(rec, check_password=not rec.get("password_hash"))
+            if error:
+                rejects.append((rec.get("email"), None, error))
+                continue
+            # Duplicates inside the same file never reach the DB
+            dup = next((f for f in KYC_FIELDS if (f, rec[f]) in seen), None)
+            if dup:
+                rejects.append((rec["email"], dup, f"Duplicate {FIELD_LABELS[dup]} in import file."))
+                continue
+            seen.update((f, rec[f]) for f in KYC_FIELDS)
+            batch.append(rec)
+
+        if not batch:
+            continue
+
+        conn.begin()
+        taken = find_kyc_conflicts(c, batch, lock=True)
+        ok = []
+        for rec in batch:
+            conflict = conflict_message(rec, taken)
+            if conflict:
+                rejects.append((rec["email"], conflict[0], conflict[1]))
+            else:
+                ok.append(rec)
+
+        plain = [r for r in ok if not r.get("password_hash")]
+        hashes = iter(hash_passwords([r["password"] for r in plain]))
+        rows = [_insert_row(r, r["password_hash"] if r.get("password_hash") else next(hashes)) for r in ok]
+
+        try:
+            c.executemany(INSERT_USER, rows)
+            conn.commit()
+            inserted += len(rows)
+        except pymysql.err.IntegrityError as e:
+            conn.rollback()
+            field = field_from_integrity_error(e)
+            rejects.extend((r["email"], field, f"Batch rolled back: {e}") for r in ok)
+
+    return inserted, rejects
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python registration.py <accounts.csv> [batch_size]")
+        sys.exit(1)
+
+    df = pd.read_csv(sys.argv[1], dtype=str)
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else IMPORT_BATCH_SIZE
+
+    conn = get_connection()
+    try:
+        inserted, rejects = import_users(conn, df.to_dict("records"), batch_size)
+    finally:
+        conn.close()
+
+    print(f"Imported: {inserted}, Rejected: {len(rejects)}")
+    for email, field, reason in rejects:
+        print(f"  {email}: {reason}")
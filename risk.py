@@ -0,0 +1,149 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from warehouse import update_warehouse, load_closes
+
+BENCHMARK = "^NSEI"  # NIFTY 50
+RISK_CACHE_DIR = os.environ.get("QUANTIFY_RISK_CACHE_DIR", "risk_cache")
+LOOKBACK_DAYS = 365
+MIN_OBSERVATIONS = 60
+TRADING_DAYS = 252
+VAR_LEVEL = 0.95
+Z_95 = 1.6449
+
+
+# ==========================================
+# DAILY RISK MODEL (SHARED BY ALL USERS)
+# ==========================================
+def build_risk_model(symbols, as_of=None):
+    """
+    One vectorized pass over the universe: daily returns matrix, its
+    covariance matrix and every symbol's beta against NIFTY.
+    """
+    as_of = pd.Timestamp(as_of or datetime.now().date())
+    update_warehouse(list(symbols) + [BENCHMARK])
+    closes = load_closes(list(symbols) + [BENCHMARK], as_of - timedelta(days=LOOKBACK_DAYS), as_of)
+    if closes.empty or BENCHMARK not in closes:
+        raise ValueError("No benchmark history available for the risk model")
+
+    returns = closes.ffill().pct_change().iloc[1:]
+    # Drop thinly traded symbols; treat the remaining gaps as flat days
+    returns = returns.loc[:, returns.notna().sum() >= MIN_OBSERVATIONS].fillna(0.0)
+
+    market = returns.pop(BENCHMARK).to_numpy()
+    R = returns.to_numpy()
+    centered = R - R.mean(axis=0)
+    cov = centered.T @ centered / (len(R) - 1)
+    m_centered = market - market.mean()
+    betas = centered.T @ m_centered / (m_centered @ m_centered)
+
+    return {
+        "as_of": as_of.date().isoformat(),
+        "symbols": np.array(returns.columns, dtype=str),
+        "dates": returns.index.values.astype("datetime64[D]"),
+        "returns": R,
+        "cov": cov,
+        "betas": betas,
+        "market": market,
+    }
+
+
+def _cache_path(as_of):
+    return os.path.join(RISK_CACHE_DIR, f"risk_model_{as_of}.npz")
+
+
+def save_risk_model(model):
+    os.makedirs(RISK_CACHE_DIR, exist_ok=True)
+    tmp = _cache_path(model["as_of"]) + ".tmp.npz"
+    np.savez(tmp, **{k: np.asarray(v) for k, v in model.items()})
+    os.replace(tmp, _cache_path(model["as_of"]))
+
+
+def load_risk_model(as_of):
+    try:
+        with np.load(_cache_path(as_of)) as f:
+            model = {k: f[k] for k in f.files}
+    except OSError:
+        return None
+    model["as_of"] = str(model["as_of"])
+    return model
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_risk_model(conn, rebuild=False):
+    """Today's model: process memory -> today's .npz on disk -> build once"""
+    global _model
+    today = datetime.now().date().isoformat()
+    if _model is not None and _model["as_of"] == today and not rebuild:
+        return _model
+
+    with _model_lock:
+        if _model is not None and _model["as_of"] == today and not rebuild:
+            return _model
+        model = None if rebuild else load_risk_model(today)
+        if model is None:
+            c = conn.cursor()
+            c.execute("SELECT symbol FROM stocks")
+            model = build_risk_model([row[0] for row in c.fetchall()])
+            save_risk_model(model)
+        _model = model
+    return _model
+
+
+# ==========================================
+# PER-USER METRICS (WEIGHTS x MATRIX)
+# ==========================================
+def portfolio_risk(model, holdings):
+    """
+    holdings: Series of current market value indexed by symbol.
+    Returns a dict of metrics plus the correlation matrix of the holdings.
+    """
+    index = {s: i for i, s in enumerate(model["symbols"])}
+    held = holdings[[s in index for s in holdings.index]]
+    held = held[held > 0]
+    if held.empty:
+        return None
+
+    total_value = float(held.sum())
+    rows = np.array([index[s] for s in held.index])
+    w = held.to_numpy(dtype=np.float64) / total_value
+
+    cov = model["cov"][np.ix_(rows, rows)]
+    daily_vol = float(np.sqrt(w @ cov @ w))
+    port_returns = model["returns"][:, rows] @ w
+
+    wealth = np.cumprod(1 + port_returns)
+    peak = np.maximum.accumulate(wealth)
+
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(sd, sd)
+
+    return {
+        "as_of": model["as_of"],
+        "coverage": total_value / float(holdings[holdings > 0].sum()),
+        "volatility": daily_vol * float(np.sqrt(TRADING_DAYS)),
+        "beta": float(w @ model["betas"][rows]),
+        "var_parametric": Z_95 * daily_vol * total_value,
+        "var_historical": -float(np.quantile(port_returns, 1 - VAR_LEVEL)) * total_value,
+        "max_drawdown": float(((wealth - peak) / peak).min()),
+        "correlation": pd.DataFrame(corr, index=held.index, columns=held.index).round(2),
+    }
+
+
+if __name__ == "__main__":
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        model = get_risk_model(conn, rebuild=True)
+    finally:
+        conn.close()
+    print(f"Risk model {model['as_of']}: {len(model['symbols'])} symbols, {len(model['dates'])} days")
@@ -0,0 +1,138 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from warehouse import load_bars
+
+LOOKBACK = 260          # bars needed for 52-week high/low plus a small margin
+YEAR_BARS = 252
+RSI_PERIOD = 14
+VOLUME_WINDOW = 20
+
+# Column -> label for every factor the screener can filter or sort on
+FACTORS = {
+    "last_close": "Last Close",
+    "change_pct": "Change %",
+    "gap_pct": "Gap %",
+    "return_20d_pct": "20D Return %",
+    "dist_52w_high_pct": "From 52W High %",
+    "dist_52w_low_pct": "From 52W Low %",
+    "volume_spike": "Volume Spike (x 20D avg)",
+    "rsi_14": "RSI 14",
+}
+
+
+# ==========================================
+# FACTOR REFRESH (ONE VECTORIZED BATCH)
+# ==========================================
+def _stack(symbols, column):
+    """(symbols x LOOKBACK) matrix of the last bars, NaN-padded on the left"""
+    out = np.full((len(symbols), LOOKBACK), np.nan)
+    for i, sym in enumerate(symbols):
+        cols = load_bars(sym)
+        if cols is not None:
+            tail = np.asarray(cols[column][-LOOKBACK:])
+            if len(tail):
+                out[i, -len(tail):] = tail
+    return out
+
+
+def compute_factors(symbols):
+    """Every factor for every symbol in one pass over (symbols x bars) matrices"""
+    close = _stack(symbols, "close")
+    opens = _stack(symbols, "open")
+    high = _stack(symbols, "high")
+    low = _stack(symbols, "low")
+    volume = _stack(symbols, "volume")
+
+    last, prev = close[:, -1], close[:, -2]
+    high_52w = np.nanmax(high[:, -YEAR_BARS:], axis=1, initial=-np.inf, where=~np.isnan(high[:, -YEAR_BARS:]))
+    low_52w = np.nanmin(low[:, -YEAR_BARS:], axis=1, initial=np.inf, where=~np.isnan(low[:, -YEAR_BARS:]))
+    with warnings.catch_warnings():
+        # Symbols with too little history just get NaN factors
+        warnings.simplefilter("ignore", RuntimeWarning)
+        avg_vol = np.nanmean(volume[:, -VOLUME_WINDOW - 1:-1], axis=1)
+
+    # Wilder RSI down the time axis for all symbols at once
+    delta = pd.DataFrame(close.T).diff()
+    gain = delta.clip(lower=0).ewm(alpha=1 / RSI_PERIOD, adjust=False).mean().iloc[-1].to_numpy()
+    loss = (-delta.clip(upper=0)).ewm(alpha=1 / RSI_PERIOD, adjust=False).mean().iloc[-1].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factors = pd.DataFrame({
+            "symbol": symbols,
+            "last_close": last,
+            "change_pct": (last - prev) / prev * 100,
+            "gap_pct": (opens[:, -1] - prev) / prev * 100,
+            "return_20d_pct": (last - close[:, -21]) / close[:, -21] * 100,
+            "high_52w": high_52w,
+            "low_52w": low_52w,
+            "dist_52w_high_pct": (last - high_52w) / high_52w * 100,
+            "dist_52w_low_pct": (last - low_52w) / low_52w * 100,
+            "avg_volume_20d": avg_vol,
+            "volume_spike": volume[:, -1] / avg_vol,
+            "rsi_14": np.where(loss > 0, 100 - 100 / (1 + gain / loss), np.where(gain > 0, 100.0, np.nan)),
+        })
+
+    factors = factors.replace([np.inf, -np.inf], np.nan).round(2)
+    return factors.dropna(subset=["last_close"])
+
+
+def refresh_factors(conn):
+    """Recompute the factor table for the whole universe (run after each sync)"""
+    stocks = pd.read_sql("SELECT symbol, category FROM stocks", conn)
+    if stocks.empty:
+        return 0
+
+    factors = compute_factors(stocks["symbol"].tolist()).merge(stocks, on="symbol")
+    cols = ["symbol", "category"] + [c for c in factors.columns if c not in ("symbol", "category")]
+    factors = factors[cols].astype(object).where(factors[cols].notna(), None)
+
+    c = conn.cursor()
+    c.execute("DELETE FROM stock_factors")
+    c.executemany(f"""
+        INSERT INTO stock_factors ({', '.join(cols)}, updated_at)
+        VALUES ({', '.join(['%s'] * len(cols))}, NOW())
+    """, list(factors.itertuples(index=False, name=None)))
+    conn.commit()
+    return len(factors)
+
+
+# ==========================================
+# SCREENS
+# ==========================================
+def get_categories(conn):
+    return pd.read_sql("SELECT DISTINCT category FROM stock_factors ORDER BY category", conn)["category"].dropna().tolist()
+
+
+def screen(conn, ranges=None, categories=None, sort_by="change_pct", descending=True, limit=100):
+    """
+    ranges: {factor: (min, max)} with None for an open end.
+    Runs as one indexed SQL query against stock_factors.
+    """
+    where, params = [], []
+    for col, (lo, hi) in (ranges or {}).items():
+        if col not in FACTORS:
+            raise ValueError(f"Unknown factor: {col}")
+        if lo is not None:
+            where.append(f"f.{col} >= %s")
+            params.append(lo)
+        if hi is not None:
+            where.append(f"f.{col} <= %s")
+            params.append(hi)
+    if categories:
+        where.append(f"f.category IN ({', '.join(['%s'] * len(categories))})")
+        params.extend(categories)
+    if sort_by not in FACTORS:
+        raise ValueError(f"Unknown factor: {sort_by}")
+
+    query = f"""
+        SELECT f.symbol, s.company_name, f.category, {', '.join('f.' + c for c in FACTORS)}, f.updated_at
+        FROM stock_factors f JOIN stocks s ON s.symbol = f.symbol
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY f.{sort_by} {'DESC' if descending else 'ASC'}
+        LIMIT %s
+    """
+    params.append(int(limit))
+    return pd.read_sql(query, conn, params=params).rename(columns=FACTORS)
@@ -0,0 +1,329 @@
+"""
+End-of-day settlement.
+
+    python settlement.py                          # last completed session
+    python settlement.py --date 2026-10-16 --pdf --workers 8
+
+For one trading day:
+  1. expire good-till-date orders that lapsed, with two set-based UPDATEs
+  2. load the day's COMPLETE fills and realized P/L in two queries, then
+     compute brokerage, obligations and per-user totals with vectorized pandas
+  3. write a contract note per user (CSV, optionally PDF) under
+     QUANTIFY_CONTRACT_NOTES_DIR/<date>/, users split into chunks across processes
+  4. record each settled user in settlement_users as its chunk finishes,
+     then the day's totals (brokerage credited to the admin account
+     included) in daily_settlements
+
+Rerunning a day skips the users already in settlement_users, so a crashed
+run resumes where it stopped; notes are replaced atomically and every
+write is an upsert. --force settles every user again (e.g. after late fills).
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from orders import ADMIN_EMAIL, COMMISSION_FLAT, COMMISSION_PCT, MARKET_CLOSE, last_completed_session
+from tradelog import log_user
+
+NOTES_DIR = os.environ.get("QUANTIFY_CONTRACT_NOTES_DIR", os.path.join("archive", "contract_notes"))
+USERS_PER_TASK = 250  # users per worker task; also the commit interval of settlement_users
+PDF_LINES_PER_PAGE = 76
+
+NOTE_COLUMNS = ["timestamp", "id", "symbol", "action", "order_type", "qty", "price", "gross", "brokerage", "net_amount"]
+
+
+# ==========================================
+# SET-BASED STEPS
+# ==========================================
+def expire_orders(conn, cutoff):
+    """Good-till-date orders (and their waiting bracket legs) lapsed by cutoff. Returns orders expired."""
+    c = conn.cursor()
+    expired = c.execute("""
+        UPDATE transactions SET status='EXPIRED'
+        WHERE status='PENDING' AND expires_at IS NOT NULL AND expires_at <= %s
+    """, (cutoff,))
+    c.execute("""
+        UPDATE transactions child JOIN transactions parent ON child.parent_id = parent.id
+        SET child.status='EXPIRED'
+        WHERE child.status='WAITING' AND parent.status='EXPIRED'
+    """)
+    conn.commit()
+    return expired
+
+
+def load_day(conn, day):
+    """(the day's user fills, realized P/L per user) in two queries"""
+    start = day.to_pydatetime()
+    end = (day + pd.Timedelta(days=1)).to_pydatetime()
+    fills = pd.read_sql("""
+        SELECT id, email, symbol, qty, price, action, order_type, timestamp
+        FROM transactions
+        WHERE status='COMPLETE' AND timestamp >= %s AND timestamp < %s
+          AND email <> %s AND action IN ('BUY', 'SELL')
+    """, conn, params=(start, end, ADMIN_EMAIL))
+    realized = pd.read_sql("""
+        SELECT email, SUM(pnl) AS realized
+        FROM realized_pnl
+        WHERE sell_date >= %s AND sell_date < %s
+        GROUP BY email
+    """, conn, params=(start, end))
+    return fills, realized.set_index("email")["realized"]
+
+
+# ==========================================
+# VECTORIZED TOTALS
+# ==========================================
+def price_fills(fills):
+    """Gross value, brokerage (as charged by calc_brokerage) and signed cash obligation per fill"""
+    gross = fills["price"].to_numpy(dtype=np.float64) * fills["qty"].to_numpy(dtype=np.float64)
+    brokerage = np.maximum(COMMISSION_FLAT, gross * COMMISSION_PCT)
+    # BUY pays value + brokerage, SELL receives value - brokerage
+    sign = np.where(fills["action"].to_numpy() == "BUY", -1.0, 1.0)
+    return fills.assign(gross=gross.round(2), brokerage=brokerage.round(2),
+                        net_amount=(sign * gross - brokerage).round(2))
+
+
+def user_totals(fills, realized=None):
+    """One row per user: fill counts, buy/sell value, brokerage, net obligation, realized P/L"""
+    is_buy = fills["action"] == "BUY"
+    frame = pd.DataFrame({
+        "email": fills["email"],
+        "buys": is_buy.astype(np.int64),
+        "buy_value": fills["gross"].where(is_buy, 0.0),
+        "sell_value": fills["gross"].where(~is_buy, 0.0),
+        "brokerage": fills["brokerage"],
+        "net_amount": fills["net_amount"],
+    })
+    totals = frame.groupby("email").sum()
+    totals.insert(0, "fills", fills.groupby("email").size())
+    totals.insert(2, "sells", totals["fills"] - totals["buys"])
+    totals["realized"] = 0.0 if realized is None else realized.reindex(totals.index).fillna(0.0)
+    return totals.round(2)
+
+
+# ==========================================
+# CONTRACT NOTES
+# ==========================================
+def _pdf_bytes(lines):
+    """Bare-bones text PDF: Courier on A4, PDF_LINES_PER_PAGE lines a page"""
+    def esc(s):
+        return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"]
+    kids = []
+    for page in pages:
+        text = "BT /F1 7 Tf 10 TL 36 816 Td " + " ".join(f"({esc(line)}) '" for line in page) + " ET"
+        objects.append(f"<< /Length {len(text.encode('latin-1', 'replace'))} >>\nstream\n{text}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1", "replace")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _user_bounds(fills, emails):
+    """Start row of each user in fills sorted by email, plus the end"""
+    return np.append(np.searchsorted(fills["email"].to_numpy(), emails), len(fills))
+
+
+def _table_lines(fills):
+    """Fixed-width text rows for a whole chunk at once (DataFrame.to_string per user is far slower)"""
+    money = "{:,.2f}".format
+    return (fills["timestamp"].dt.strftime("%H:%M:%S") + "  "
+            + fills["id"].astype(str).str.rjust(10) + "  "
+            + fills["symbol"].str.ljust(12) + fills["action"].str.ljust(6) + fills["order_type"].str.ljust(15)
+            + fills["qty"].astype(str).str.rjust(7)
+            + fills["price"].map(money).str.rjust(12) + fills["gross"].map(money).str.rjust(16)
+            + fills["brokerage"].map(money).str.rjust(11) + fills["net_amount"].map(money).str.rjust(17)).tolist()
+
+
+TABLE_HEADER = (f"{'Time':<10}{'Order':>10}  {'Symbol':<12}{'Side':<6}{'Type':<15}{'Qty':>7}"
+                f"{'Price':>12}{'Gross':>16}{'Brokerage':>11}{'Net':>17}")
+
+
+def _note_lines(email, day, table, total):
+    header = [
+        "QUANTIFY - CONTRACT NOTE",
+        f"Client: {email}",
+        f"Trade date: {day:%Y-%m-%d}",
+        "",
+        TABLE_HEADER,
+        "-" * len(TABLE_HEADER),
+    ]
+    footer = [
+        "",
+        f"Fills: {int(total['fills'])}  (buys {int(total['buys'])}, sells {int(total['sells'])})",
+        f"Bought value:    INR {total['buy_value']:>16,.2f}",
+        f"Sold value:      INR {total['sell_value']:>16,.2f}",
+        f"Brokerage:       INR {total['brokerage']:>16,.2f}",
+        f"Net obligation:  INR {total['net_amount']:>16,.2f}  ({'receivable' if total['net_amount'] >= 0 else 'payable'})",
+        f"Realized P/L:    INR {total['realized']:>16,.2f}",
+    ]
+    return header + table + footer
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _write_notes(args):
+    """Worker: contract notes for one chunk of users; returns [(email, csv path)]"""
+    day, out_dir, pdf, fills, totals = args
+    # The chunk is formatted in one pass and sliced per user (fills are sorted by email)
+    csv_header, *csv_rows = fills[NOTE_COLUMNS].to_csv(index=False).splitlines(keepends=True)
+    table = _table_lines(fills) if pdf else None
+    emails = totals.index.tolist()
+    bounds = _user_bounds(fills, emails)
+    written = []
+    for k, email in enumerate(emails):
+        lo, hi = bounds[k], bounds[k + 1]
+        path = os.path.join(out_dir, f"{log_user(email)}.csv")
+        _write_atomic(path, "".join([csv_header, *csv_rows[lo:hi]]).encode("utf-8"))
+        if pdf:
+            lines = _note_lines(email, day, table[lo:hi], totals.iloc[k])
+            _write_atomic(path[:-4] + ".pdf", _pdf_bytes(lines))
+        written.append((email, path))
+    return written
+
+
+def write_contract_notes(fills, totals, day, out_dir=None, workers=None, pdf=False):
+    """Notes for every user in totals, in parallel; yields [(email, path)] per finished chunk"""
+    out_dir = out_dir or os.path.join(NOTES_DIR, f"{day:%Y-%m-%d}")
+    os.makedirs(out_dir, exist_ok=True)
+    fills = fills[fills["email"].isin(totals.index)].sort_values(["email", "timestamp", "id"], kind="stable")
+    totals = totals.sort_index()
+    emails = totals.index.tolist()
+    # Row range of each user in the sorted frame, so a chunk is one slice
+    bounds = _user_bounds(fills, emails)
+    tasks = []
+    for i in range(0, len(emails), USERS_PER_TASK):
+        j = min(i + USERS_PER_TASK, len(emails))
+        tasks.append((day, out_dir, pdf, fills.iloc[bounds[i]:bounds[j]], totals.iloc[i:j]))
+    if not tasks:
+        return
+    with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+        yield from pool.map(_write_notes, tasks)
+
+
+# ==========================================
+# JOB
+# ==========================================
+def run_settlement(conn, day=None, workers=None, pdf=False, force=False):
+    """
+    Settle one day (default the last completed session). Returns the
+    daily_settlements row as a dict. A day whose close has not passed is
+    refused: its fills and expiries are not final yet.
+    """
+    day = pd.Timestamp(day or last_completed_session()).normalize()
+    close = datetime.combine(day.date(), MARKET_CLOSE)
+    if datetime.now() < close:
+        raise ValueError(f"{day:%Y-%m-%d} cannot be settled before the {MARKET_CLOSE:%H:%M} close")
+    c = conn.cursor()
+    c.execute("SELECT status FROM daily_settlements WHERE settle_date=%s", (day.date(),))
+    row = c.fetchone()
+    if row and row[0] == "COMPLETE" and not force:
+        return get_settlement(conn, day)
+
+    c.execute("""
+        INSERT INTO daily_settlements (settle_date, status, started_at) VALUES (%s, 'RUNNING', NOW())
+        ON DUPLICATE KEY UPDATE status='RUNNING', started_at=NOW(), finished_at=NULL
+    """, (day.date(),))
+    conn.commit()
+
+    expired = expire_orders(conn, close)
+
+    fills, realized = load_day(conn, day)
+    fills = price_fills(fills)
+    totals = user_totals(fills, realized)
+
+    c.execute("SELECT email FROM settlement_users WHERE settle_date=%s", (day.date(),))
+    done = set() if force else {email for (email,) in c.fetchall()}
+    todo = totals[~totals.index.isin(done)]
+
+    columns = ["fills", "buys", "sells", "buy_value", "sell_value", "brokerage", "net_amount", "realized"]
+    for written in write_contract_notes(fills, todo, day, workers=workers, pdf=pdf):
+        rows = [(day.date(), email, *todo.loc[email, columns].tolist(), path) for email, path in written]
+        c.executemany("""
+            INSERT INTO settlement_users
+                (settle_date, email, fills, buys, sells, buy_value, sell_value,
+                 brokerage, net_amount, realized, note_path, settled_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+            ON DUPLICATE KEY UPDATE
+                fills=VALUES(fills), buys=VALUES(buys), sells=VALUES(sells),
+                buy_value=VALUES(buy_value), sell_value=VALUES(sell_value),
+                brokerage=VALUES(brokerage), net_amount=VALUES(net_amount),
+                realized=VALUES(realized), note_path=VALUES(note_path), settled_at=NOW()
+        """, rows)
+        conn.commit()
+
+    c.execute("""
+        UPDATE daily_settlements
+        SET fills=%s, users=%s, buy_value=%s, sell_value=%s, brokerage=%s,
+            realized=%s, expired_orders=expired_orders + %s,
+            status='COMPLETE', finished_at=NOW()
+        WHERE settle_date=%s
+    """, (int(totals["fills"].sum()), len(totals), round(float(totals["buy_value"].sum()), 2),
+          round(float(totals["sell_value"].sum()), 2), round(float(totals["brokerage"].sum()), 2),
+          round(float(totals["realized"].sum()), 2), expired, day.date()))
+    conn.commit()
+    return get_settlement(conn, day)
+
+
+def get_settlement(conn, day):
+    c = conn.cursor()
+    c.execute("""
+        SELECT settle_date, status, fills, users, buy_value, sell_value, brokerage,
+               realized, expired_orders, started_at, finished_at
+        FROM daily_settlements WHERE settle_date=%s
+    """, (pd.Timestamp(day).date(),))
+    row = c.fetchone()
+    if row is None:
+        return None
+    keys = ["settle_date", "status", "fills", "users", "buy_value", "sell_value", "brokerage",
+            "realized", "expired_orders", "started_at", "finished_at"]
+    return dict(zip(keys, row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date", help="YYYY-MM-DD (default the last completed session)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--pdf", action="store_true", help="also write PDF contract notes")
+    parser.add_argument("--force", action="store_true", help="settle every user again")
+    args = parser.parse_args()
+
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        t0 = datetime.now()
+        summary = run_settlement(conn, args.date, workers=args.workers, pdf=args.pdf, force=args.force)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        conn.close()
+    for key, value in summary.items():
+        print(f"{key:<15} {value}")
+    print(f"Done in {(datetime.now() - t0).total_seconds():.1f}s")
+
+
+if __name__ == "__main__":
+    main()
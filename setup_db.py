@@ -1,5 +1,7 @@
 import pymysql
 
+from archive import ensure_partitions
+
 print("1. Python is running.")
 
 try:
@@ -65,9 +67,32 @@ try:
                     order_type VARCHAR(20) DEFAULT 'MARKET',
                     trigger_price DOUBLE NULL,
                     status VARCHAR(20) DEFAULT 'PENDING',
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    trail_pct DOUBLE NULL,
+                    oco_group INT NULL,
+                    parent_id INT NULL,
+                    expires_at DATETIME NULL,
+                    armed_at DATETIME NULL,
+                    KEY idx_tx_status (status, id),
+                    KEY idx_tx_oco (oco_group),
+                    KEY idx_tx_parent (parent_id),
+                    KEY idx_tx_armed (armed_at)
                 )
             """)
+
+            # Advanced order columns for databases created before them (MariaDB syntax)
+            cursor.execute("""
+                ALTER TABLE transactions
+                    ADD COLUMN IF NOT EXISTS trail_pct DOUBLE NULL,
+                    ADD COLUMN IF NOT EXISTS oco_group INT NULL,
+                    ADD COLUMN IF NOT EXISTS parent_id INT NULL,
+                    ADD COLUMN IF NOT EXISTS expires_at DATETIME NULL,
+                    ADD COLUMN IF NOT EXISTS armed_at DATETIME NULL,
+                    ADD INDEX IF NOT EXISTS idx_tx_status (status, id),
+                    ADD INDEX IF NOT EXISTS idx_tx_oco (oco_group),
+                    ADD INDEX IF NOT EXISTS idx_tx_parent (parent_id),
+                    ADD INDEX IF NOT EXISTS idx_tx_armed (armed_at)
+            """)
             
             # Create Watchlist Table (Needed for your app logic)
             cursor.execute("""
@@ -79,9 +104,161 @@ try:
                 )
             """)
             
+            # Create Portfolio Snapshots Table (end-of-day time series per user)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+                    email VARCHAR(255),
+                    snap_date DATE,
+                    holdings_value DOUBLE,
+                    cash DOUBLE,
+                    invested DOUBLE,
+                    pnl DOUBLE,
+                    total_value DOUBLE,
+                    PRIMARY KEY (email, snap_date),
+                    KEY idx_snap_rank (snap_date, total_value)
+                )
+            """)
+
+            # Create Price Alerts Table (evaluated with pending orders)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS price_alerts (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    email VARCHAR(255),
+                    symbol VARCHAR(50),
+                    direction VARCHAR(10),
+                    target_price DOUBLE,
+                    status VARCHAR(20) DEFAULT 'ACTIVE',
+                    triggered_price DOUBLE NULL,
+                    triggered_at DATETIME NULL,
+                    notified TINYINT DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    KEY idx_alert_status (status, symbol),
+                    KEY idx_alert_user (email, status)
+                )
+            """)
+
+            # Create Stock Factors Table (screener, refreshed after each sync)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stock_factors (
+                    symbol VARCHAR(50) PRIMARY KEY,
+                    category VARCHAR(100),
+                    last_close DOUBLE,
+                    change_pct DOUBLE,
+                    gap_pct DOUBLE,
+                    return_20d_pct DOUBLE,
+                    high_52w DOUBLE,
+                    low_52w DOUBLE,
+                    dist_52w_high_pct DOUBLE,
+                    dist_52w_low_pct DOUBLE,
+                    avg_volume_20d DOUBLE,
+                    volume_spike DOUBLE,
+                    rsi_14 DOUBLE,
+                    updated_at DATETIME,
+                    KEY idx_f_category (category),
+                    KEY idx_f_change (change_pct),
+                    KEY idx_f_gap (gap_pct),
+                    KEY idx_f_high (dist_52w_high_pct),
+                    KEY idx_f_low (dist_52w_low_pct),
+                    KEY idx_f_volume (volume_spike),
+                    KEY idx_f_rsi (rsi_14)
+                )
+            """)
+
+            # Create Tax Lots Table (open FIFO lots per user and symbol)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tax_lots (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    email VARCHAR(255),
+                    symbol VARCHAR(50),
+                    buy_txn_id INT,
+                    buy_date DATETIME,
+                    qty_open INT,
+                    cost_per_share DOUBLE,
+                    KEY idx_lot_fifo (email, symbol, buy_date, id)
+                )
+            """)
+
+            # Create Realized P/L Table (one row per lot consumed by a sell)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS realized_pnl (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    email VARCHAR(255),
+                    symbol VARCHAR(50),
+                    sell_txn_id INT,
+                    lot_id INT,
+                    qty INT,
+                    buy_date DATETIME,
+                    sell_date DATETIME,
+                    cost DOUBLE,
+                    proceeds DOUBLE,
+                    pnl DOUBLE,
+                    term VARCHAR(10),
+                    KEY idx_realized_user (email, sell_date, term)
+                )
+            """)
+
+            # Create API Tokens Table (hashed bearer tokens for the HTTP API)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS api_tokens (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    token_hash CHAR(64) UNIQUE,
+                    email VARCHAR(255),
+                    label VARCHAR(100),
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at DATETIME NULL,
+                    revoked TINYINT DEFAULT 0,
+                    KEY idx_token_user (email)
+                )
+            """)
+
+            # Create Settlement Tables (end-of-day job: day totals and per-user progress)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS daily_settlements (
+                    settle_date DATE PRIMARY KEY,
+                    status VARCHAR(20),
+                    fills INT DEFAULT 0,
+                    users INT DEFAULT 0,
+                    buy_value DOUBLE DEFAULT 0,
+                    sell_value DOUBLE DEFAULT 0,
+                    brokerage DOUBLE DEFAULT 0,
+                    realized DOUBLE DEFAULT 0,
+                    expired_orders INT DEFAULT 0,
+                    started_at DATETIME,
+                    finished_at DATETIME NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS settlement_users (
+                    settle_date DATE,
+                    email VARCHAR(255),
+                    fills INT,
+                    buys INT,
+                    sells INT,
+                    buy_value DOUBLE,
+                    sell_value DOUBLE,
+                    brokerage DOUBLE,
+                    net_amount DOUBLE,
+                    realized DOUBLE,
+                    note_path VARCHAR(500),
+                    settled_at DATETIME,
+                    PRIMARY KEY (settle_date, email)
+                )
+            """)
+
+            # MARKET sells used to be logged without a status and sat as PENDING
+            cursor.execute("""
+                UPDATE transactions SET status='COMPLETE'
+                WHERE order_type='MARKET' AND status='PENDING'
+            """)
+            connection.commit()
+
+            # Monthly RANGE partitions on transactions.timestamp (first run rebuilds the table once)
+            ensure_partitions(connection)
+
             print("6. All Tables Created Successfully.") 
 
         print("--- SETUP COMPLETE ---")
+        print("Run `python lots.py` once to build tax lots from existing transactions.")
 
     finally:
         connection.close()
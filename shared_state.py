@@ -0,0 +1,377 @@
+"""
+Key/value state shared by every Quantify worker process.
+
+QUANTIFY_STATE_BACKEND picks where it lives:
+
+    memory                    (default) this process only: a single worker
+    file:/var/lib/quantify    one JSON file per key: every process on the host
+    redis://host:6379/0       any Redis-protocol server: workers on many hosts
+
+    python shared_state.py serve --port 6379
+
+runs a small stand-in speaking the part of the Redis protocol used here
+(PING, GET, MGET, SET with EX/PX, DEL), so the redis setting can
+be tried without installing Redis.
+
+Values are JSON and keys may carry a TTL. Stored here: login sessions
+and failed-login counters (auth.py), the live quote cache
+(market_data.py) and the market-state frame (market_state.py). A backend
+that cannot be reached behaves as an empty store for REDIS_RETRY_SECONDS,
+so pages fall back to fetching for themselves instead of failing.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from urllib.parse import quote, urlparse
+
+STATE_BACKEND = os.environ.get("QUANTIFY_STATE_BACKEND", "memory")
+REDIS_TIMEOUT = 2.0
+REDIS_RETRY_SECONDS = 30
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+class MemoryBackend:
+    """Dict with per-key expiry; values are kept as JSON so callers never share objects"""
+
+    def __init__(self):
+        self._data = {}  # key -> (expires or None, json text)
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        if item[0] is not None and item[0] <= now:
+            del self._data[key]
+            return None
+        return item[1]
+
+    def get_raw(self, key):
+        with self._lock:
+            return self._live(key, time.time())
+
+    def get_many_raw(self, keys):
+        now = time.time()
+        with self._lock:
+            return [self._live(k, now) for k in keys]
+
+    def set_many_raw(self, mapping, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            for key, text in mapping.items():
+                self._data[key] = (expires, text)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class FileBackend:
+    """One file per key under path; writes are atomic renames, so processes never see partial values"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, quote(key, safe="") + ".json")
+
+    def get_raw(self, key):
+        path = self._file(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                expires, text = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if expires is not None and expires <= time.time():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        return text
+
+    def get_many_raw(self, keys):
+        return [self.get_raw(k) for k in keys]
+
+    def set_many_raw(self, mapping, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        for key, text in mapping.items():
+            path = self._file(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump([expires, text], f)
+            os.replace(tmp, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+
+class RedisBackend:
+    """Minimal RESP client: one socket per process, commands pipelined for set_many"""
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.strip("/") or 0)
+        self.password = parsed.password
+        self._sock = None
+        self._buf = b""
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+
+    # --- protocol ---
+    @staticmethod
+    def _encode(*args):
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            a = a if isinstance(a, bytes) else str(a).encode()
+            out.append(b"$%d\r\n%s\r\n" % (len(a), a))
+        return b"".join(out)
+
+    def _line(self):
+        while b"\r\n" not in self._buf:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("connection closed")
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\r\n", 1)
+        return line
+
+    def _exact(self, n):
+        while len(self._buf) < n + 2:
+            chunk = self._sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("connection closed")
+            self._buf += chunk
+        data, self._buf = self._buf[:n], self._buf[n + 2:]
+        return data
+
+    def _reply(self):
+        line = self._line()
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RuntimeError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            return None if n < 0 else self._exact(n).decode()
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._reply() for _ in range(n)]
+        raise ConnectionError(f"bad reply {line[:40]!r}")
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=REDIS_TIMEOUT)
+        self._buf = b""
+        if self.password:
+            self._send([("AUTH", self.password)])
+        if self.db:
+            self._send([("SELECT", self.db)])
+
+    def _send(self, commands):
+        self._sock.sendall(b"".join(self._encode(*c) for c in commands))
+        # Read every reply before raising so the connection stays in step
+        replies = [self._reply() for _ in commands]
+        for r in replies:
+            if isinstance(r, RuntimeError):
+                raise r
+        return replies
+
+    def _call(self, commands, default):
+        """Run commands in one round trip; while the server is unreachable, return default"""
+        if time.time() < self._down_until:
+            return default
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(commands)
+                except OSError as e:
+                    if self._sock is not None:
+                        self._sock.close()
+                    self._sock = None
+                    if attempt == 2:
+                        self._down_until = time.time() + REDIS_RETRY_SECONDS
+                        print(f"Shared state {self.host}:{self.port} unavailable, using local fallbacks: {e}")
+        return default
+
+    # --- backend interface ---
+    def get_raw(self, key):
+        return self._call([("GET", key)], [None])[0]
+
+    def get_many_raw(self, keys):
+        if not keys:
+            return []
+        return self._call([("MGET", *keys)], [[None] * len(keys)])[0]
+
+    def set_many_raw(self, mapping, ttl=None):
+        extra = ("PX", max(int(ttl * 1000), 1)) if ttl else ()
+        self._call([("SET", k, v, *extra) for k, v in mapping.items()], None)
+
+    def delete(self, key):
+        self._call([("DEL", key)], None)
+
+
+# ==========================================
+# STORE (JSON VALUES)
+# ==========================================
+class SharedState:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def is_local(self):
+        """True when nothing outside this process can see the store"""
+        return isinstance(self.backend, MemoryBackend)
+
+    def get(self, key, default=None):
+        text = self.backend.get_raw(key)
+        return default if text is None else json.loads(text)
+
+    def get_many(self, keys):
+        """{key: value} for the keys present"""
+        keys = list(keys)
+        return {k: json.loads(t) for k, t in zip(keys, self.backend.get_many_raw(keys)) if t is not None}
+
+    def set(self, key, value, ttl=None):
+        self.backend.set_many_raw({key: json.dumps(value)}, ttl)
+
+    def set_many(self, mapping, ttl=None):
+        if mapping:
+            self.backend.set_many_raw({k: json.dumps(v) for k, v in mapping.items()}, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+
+def quote_key(symbol):
+    return "quote:" + symbol
+
+
+def make_backend(spec):
+    if spec == "memory":
+        return MemoryBackend()
+    if spec.startswith("file:"):
+        return FileBackend(spec[len("file:"):])
+    if spec.startswith("redis://"):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown QUANTIFY_STATE_BACKEND {spec!r} (memory, file:<dir> or redis://host:port/db)")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_state():
+    """The store selected by QUANTIFY_STATE_BACKEND, one per process"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = SharedState(make_backend(STATE_BACKEND))
+    return _shared
+
+
+# ==========================================
+# REDIS-PROTOCOL STAND-IN
+# ==========================================
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.decode().split()  # inline command (e.g. typed into telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            n = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(n + 2)[:-2].decode())
+        return args
+
+    @staticmethod
+    def _bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _execute(self, args):
+        store = self.server.store
+        cmd = args[0].upper()
+        if cmd == "PING":
+            return b"+PONG\r\n"
+        if cmd in ("AUTH", "SELECT"):
+            return b"+OK\r\n"
+        if cmd == "GET":
+            return self._bulk(store.get_raw(args[1]))
+        if cmd == "MGET":
+            values = store.get_many_raw(args[1:])
+            return b"*%d\r\n" % len(values) + b"".join(self._bulk(v) for v in values)
+        if cmd == "SET":
+            ttl = None
+            opts = [a.upper() for a in args[3:]]
+            if "PX" in opts:
+                ttl = int(args[3 + opts.index("PX") + 1]) / 1000
+            elif "EX" in opts:
+                ttl = int(args[3 + opts.index("EX") + 1])
+            store.set_many_raw({args[1]: args[2]}, ttl)
+            return b"+OK\r\n"
+        if cmd == "DEL":
+            found = sum(store.get_raw(k) is not None for k in args[1:])
+            for k in args[1:]:
+                store.delete(k)
+            return b":%d\r\n" % found
+        return b"-ERR unknown command '%s'\r\n" % cmd.encode()
+
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ValueError, IndexError):
+                self.wfile.write(b"-ERR protocol error\r\n")
+                return
+            if not args:
+                return
+            self.wfile.write(self._execute(args))
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address):
+        super().__init__(address, _StandInHandler)
+        self.store = MemoryBackend()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("serve", help="run the Redis-protocol stand-in")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    with StandInServer((args.host, args.port)) as server:
+        print(f"Shared-state stand-in on {args.host}:{args.port} "
+              f"(QUANTIFY_STATE_BACKEND=redis://{args.host}:{args.port}/0)")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
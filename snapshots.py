@@ -0,0 +1,179 @@
+import pandas as pd
+from datetime import timedelta
+
+from archive import read_transactions
+from db import get_connection
+from orders import ADMIN_EMAIL, COMMISSION_FLAT, COMMISSION_PCT, last_completed_session
+from warehouse import update_warehouse, load_closes
+
+
+# ==========================================
+# PRICE HISTORY
+# ==========================================
+def fetch_daily_closes(symbols, start, end):
+    """
+    Daily closes for many symbols from the local bar warehouse (topped up
+    incrementally first). Returns a DataFrame indexed by date with one
+    column per symbol.
+    """
+    if not symbols:
+        return pd.DataFrame()
+
+    update_warehouse(symbols)
+    # Pad the start so the first snapshot day can forward-fill from an earlier close
+    closes = load_closes(symbols, start - timedelta(days=7), end)
+    return closes.ffill()
+
+
+# ==========================================
+# SNAPSHOT JOB
+# ==========================================
+def run_snapshot_job(conn, end_date=None):
+    """
+    Write end-of-day holdings value, cash and P/L for every user into
+    portfolio_snapshots. Only days after the last stored snapshot are processed,
+    up to the last completed session: a day still trading would be stored
+    with intraday prices and never revisited. Returns the number of rows written.
+    """
+    last_session = pd.Timestamp(last_completed_session())
+    end_date = min(pd.Timestamp(end_date or last_session).normalize(), last_session)
+
+    c = conn.cursor()
+    c.execute("SELECT MAX(snap_date) FROM portfolio_snapshots")
+    last_snap = c.fetchone()[0]
+
+    users = pd.read_sql(
+        "SELECT email, balance FROM users WHERE email <> %s", conn, params=(ADMIN_EMAIL,)
+    )
+    # Positions are cumulative, so archived months are part of the replay
+    tx = read_transactions(conn, columns=["id", "email", "symbol", "qty", "price", "action", "timestamp"])
+    tx = tx[tx["email"] != ADMIN_EMAIL]
+
+    if users.empty:
+        return 0
+
+    if last_snap is not None:
+        start_date = pd.Timestamp(last_snap) + pd.Timedelta(days=1)
+    elif not tx.empty:
+        start_date = pd.Timestamp(tx["timestamp"].min()).normalize()
+    else:
+        start_date = end_date
+
+    if start_date > end_date:
+        return 0
+
+    # --- Signed quantities and cash flows per fill ---
+    tx["day"] = pd.to_datetime(tx["timestamp"]).dt.normalize()
+    sign = tx["action"].map({"BUY": 1, "SELL": -1}).fillna(0)
+    gross = tx["price"] * tx["qty"]
+    tx["signed_qty"] = sign * tx["qty"]
+    tx["net_invested"] = sign * gross
+    tx["brokerage"] = gross.mul(COMMISSION_PCT).clip(lower=COMMISSION_FLAT)
+    # BUY pays value + brokerage, SELL receives value - brokerage
+    tx["cash_flow"] = -tx["net_invested"] - tx["brokerage"]
+
+    # --- Trading days to snapshot ---
+    symbols = sorted(tx["symbol"].unique().tolist())
+    closes = fetch_daily_closes(symbols, start_date, end_date)
+    if not closes.empty:
+        days = closes.index[(closes.index >= start_date) & (closes.index <= end_date)]
+    else:
+        days = pd.DatetimeIndex([])
+    if len(days) == 0:
+        # No market data (holiday/weekend) - snapshot the end date with cash only
+        days = pd.DatetimeIndex([end_date])
+
+    # Every calendar day from the first fill onwards so cumsums carry history forward
+    if not tx.empty:
+        calendar = pd.date_range(min(tx["day"].min(), days[0]), max(tx["day"].max(), days[-1]), freq="D")
+    else:
+        calendar = pd.date_range(days[0], days[-1], freq="D")
+    emails = users["email"]
+
+    # --- Holdings value: (days x [email, symbol]) positions times (days x symbol) closes ---
+    if not tx.empty:
+        positions = (
+            tx.pivot_table(index="day", columns=["email", "symbol"],
+                           values="signed_qty", aggfunc="sum")
+            .reindex(calendar, fill_value=0).fillna(0).cumsum()
+            .loc[days]
+        )
+        prices = closes.reindex(index=days, columns=positions.columns.get_level_values("symbol")).fillna(0)
+        values = pd.DataFrame(positions.values * prices.values, index=days, columns=positions.columns)
+        holdings = values.T.groupby(level="email").sum().T
+
+        per_user = tx.groupby(["day", "email"])[["net_invested", "brokerage", "cash_flow"]].sum()
+        cumulative = (
+            per_user.unstack("email")
+            .reindex(calendar, fill_value=0).fillna(0).cumsum()
+        )
+        invested = cumulative["net_invested"].loc[days]
+        fees = cumulative["brokerage"].loc[days]
+        flows = cumulative["cash_flow"]
+        # Cash on day d = today's balance minus the trade flows that happened after d
+        flows_after = flows.iloc[-1] - flows.loc[days]
+    else:
+        holdings = invested = fees = flows_after = pd.DataFrame(index=days)
+
+    def _align(frame):
+        return frame.reindex(index=days, columns=emails, fill_value=0).fillna(0)
+
+    holdings, invested, fees, flows_after = map(_align, (holdings, invested, fees, flows_after))
+    balance = users.set_index("email")["balance"].reindex(emails)
+    cash = flows_after.mul(-1).add(balance, axis=1)
+
+    snap = pd.DataFrame({
+        "holdings_value": holdings.stack(),
+        "cash": cash.stack(),
+        "invested": invested.stack(),
+        "pnl": (holdings - invested - fees).stack(),
+    })
+    snap["total_value"] = snap["holdings_value"] + snap["cash"]
+    snap.index.names = ["snap_date", "email"]
+    snap = snap.round(2).reset_index()
+    snap["snap_date"] = snap["snap_date"].dt.date
+
+    rows = list(snap[["email", "snap_date", "holdings_value", "cash",
+                      "invested", "pnl", "total_value"]].itertuples(index=False, name=None))
+    c.executemany("""
+        INSERT INTO portfolio_snapshots
+            (email, snap_date, holdings_value, cash, invested, pnl, total_value)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            holdings_value=VALUES(holdings_value), cash=VALUES(cash),
+            invested=VALUES(invested), pnl=VALUES(pnl), total_value=VALUES(total_value)
+    """, rows)
+    conn.commit()
+    return len(rows)
+
+
+# ==========================================
+# READERS
+# ==========================================
+def get_user_snapshots(conn, email):
+    """Time series of one user's snapshots, oldest first"""
+    return pd.read_sql("""
+        SELECT snap_date, holdings_value, cash, invested, pnl, total_value
+        FROM portfolio_snapshots
+        WHERE email=%s
+        ORDER BY snap_date
+    """, conn, params=(email,))
+
+
+def get_latest_ranking(conn):
+    """Users ranked by total value on the most recent snapshot day"""
+    return pd.read_sql("""
+        SELECT email, snap_date, total_value, pnl
+        FROM portfolio_snapshots
+        WHERE snap_date = (SELECT MAX(snap_date) FROM portfolio_snapshots)
+        ORDER BY total_value DESC
+    """, conn)
+
+
+if __name__ == "__main__":
+    conn = get_connection()
+    try:
+        written = run_snapshot_job(conn)
+        print(f"Snapshot rows written: {written}")
+    finally:
+        conn.close()
@@ -0,0 +1,93 @@
+"""
+Search-as-you-type over the listed stocks.
+
+SymbolIndex keeps two sorted key lists: lower-cased symbols, and every
+word-start suffix of the company names ("hdfc bank ltd", "bank ltd",
+"ltd"). A query is a binary search for its first match followed by a
+scan of the adjacent keys, so top-k costs O(log n + k) however large the
+universe. Symbol matches rank before company-name matches.
+
+The process-wide index is built once from the stocks table and rebuilt
+after invalidate_symbol_index() (stocks added, removed or synced here)
+or every REFRESH_SECONDS (changes made by other processes).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+
+REFRESH_SECONDS = 300
+_WORD_START = re.compile(r"(?:^|(?<=[\s\-&(/.]))\w")
+
+
+class SymbolIndex:
+    def __init__(self, rows):
+        """rows: iterable of (symbol, company_name)"""
+        self.names = {}
+        sym_keys, name_keys = [], []
+        for symbol, name in rows:
+            name = name or symbol
+            self.names[symbol] = name
+            sym_keys.append((symbol.lower(), symbol))
+            lowered = name.lower()
+            name_keys.extend((lowered[m.start():], symbol) for m in _WORD_START.finditer(lowered))
+        sym_keys.sort()
+        name_keys.sort()
+        self._sym_keys = [k for k, _ in sym_keys]
+        self._sym_vals = [s for _, s in sym_keys]
+        self._name_keys = [k for k, _ in name_keys]
+        self._name_vals = [s for _, s in name_keys]
+
+    def __len__(self):
+        return len(self._sym_vals)
+
+    def __contains__(self, symbol):
+        return symbol in self.names
+
+    def search(self, query, k=10):
+        """Up to k symbols: exact symbol, then symbol prefix, then company-name word prefix"""
+        q = query.strip().lower()
+        if not q:
+            return self._sym_vals[:k]
+        out, seen = [], set()
+        exact = q.upper()
+        if exact in self.names:
+            out.append(exact)
+            seen.add(exact)
+        for keys, vals in ((self._sym_keys, self._sym_vals), (self._name_keys, self._name_vals)):
+            i = bisect_left(keys, q)
+            while i < len(keys) and len(out) < k and keys[i].startswith(q):
+                if vals[i] not in seen:
+                    seen.add(vals[i])
+                    out.append(vals[i])
+                i += 1
+        return out
+
+    def label(self, symbol):
+        name = self.names.get(symbol)
+        return f"{symbol} — {name}" if name and name != symbol else symbol
+
+
+# ==========================================
+# SHARED INDEX
+# ==========================================
+_state = {"index": None, "at": 0.0}
+_lock = threading.Lock()
+
+
+def get_symbol_index(conn):
+    """Process-wide index, (re)built from the stocks table when missing or stale"""
+    index = _state["index"]
+    if index is not None and time.time() - _state["at"] < REFRESH_SECONDS:
+        return index
+    with _lock:
+        if _state["index"] is None or time.time() - _state["at"] >= REFRESH_SECONDS:
+            c = conn.cursor()
+            c.execute("SELECT symbol, company_name FROM stocks")
+            _state["index"] = SymbolIndex(c.fetchall())
+            _state["at"] = time.time()
+        return _state["index"]
+
+
+def invalidate_symbol_index():
+    _state["at"] = 0.0
@@ -0,0 +1,315 @@
+"""
+Ingestion and analytics for the trade_logs/<user>.txt files.
+
+    python tradelog.py ingest              # new lines since the last run
+    python tradelog.py stats [--email E]   # platform-wide or one user
+    python tradelog.py reconcile           # logs vs the transactions table
+
+Each log file is read as a byte stream from the offset stored after the
+previous run; only complete lines are consumed, so a file still being
+appended to is picked up where it left off. Files are parsed in parallel
+(one process per file) into zstd Parquet parts under QUANTIFY_TRADELOG_DIR.
+A part is named after the offset it starts at, so re-running after a
+crash overwrites it instead of duplicating rows. A file that shrank
+(rotated or rewritten) is ingested again from the start.
+"""
+import argparse
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+LOG_DIR = "trade_logs"
+STORE_DIR = os.environ.get("QUANTIFY_TRADELOG_DIR", os.path.join("archive", "trade_logs"))
+OFFSETS_FILE = "offsets.json"
+BATCH_LINES = 200_000  # rows per Parquet part
+MATCH_TOLERANCE = pd.Timedelta(seconds=120)  # log line is written just after the DB commit
+
+COLUMNS = ["log_user", "timestamp", "action", "symbol", "qty", "price", "brokerage", "order_type"]
+LINE = re.compile(
+    r"^(?P<timestamp>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d) \| (?P<action>BUY|SELL) \| (?P<symbol>[^|]+?) \| "
+    r"Qty: (?P<qty>\d+) \| Price: ₹(?P<price>[\d,.]+) \| Brokerage: ₹(?P<brokerage>[\d,.]+) \| "
+    r"Type: (?P<order_type>.+?)\s*$"
+)
+
+
+def log_user(email):
+    """File stem the app writes a user's log under"""
+    return email.replace("@", "_").replace(".", "_")
+
+
+def append_trades(email, fills, log_dir=LOG_DIR):
+    """Append (symbol, qty, price, brokerage, action, order_type) fills to a user's log, one line each"""
+    os.makedirs(log_dir, exist_ok=True)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    lines = [f"{now} | {action} | {symbol} | Qty: {qty} | Price: ₹{price:.2f} | Brokerage: ₹{brokerage:.2f} | "
+             f"Type: {order_type}\n" for symbol, qty, price, brokerage, action, order_type in fills]
+    with open(os.path.join(log_dir, f"{log_user(email)}.txt"), "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+
+
+# ==========================================
+# INGESTION
+# ==========================================
+def parse_line(line):
+    m = LINE.match(line)
+    if m is None:
+        return None
+    r = m.groupdict()
+    return (r["timestamp"], r["action"], r["symbol"].strip(), int(r["qty"]),
+            float(r["price"].replace(",", "")), float(r["brokerage"].replace(",", "")), r["order_type"])
+
+
+def _write_part(user, start, rows):
+    df = pd.DataFrame(rows, columns=COLUMNS[1:])
+    df.insert(0, "log_user", user)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    path = os.path.join(STORE_DIR, "parts", f"{user}.{start:012d}.parquet")
+    tmp = path + ".tmp"
+    df.to_parquet(tmp, index=False, compression="zstd")
+    os.replace(tmp, path)
+
+
+def _ingest_file(args):
+    """Worker: stream one file from offset; returns (name, new offset, rows, bad lines)"""
+    path, offset = args
+    user = os.path.splitext(os.path.basename(path))[0]
+    rows, bad, part_start = [], 0, offset
+    total = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break  # partial line still being written; picked up next run
+            offset += len(raw)
+            record = parse_line(raw.decode("utf-8", errors="replace"))
+            if record is None:
+                bad += int(bool(raw.strip()))
+                continue
+            rows.append(record)
+            if len(rows) >= BATCH_LINES:
+                _write_part(user, part_start, rows)
+                total += len(rows)
+                rows, part_start = [], offset
+    if rows:
+        _write_part(user, part_start, rows)
+        total += len(rows)
+    return os.path.basename(path), offset, total, bad
+
+
+def _load_offsets():
+    path = os.path.join(STORE_DIR, OFFSETS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_offsets(offsets):
+    path = os.path.join(STORE_DIR, OFFSETS_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(offsets, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def ingest(log_dir=LOG_DIR, workers=None):
+    """Parse everything appended since the last run. Returns {rows, bad, files}."""
+    os.makedirs(os.path.join(STORE_DIR, "parts"), exist_ok=True)
+    offsets = _load_offsets()
+    jobs = []
+    for name in sorted(os.listdir(log_dir)) if os.path.isdir(log_dir) else []:
+        if not name.endswith(".txt"):
+            continue
+        path = os.path.join(log_dir, name)
+        size = os.path.getsize(path)
+        start = offsets.get(name, 0)
+        if size < start:
+            # Rotated or rewritten: drop its parts and start over
+            user = os.path.splitext(name)[0]
+            parts = os.path.join(STORE_DIR, "parts")
+            for part in os.listdir(parts):
+                if part.startswith(user + "."):
+                    os.remove(os.path.join(parts, part))
+            start = 0
+        if size > start:
+            jobs.append((path, start))
+
+    summary = {"rows": 0, "bad": 0, "files": len(jobs)}
+    if not jobs:
+        return summary
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as pool:
+        for name, offset, rows, bad in pool.map(_ingest_file, jobs):
+            offsets[name] = offset
+            summary["rows"] += rows
+            summary["bad"] += bad
+    _save_offsets(offsets)
+    return summary
+
+
+def load_trades(log_user=None, columns=None):
+    """Every ingested record (optionally one user's), in time order"""
+    parts = os.path.join(STORE_DIR, "parts")
+    files = sorted(f for f in os.listdir(parts) if f.endswith(".parquet")) if os.path.isdir(parts) else []
+    if log_user:
+        files = [f for f in files if f.startswith(log_user + ".")]
+    if not files:
+        return pd.DataFrame(columns=columns or COLUMNS)
+    df = pd.concat([pd.read_parquet(os.path.join(parts, f), columns=columns) for f in files], ignore_index=True)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+# ==========================================
+# ANALYTICS
+# ==========================================
+def _fifo_pnl(trades):
+    """Realized P&L per SELL row (NaN for BUYs / unmatched), FIFO per user and symbol"""
+    pnl = np.full(len(trades), np.nan)
+    lots = {}
+    for i, t in enumerate(trades.itertuples(index=False)):
+        q = lots.setdefault((t.log_user, t.symbol), deque())
+        if t.action == "BUY":
+            q.append([t.qty, (t.price * t.qty + t.brokerage) / t.qty])
+            continue
+        remaining, cost = t.qty, 0.0
+        while remaining and q:
+            used = min(q[0][0], remaining)
+            cost += used * q[0][1]
+            q[0][0] -= used
+            remaining -= used
+            if q[0][0] == 0:
+                q.popleft()
+        if remaining == 0:
+            pnl[i] = t.price * t.qty - t.brokerage - cost
+    return pnl
+
+
+def trading_stats(trades, by="log_user"):
+    """Turnover, brokerage, trade counts and win rate per group (None: one platform-wide row)"""
+    if trades.empty:
+        return pd.DataFrame(columns=["trades", "buys", "sells", "turnover", "brokerage", "realized", "win_rate_pct"])
+    trades = trades.assign(value=trades["price"] * trades["qty"], pnl=_fifo_pnl(trades))
+    keys = trades[by] if by else pd.Series("ALL", index=trades.index, name="scope")
+    g = trades.groupby(keys)
+    stats = pd.DataFrame({
+        "trades": g.size(),
+        "buys": g["action"].apply(lambda a: int((a == "BUY").sum())),
+        "sells": g["action"].apply(lambda a: int((a == "SELL").sum())),
+        "turnover": g["value"].sum().round(2),
+        "brokerage": g["brokerage"].sum().round(2),
+        "realized": g["pnl"].sum().round(2),
+        "win_rate_pct": g["pnl"].apply(lambda p: round(100 * (p > 0).sum() / p.notna().sum(), 1)
+                                       if p.notna().any() else np.nan),
+    })
+    return stats.sort_values("turnover", ascending=False)
+
+
+def monthly_stats(trades):
+    if trades.empty:
+        return pd.DataFrame(columns=["trades", "turnover", "brokerage", "users"])
+    trades = trades.assign(value=trades["price"] * trades["qty"], month=trades["timestamp"].dt.to_period("M"))
+    g = trades.groupby("month")
+    return pd.DataFrame({
+        "trades": g.size(),
+        "turnover": g["value"].sum().round(2),
+        "brokerage": g["brokerage"].sum().round(2),
+        "users": g["log_user"].nunique(),
+    })
+
+
+# ==========================================
+# RECONCILIATION
+# ==========================================
+def reconcile(conn, trades=None):
+    """
+    Match log records to COMPLETE MARKET orders of the same user, symbol,
+    side and qty, nearest in time within MATCH_TOLERANCE. Every MARKET
+    fill is logged (Live Market, baskets, API); only the sides the logs
+    record are compared, since older logs hold BUYs only. Returns
+    (summary, log-only rows, DB-only rows).
+    """
+    from archive import read_transactions
+
+    trades = load_trades() if trades is None else trades
+    users = pd.read_sql("SELECT email FROM users", conn)
+    stems = dict(zip(users["email"].map(log_user), users["email"]))
+    trades = trades.assign(email=trades["log_user"].map(stems))
+
+    db = read_transactions(conn, columns=["id", "email", "symbol", "qty", "price", "action", "order_type", "timestamp"])
+    db = db[(db["order_type"] == "MARKET") & db["action"].isin(trades["action"].unique())
+            & db["email"].isin(trades["email"].dropna().unique())]
+    db = db.assign(timestamp=pd.to_datetime(db["timestamp"]), qty=db["qty"].astype(int))
+
+    left = trades.dropna(subset=["email"]).sort_values("timestamp").reset_index(drop=True)
+    left["log_row"] = left.index
+    keys = ["email", "symbol", "action", "qty"]
+    # Each log line proposes its nearest order; an order proposed by several lines
+    # explains only the closest of them, the others stay unmatched
+    orders = db.sort_values("timestamp").rename(columns={"price": "db_price"})
+    cand = pd.merge_asof(left, orders.assign(db_timestamp=orders["timestamp"]),
+                         on="timestamp", by=keys, tolerance=MATCH_TOLERANCE, direction="nearest")
+    cand = cand.dropna(subset=["id"])
+    cand = (cand.assign(gap=(cand["timestamp"] - cand["db_timestamp"]).abs())
+            .sort_values(["gap", "log_row"], kind="stable").drop_duplicates("id"))
+    matched_rows = set(cand["log_row"])
+    matched_ids = set(cand["id"].astype(int))
+
+    log_only = pd.concat([left[~left["log_row"].isin(matched_rows)], trades[trades["email"].isna()]],
+                         ignore_index=True).drop(columns=["log_row"], errors="ignore")
+    db_only = db[~db["id"].isin(matched_ids)]
+    price_diff = cand[(cand["price"] - cand["db_price"]).abs() > 0.005]
+    summary = {
+        "log_records": len(trades),
+        "db_orders": len(db),
+        "matched": len(cand),
+        "price_mismatch": len(price_diff),
+        "log_only": len(log_only),
+        "db_only": len(db_only),
+        "unknown_users": int(trades["email"].isna().sum()),
+    }
+    return summary, log_only, db_only
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("ingest")
+    p.add_argument("--workers", type=int)
+    p = sub.add_parser("stats")
+    p.add_argument("--email")
+    sub.add_parser("reconcile")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        t0 = datetime.now()
+        s = ingest(workers=args.workers)
+        print(f"{s['rows']} records from {s['files']} files ({s['bad']} unparseable lines) "
+              f"in {(datetime.now() - t0).total_seconds():.1f}s")
+    elif args.command == "stats":
+        pd.set_option("display.width", 160)
+        trades = load_trades(log_user(args.email) if args.email else None)
+        print(trading_stats(trades, by=None).to_string())
+        if not args.email:
+            print("\nPer user:\n" + trading_stats(trades).head(20).to_string())
+            print("\nPer month:\n" + monthly_stats(trades).to_string())
+    else:
+        from db import get_connection
+
+        conn = get_connection()
+        try:
+            summary, log_only, db_only = reconcile(conn)
+        finally:
+            conn.close()
+        print(json.dumps(summary, indent=1))
+        if len(log_only):
+            print("\nIn logs but not in transactions (first 10):\n" + log_only.head(10).to_string())
+        if len(db_only):
+            print("\nIn transactions but not in logs (first 10):\n" + db_only.head(10).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+In-memory trigger book for pending orders.
+
+Per symbol, orders wait in two heaps keyed by trigger price:
+  * BELOW - fires when price <= trigger (LIMIT BUY, STOP-LOSS, TRAILING STOP),
+            kept as a max-heap so the highest trigger is checked first
+  * ABOVE - fires when price >= trigger (LIMIT SELL), a min-heap
+
+A tick pops only the orders that actually fire. Trailing stops also sit in
+a min-heap keyed by their high-water mark: a rising tick pops just the
+stops whose mark it beats, raises them and re-pushes them. Superseded heap
+entries are skipped lazily through a per-order version number.
+
+Good-till-date expiry is one heap over all orders keyed by expires_at, so
+a sweep pops only what has expired.
+"""
+import heapq
+import itertools
+import threading
+
+# order_type -> which side of the trigger fires it
+DIRECTIONS = {
+    "LIMIT BUY": "BELOW",
+    "LIMIT SELL": "ABOVE",
+    "STOP-LOSS": "BELOW",
+    "TRAILING STOP": "BELOW",
+}
+
+
+class _SymbolBook:
+    __slots__ = ("below", "above", "trail")
+
+    def __init__(self):
+        self.below = []   # (-trigger, seq, id, version)
+        self.above = []   # (trigger, seq, id, version)
+        self.trail = []   # (high-water mark, seq, id, version)
+
+
+class TriggerBook:
+    """
+    Orders are dicts with at least id, symbol, order_type, trigger_price;
+    optional trail_pct (fraction) and expires_at. The book owns the dict
+    while the order is live and hands it back when it fires or expires.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._books = {}
+        self._expiry = []  # (expires_at, seq, id)
+        self._seq = itertools.count()
+        self._moved = {}
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def symbols(self):
+        return list({o["symbol"] for o in self._orders.values()})
+
+    def get(self, order_id):
+        return self._orders.get(order_id)
+
+    # ------------------------------------------
+    # Adding / removing
+    # ------------------------------------------
+    def add(self, order):
+        direction = DIRECTIONS.get(order["order_type"])
+        if direction is None:
+            raise ValueError(f"Order type {order['order_type']} has no trigger")
+
+        # Versions come from one counter so a re-added order never matches old entries
+        order = dict(order, version=next(self._seq), direction=direction)
+        if order["order_type"] == "TRAILING STOP" and not order.get("high"):
+            order["high"] = order["trigger_price"] / (1 - order["trail_pct"])
+        self._orders[order["id"]] = order
+        book = self._books.setdefault(order["symbol"], _SymbolBook())
+        self._push(book, order)
+        if order["order_type"] == "TRAILING STOP":
+            heapq.heappush(book.trail, (order["high"], next(self._seq), order["id"], order["version"]))
+        if order.get("expires_at") is not None:
+            heapq.heappush(self._expiry, (order["expires_at"], next(self._seq), order["id"]))
+        return order
+
+    def _push(self, book, order):
+        entry = (order["trigger_price"], next(self._seq), order["id"], order["version"])
+        if order["direction"] == "BELOW":
+            heapq.heappush(book.below, (-entry[0],) + entry[1:])
+        else:
+            heapq.heappush(book.above, entry)
+
+    def remove(self, order_id):
+        """Drop an order (heap entries are discarded when they surface)"""
+        self._moved.pop(order_id, None)
+        return self._orders.pop(order_id, None)
+
+    def clear(self):
+        self._orders.clear()
+        self._books.clear()
+        self._expiry.clear()
+        self._moved.clear()
+
+    def _live(self, order_id, version):
+        order = self._orders.get(order_id)
+        return order if order is not None and order["version"] == version else None
+
+    # ------------------------------------------
+    # Ticks
+    # ------------------------------------------
+    def on_price(self, symbol, price):
+        """Apply one price; returns the orders that fired (removed from the book)"""
+        book = self._books.get(symbol)
+        if book is None:
+            return []
+
+        # Raise only the trailing stops whose high-water mark this price beats
+        while book.trail and book.trail[0][0] < price:
+            _, _, oid, version = heapq.heappop(book.trail)
+            order = self._live(oid, version)
+            if order is None:
+                continue
+            order["version"] = next(self._seq)
+            order["high"] = price
+            order["trigger_price"] = round(price * (1 - order["trail_pct"]), 2)
+            self._moved[oid] = order["trigger_price"]
+            self._push(book, order)
+            heapq.heappush(book.trail, (price, next(self._seq), oid, order["version"]))
+
+        fired = []
+        while book.below and -book.below[0][0] >= price:
+            _, _, oid, version = heapq.heappop(book.below)
+            if self._live(oid, version):
+                fired.append(self.remove(oid))
+        while book.above and book.above[0][0] <= price:
+            _, _, oid, version = heapq.heappop(book.above)
+            if self._live(oid, version):
+                fired.append(self.remove(oid))
+        return fired
+
+    def pop_moved(self):
+        """{order id: new stop} for trailing stops raised since the last call"""
+        moved, self._moved = self._moved, {}
+        return moved
+
+    def expire(self, now):
+        """Remove and return every order whose expires_at is <= now"""
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            _, _, oid = heapq.heappop(self._expiry)
+            order = self._orders.get(oid)
+            if order is not None and order.get("expires_at") is not None and order["expires_at"] <= now:
+                expired.append(self.remove(oid))
+        return expired
+
+
+_book = TriggerBook()
+
+
+def get_trigger_book():
+    return _book
@@ -0,0 +1,31 @@
+"""
+One module per page of Quantify.py, each exposing render(). A page module
+is imported the first time that page is shown, so the login screen never
+loads charting, market-data or news libraries.
+"""
+import importlib
+
+USER_PAGES = {
+    "Dashboard": "dashboard",
+    "Live Market & Trade": "trade",
+    "Basket Orders": "basket_orders",
+    "Screener": "stock_screener",
+    "Watchlist": "watchlist",
+    "Portfolio": "portfolio",
+    "History": "history",
+    "Backtest": "strategy_backtest",
+    "Add Funds": "add_funds",
+    "API Access": "api_access",
+    "News": "news",
+}
+
+ADMIN_PAGES = {
+    "Dashboard": "admin_dashboard",
+    "Leaderboard": "leaderboard",
+    "Transactions": "transactions",
+    "Manage stocks": "manage_stocks",
+}
+
+
+def load_page(module):
+    return importlib.import_module(f"{__name__}.{module}")
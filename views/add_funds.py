@@ -0,0 +1,69 @@
+"""Add Funds: simulated payment gateway top-up."""
+import random
+
+import streamlit as st
+
+from views.common import note_write
+
+
+def render(conn, rconn):
+    c = conn.cursor()
+
+    st.header("💳 Add Funds to Wallet")
+
+    col1, col2 = st.columns([1, 1])
+
+    with col1:
+        amt = st.number_input("Enter Amount (₹)", min_value=100.0, step=100.0, help="Minimum deposit is ₹100")
+        method = st.selectbox("Payment Method", ["UPI", "Net Banking", "Debit Card"])
+
+        if st.button("Proceed to Pay", use_container_width=True):
+            if amt < 100:
+                st.error("Minimum amount is ₹100")
+            else:
+                # STEP 1: Simulate Payment Gateway
+                with st.status("Connecting to Payment Gateway...", expanded=True) as status:
+                    st.write("Verifying Bank Details...")
+                    import time
+                    time.sleep(1)
+                    st.write("Waiting for User Confirmation...")
+                    time.sleep(1.5)
+                    st.write("Payment Authorized!")
+                    status.update(label="Payment Successful!", state="complete", expanded=False)
+
+                # STEP 2: Create a Transaction ID
+                tx_id = f"TXN{random.randint(100000, 999999)}"
+
+                note_write()
+                try:
+                    # STEP 3: Update User Balance
+                    c.execute("UPDATE users SET balance = balance + %s WHERE email = %s", 
+                             (amt, st.session_state["user_email"]))
+
+                    # STEP 4: Log the transaction (Assuming you have a fund_logs table)
+                    # If you don't have this table yet, I recommend creating it!
+                    # c.execute("INSERT INTO fund_logs (email, tx_id, amount, method, status) VALUES (%s, %s, %s, %s, 'SUCCESS')",
+                    #          (st.session_state["user_email"], tx_id, amt, method))
+
+                    conn.commit()
+
+                    st.success(f"Successfully added ₹{amt:,.2f} to your account!")
+                    st.info(f"Transaction ID: {tx_id}")
+
+                    # Small delay before rerun to let user see the success message
+                    time.sleep(2)
+                    st.rerun()
+
+                except Exception as e:
+                    st.error(f"Transaction Failed: {e}")
+
+    with col2:
+        # Display current balance for reference
+        c.execute("SELECT balance FROM users WHERE email=%s", (st.session_state["user_email"],))
+        current_bal = c.fetchone()[0]
+        st.metric("Current Available Balance", f"₹ {current_bal:,.2f}")
+
+        st.warning("""
+        **Note:** * Funds will reflect in your account immediately.
+        * Please do not refresh the page during transaction.
+        """)
@@ -0,0 +1,55 @@
+"""Admin Dashboard: platform counts, maintenance jobs, fill commit stats."""
+import pandas as pd
+import streamlit as st
+
+from archive import ensure_partitions, archive_transactions
+from orders import get_fill_stats
+from snapshots import run_snapshot_job
+from views.common import note_write
+
+
+def render(conn, rconn):
+
+    st.header("📊 Platform Overview")
+
+    users = pd.read_sql("SELECT * FROM users", rconn)
+    rc = rconn.cursor()
+    rc.execute("SELECT EXISTS(SELECT 1 FROM transactions)")
+    has_trades = bool(rc.fetchone()[0])
+    stocks = pd.read_sql("SELECT * FROM stocks", rconn)
+
+    col1,col2,col3,col4 = st.columns(4)
+
+    col1.metric("Total Users", len(users))
+    col2.metric("Active Users", (users["status"]=="ACTIVE").sum())
+    col3.metric("Suspended Users", (users["status"]=="SUSPENDED").sum())
+    col4.metric("Stocks Listed", len(stocks))
+
+    st.divider()
+
+    if st.button("📸 Update Portfolio Snapshots"):
+        note_write()
+        with st.spinner("Writing end-of-day snapshots..."):
+            written = run_snapshot_job(conn)
+        st.success(f"{written} snapshot rows written")
+
+    if st.button("🗄️ Archive Closed Orders"):
+        note_write()
+        with st.spinner("Moving old closed orders to Parquet..."):
+            ensure_partitions(conn)
+            moved = archive_transactions(conn)
+        st.success(f"{moved} closed orders archived")
+
+    # Group commit of fills in this server process
+    fills = get_fill_stats()
+    g1, g2, g3, g4 = st.columns(4)
+    g1.metric("Fill Commits", fills["batches"])
+    g2.metric("Avg Fills / Commit", f"{fills['avg_batch']:.1f}", help=f"Max {fills['max_batch']}")
+    g3.metric("Commit p50", f"{fills['p50_commit_ms']:.1f} ms")
+    g4.metric("Commit p99", f"{fills['p99_commit_ms']:.1f} ms", help=f"Whole batch p99 {fills['p99_write_ms']:.1f} ms")
+
+    st.subheader("Top Traders")
+    if has_trades:
+        top = users.sort_values("balance",ascending=False).head(10)
+        chart_df = top.set_index("username")["balance"]
+        st.bar_chart(chart_df)
@@ -0,0 +1,27 @@
+"""API Access: create and revoke bearer tokens for the HTTP API."""
+import streamlit as st
+
+from auth import create_api_token, list_api_tokens, revoke_api_token
+
+
+def render(conn, rconn):
+    st.header("🔑 API Access")
+    st.caption("Bearer tokens for the HTTP API (`uvicorn api:app`): quotes, orders, baskets, holdings and history.")
+
+    label = st.text_input("Token label", placeholder="e.g. rebalancer bot")
+    if st.button("Create Token"):
+        token = create_api_token(conn, st.session_state["user_email"], label)
+        st.success("Token created. Copy it now; it will not be shown again.")
+        st.code(token)
+
+    tokens = list_api_tokens(conn, st.session_state["user_email"])
+    if tokens:
+        for token_id, t_label, created_at, last_used in tokens:
+            t1, t2, t3 = st.columns([3, 3, 1])
+            t1.write(f"**{t_label or 'Unnamed'}** (created {created_at:%d %b %Y})")
+            t2.write(f"Last used: {last_used:%d %b %Y %H:%M}" if last_used else "Never used")
+            if t3.button("Revoke", key=f"revoke_{token_id}"):
+                revoke_api_token(conn, st.session_state["user_email"], token_id)
+                st.rerun()
+    else:
+        st.info("No active tokens.")
@@ -0,0 +1,50 @@
+"""Basket Orders: many MARKET orders in one transaction."""
+import pandas as pd
+import streamlit as st
+
+from baskets import execute_basket, BASKET_COLUMNS
+from views.common import note_write
+
+
+def render(conn, rconn):
+    st.header("🧺 Basket Orders")
+    st.caption("MARKET orders for many stocks at once: one quote batch, one balance check, one DB transaction.")
+
+    source = st.radio("Enter basket", ["Editor", "CSV upload"], horizontal=True)
+    if source == "CSV upload":
+        upload = st.file_uploader("CSV with columns symbol, action, qty", type="csv")
+        basket = pd.read_csv(upload) if upload else pd.DataFrame(columns=BASKET_COLUMNS)
+        if not basket.empty:
+            st.dataframe(basket, use_container_width=True, hide_index=True)
+    else:
+        listed = pd.read_sql("SELECT symbol FROM stocks ORDER BY symbol", conn)["symbol"].tolist()
+        basket = st.data_editor(
+            pd.DataFrame({"symbol": pd.Series(dtype=str), "action": pd.Series(dtype=str), "qty": pd.Series(dtype=int)}),
+            num_rows="dynamic",
+            use_container_width=True,
+            key="basket_editor",
+            column_config={
+                "symbol": st.column_config.SelectboxColumn("Symbol", options=listed, required=True),
+                "action": st.column_config.SelectboxColumn("Action", options=["BUY", "SELL"], required=True, default="BUY"),
+                "qty": st.column_config.NumberColumn("Qty", min_value=1, step=1, required=True, default=1),
+            }
+        )
+
+    mode = st.radio(
+        "Execution mode", ["all_or_nothing", "best_effort"], horizontal=True,
+        format_func=lambda m: "All-or-nothing" if m == "all_or_nothing" else "Best effort (skip invalid rows)"
+    )
+
+    if st.button("Execute Basket", use_container_width=True, type="primary"):
+        note_write()
+        try:
+            result = execute_basket(conn, st.session_state["user_email"], basket, mode)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            n_filled = (result["status"] == "FILLED").sum()
+            if n_filled:
+                st.success(f"{n_filled} of {len(result)} orders filled in one transaction.")
+            else:
+                st.error("No orders were filled.")
+            st.dataframe(result, use_container_width=True, hide_index=True)
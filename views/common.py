@@ -0,0 +1,191 @@
+"""
+Helpers shared by several pages. yfinance, feedparser and the warehouse
+are imported inside the functions that need them.
+"""
+import time
+
+import streamlit as st
+
+
+def note_write():
+    """Keep this session's reads on the primary while the replica may still lag behind its write"""
+    st.session_state["last_write_at"] = time.time()
+
+def symbol_picker(label, conn, key, k=20):
+    """
+    Search box over symbol and company name feeding a selectbox of the
+    top-k matches. Returns the chosen symbol, or None when nothing matches.
+    """
+    from symbol_search import get_symbol_index
+
+    index = get_symbol_index(conn)
+    query = st.text_input(label, key=f"{key}_query", placeholder="Search symbol or company")
+    matches = index.search(query, k)
+    # Keep the current pick selectable while the user types a new query
+    current = st.session_state.get(key)
+    if current in index and current not in matches:
+        matches.insert(0, current)
+    if not matches:
+        st.caption("No matching stocks")
+        return None
+    return st.selectbox(label, matches, key=key, format_func=index.label, label_visibility="collapsed")
+
+SESSION_COOKIE = "quantify_sid"
+
+
+def _run_js(script):
+    # Streamlit has no cookie API; a zero-height component runs in a same-origin iframe
+    from streamlit.components.v1 import html
+
+    html(f"<script>{script}</script>", height=0)
+
+def set_session_cookie(sid, max_age):
+    """Login session id as a first-party cookie: never in the URL, history or proxy logs"""
+    import json
+
+    _run_js(f"window.parent.document.cookie = '{SESSION_COOKIE}=' + {json.dumps(sid)} + "
+            f"'; Max-Age={int(max_age)}; Path=/; SameSite=Strict'"
+            " + (window.parent.location.protocol === 'https:' ? '; Secure' : '');")
+
+def clear_session_cookie():
+    _run_js(f"window.parent.document.cookie = '{SESSION_COOKIE}=; Max-Age=0; Path=/; SameSite=Strict';")
+
+def session_cookie():
+    """Session id the browser sent when this Streamlit session connected"""
+    try:
+        sid = st.context.cookies.get(SESSION_COOKIE)
+    except AttributeError:
+        return None
+    return sid if isinstance(sid, str) else None
+
+def fetch_nse_news(limit):
+    import feedparser
+
+    urls = [
+    "https://in.investing.com/rss/news_25.rss"
+    ]
+
+
+    news = []
+
+    for url in urls:
+        feed = feedparser.parse(url)
+        for e in feed.entries:
+            news.append({
+                "title": e.title,
+                "summary": e.get("summary",""),
+                "link": e.link
+            })
+
+    return news[:limit]
+
+def fetch_stock_data(ticker):
+    """Accurately fetch Open and Prev Close using history"""
+    import yfinance as yf
+
+    try:
+        # Auto-add .NS if missing and not already a global ticker
+        if not ticker.endswith(".NS") and not ticker.endswith(".BO") and len(ticker) <= 5:
+            search_ticker = f"{ticker}.NS"
+        else:
+            search_ticker = ticker
+            
+        stock = yf.Ticker(search_ticker)
+        hist = stock.history(period="5d")
+        
+        if len(hist) < 2:
+            return None
+
+        today_open = round(float(hist['Open'].iloc[-1]), 2)
+        prev_close = round(float(hist['Close'].iloc[-2]), 2)
+        
+        # Metadata
+        info = stock.info
+        ticker=ticker[:-3]
+        return {
+            'symbol': ticker.upper(), # Keep original symbol for DB match
+            'company_name': info.get('longName', ticker),
+            'category': info.get('sector', 'N/A'),
+            'prev_close': prev_close,
+            'today_open': today_open
+        }
+    except:
+        return None
+
+def add_stock_to_db(ticker, conn):
+    """Add a stock to database using yfinance data"""
+    stock_data = fetch_stock_data(ticker)
+    
+    if stock_data:
+        try:
+            c = conn.cursor()
+            c.execute("""
+                INSERT INTO stocks (symbol, company_name, category, prev_close, today_open)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                company_name=%s, category=%s, prev_close=%s, today_open=%s
+            """, (
+                stock_data['symbol'],
+                stock_data['company_name'],
+                stock_data['category'],
+                stock_data['prev_close'],
+                stock_data['today_open'],
+                stock_data['company_name'],
+                stock_data['category'],
+                stock_data['prev_close'],
+                stock_data['today_open']
+            ))
+            conn.commit()
+
+            from symbol_search import invalidate_symbol_index
+            invalidate_symbol_index()
+
+            # Backfill daily history for the new symbol
+            from warehouse import update_warehouse
+            update_warehouse([stock_data['symbol']])
+            return True
+        except Exception as e:
+            st.error(f"Database error: {str(e)}")
+            return False
+    return False
+
+def get_intraday_data(symbol):
+    """
+    Fetch reliable intraday data. 
+    Fix: Fetches 5 days of data and filters for the last available day 
+    to ensure charts work even when the market is closed.
+    """
+    import yfinance as yf
+
+    try:
+        # Handle Ticker Suffix safely
+        ticker = symbol
+        if "." not in ticker:
+            ticker = f"{symbol}.NS" # Default to NSE if no suffix
+
+        stock = yf.Ticker(ticker)
+
+        # FETCH 5 DAYS instead of 1 day to handle weekends/holidays
+        df = stock.history(period="5d", interval="5m")
+
+        if df.empty:
+            return None
+
+        # Reset index to access Datetime column
+        df.reset_index(inplace=True)
+
+        # Standardize column name (yfinance sometimes uses 'Date', sometimes 'Datetime')
+        if 'Date' in df.columns:
+            df = df.rename(columns={'Date': 'Datetime'})
+
+        # Filter: Keep only the data for the LAST available date
+        # This creates a "One Day" view regardless of whether it is today or last Friday
+        df['JustDate'] = df['Datetime'].dt.date
+        last_trading_day = df['JustDate'].max()
+        final_df = df[df['JustDate'] == last_trading_day]
+
+        return final_df
+
+    except Exception as e:
+        print(f"Error fetching chart data: {e}")
+        return None
@@ -0,0 +1,33 @@
+"""Dashboard: wallet balance and the shared market overview."""
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from market_state import get_market_state
+
+
+def render(conn, rconn):
+    c = conn.cursor()
+
+    st.header(f"📊 Market Overview - {datetime.now().strftime('%d %b %Y')}")
+
+    c.execute("SELECT balance FROM users WHERE email=%s", (st.session_state["user_email"],))
+    balance = c.fetchone()[0]
+
+    col1, col2 = st.columns(2)
+    col1.metric("Wallet Balance", f"₹ {balance:,.2f}")
+
+    # Shared market state (loaded at sync); only hit the DB if this process has none yet
+    market = get_market_state()
+    if len(market.snapshot()) == 0:
+        market.load_frame(pd.read_sql("SELECT symbol, company_name, prev_close, today_open FROM stocks", conn))
+    snap = market.snapshot()
+
+    if len(snap):
+        # Change % is kept up to date inside the market state (vectorized per update)
+        df_stocks = snap.to_frame()[["symbol", "company_name", "prev_close", "today_open", "last", "Change %"]]
+        df_stocks = df_stocks.rename(columns={"last": "Live Price"})
+        st.dataframe(df_stocks, use_container_width=True, hide_index=True)
+    else:
+        st.info("No stocks available in the market.")
@@ -0,0 +1,12 @@
+"""History: the user's orders, hot table and archive."""
+import streamlit as st
+
+from archive import read_history
+
+
+def render(conn, rconn):
+    # Hot table first; archived months are only opened when more rows are asked for
+    rows = st.selectbox("Show", [100, 500, 2000, 10000], format_func=lambda n: f"Last {n:,} orders")
+    history = read_history(rconn, st.session_state["user_email"], limit=rows,
+                           columns=["id", "symbol", "qty", "price", "action", "order_type", "status", "timestamp"])
+    st.dataframe(history.drop(columns=["id"]), use_container_width=True)
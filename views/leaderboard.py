@@ -0,0 +1,106 @@
+"""Admin Leaderboard and user suspension."""
+import pandas as pd
+import streamlit as st
+
+from market_data import get_live_prices
+from snapshots import get_latest_ranking
+from views.common import note_write
+
+
+def render(conn, rconn):
+
+    users = pd.read_sql("SELECT * FROM users", rconn)
+    # Open positions straight from the tax lots (no transaction history scan)
+    tx = pd.read_sql("SELECT email, symbol, qty_open AS qty, 'BUY' AS action FROM tax_lots", rconn)
+
+    # 🔎 SEARCH USER
+    search = st.text_input("Search user")
+
+    # Daily ranking from the latest snapshot (cheap and consistent across admins)
+    ranking = get_latest_ranking(rconn)
+
+    if not ranking.empty:
+        st.caption(f"Ranking as of close on {ranking['snap_date'].iloc[0]}")
+        lb_df = users.merge(ranking[["email", "total_value"]], on="email", how="left")
+        lb_df["total_value"] = lb_df["total_value"].fillna(lb_df["balance"])
+        lb_df = lb_df.rename(columns={
+            "username": "User", "email": "Email",
+            "total_value": "Portfolio Value", "status": "Status"
+        })[["User", "Email", "Portfolio Value", "Status"]]
+    else:
+        unique_stocks = tx['symbol'].unique()
+        live_prices = get_live_prices(unique_stocks)["price"].to_dict()
+
+        leaderboard = []
+
+        for _, u in users.iterrows():
+            portfolio_value = u["balance"]
+            user_tx = tx[tx["email"] == u["email"]]
+
+            for sym in user_tx["symbol"].unique():
+                qty = user_tx[user_tx["symbol"] == sym].apply(
+                    lambda x: x["qty"] if x["action"]=="BUY" else -x["qty"], axis=1
+                ).sum()
+
+                if qty>0:
+                    price = live_prices.get(sym)
+                    if price:
+                        portfolio_value += price*qty
+
+            leaderboard.append({
+                "User": u["username"],
+                "Email": u["email"],
+                "Portfolio Value": portfolio_value,
+                "Status": u["status"]
+            })
+
+        lb_df = pd.DataFrame(leaderboard)
+
+    lb_df = lb_df.sort_values("Portfolio Value",ascending=False)
+    lb_df["Rank"] = range(1,len(lb_df)+1)
+
+    if search:
+        lb_df = lb_df[lb_df["User"].str.contains(search,case=False)]
+
+    # 🎖️ SHOW TABLE
+    for _, row in lb_df.iterrows():
+
+        col1,col2,col3,col4,col5,col6,col7 = st.columns([1,2,2,2,2,2,2])
+
+        col1.write(row["Rank"])
+        col2.write(row["User"])
+        col3.write(f"₹ {row['Portfolio Value']:.2f}")
+        col4.write(row["Status"])
+
+        # 👁 VIEW USER DETAILS
+        if col5.button("View", key="v_"+row["Email"]):
+            # Already loaded above; no per-click lookup
+            user_details = users[users["email"] == row["Email"]]
+            st.json(user_details.iloc[0].to_dict())
+
+        # 📝 SUSPENSION REASON
+        reason = col6.text_input("Reason", key="r_"+row["Email"])
+
+        # 🔴 SUSPEND / 🟢 UNSUSPEND
+        with conn.cursor() as cursor:
+
+            if row["Status"]=="ACTIVE":
+                if col7.button("Suspend", key="s_"+row["Email"]):
+                    note_write()
+                    cursor.execute(
+                        "UPDATE users SET status='SUSPENDED', suspend_reason=%s WHERE email=%s",
+                        (reason,row["Email"])
+                    )
+                    conn.commit()
+                    st.success(f"{row['User']} suspended")
+                    st.rerun()
+            else:
+                if col7.button("Unsuspend", key="u_"+row["Email"]):
+                    note_write()
+                    cursor.execute(
+                        "UPDATE users SET status='ACTIVE', suspend_reason=NULL WHERE email=%s",
+                        (row["Email"],)
+                    )
+                    conn.commit()
+                    st.success(f"{row['User']} restored")
+                    st.rerun()
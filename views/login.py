@@ -0,0 +1,253 @@
+"""
+Landing page: login and sign-up. Loads only streamlit, the DB driver and
+bcrypt; market data, registration and pandas are imported on first use.
+"""
+import ipaddress
+import os
+from datetime import datetime
+
+import streamlit as st
+
+from auth import verify_and_upgrade, get_login_throttle, create_session, load_session, end_session
+from db import get_connection
+from views.common import clear_session_cookie, session_cookie
+
+
+# Reverse proxies (IPs or CIDRs) whose X-Forwarded-For is believed; anyone else could forge it
+TRUSTED_PROXIES = [ipaddress.ip_network(p.strip(), strict=False)
+                   for p in os.environ.get("QUANTIFY_TRUSTED_PROXIES", "").split(",") if p.strip()]
+
+
+def _trusted(ip):
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(addr in net for net in TRUSTED_PROXIES)
+
+
+def get_client_ip():
+    """
+    Client IP for login throttling: the direct peer, unless that peer is a
+    trusted proxy, in which case the nearest X-Forwarded-For hop that is
+    not itself a trusted proxy.
+    """
+    peer = getattr(st.context, "ip_address", None)
+    if not peer or not _trusted(peer):
+        return peer
+    try:
+        forwarded = st.context.headers.get("X-Forwarded-For") or ""
+    except AttributeError:
+        return peer
+    # Proxies append, so the hops nearest us are on the right
+    for hop in reversed([h.strip() for h in forwarded.split(",") if h.strip()]):
+        if not _trusted(hop):
+            return hop
+    return peer
+
+
+def sync_all_stocks(conn):
+    """Top up the local bar warehouse, then set prev_close/today_open from it"""
+    import pandas as pd
+
+    from market_state import get_market_state
+    from screener import refresh_factors
+    from symbol_search import invalidate_symbol_index
+    from warehouse import update_warehouse, last_open_and_prev_close
+
+    c = conn.cursor()
+    c.execute("SELECT symbol FROM stocks")
+    symbols = [sym for (sym,) in c.fetchall()]
+
+    update_warehouse(symbols)
+
+    rows = []
+    for sym in symbols:
+        bars = last_open_and_prev_close(sym)
+        if bars:
+            today_open, prev_close = bars
+            rows.append((sym, today_open, prev_close))
+
+    # Batched by pymysql into one multi-row statement instead of an UPDATE per stock
+    c.executemany("""
+        INSERT INTO stocks (symbol, today_open, prev_close) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE today_open=VALUES(today_open), prev_close=VALUES(prev_close)
+    """, rows)
+    conn.commit()
+
+    # Screener factors for the whole universe in one batch
+    refresh_factors(conn)
+    invalidate_symbol_index()
+
+    # Refresh the process-wide market state so every session sees the new opens/closes
+    get_market_state().load_frame(pd.read_sql("SELECT symbol, company_name, prev_close, today_open FROM stocks", conn))
+
+
+def resume_session():
+    """Log back in from the session cookie of a live shared session (another worker, or before a restart)"""
+    sid = session_cookie()
+    if not sid or st.session_state.get("logged_out"):
+        return False
+    session = load_session(sid)
+    if session is None:
+        return False
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("SELECT status FROM users WHERE email=%s", (session["email"],))
+        row = c.fetchone()
+    finally:
+        conn.close()
+    if row is None or row[0] != "ACTIVE":
+        end_session(sid)
+        return False
+    st.session_state.update({
+        "logged_in": True,
+        "user_email": session["email"],
+        "user_name": session["name"],
+        "sid": sid
+    })
+    if session.get("menu"):
+        st.session_state["menu_choice"] = session["menu"]
+    return True
+
+
+def render():
+    if st.session_state.pop("clear_session_cookie", False):
+        clear_session_cookie()
+    elif resume_session():
+        st.rerun()
+
+    st.markdown("<h1 style='text-align: center;'>📈 Quantify</h1>", unsafe_allow_html=True)
+    st.write("---")
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+
+    with col2:
+        auth_mode = st.selectbox("Welcome! Please select:", ["Login", "Sign Up"])
+
+        # ---------- LOGIN PAGE ----------
+        if auth_mode == "Login":
+            with st.form("login_form"):
+                st.subheader("User Login")
+                email = st.text_input("Email")
+                password = st.text_input("Password", type="password")
+
+                if st.form_submit_button("Login", use_container_width=True):
+
+                    throttle = get_login_throttle()
+                    client_ip = get_client_ip()
+
+                    # ✅ CHECK 0 — Brute-force throttle (before any DB or bcrypt work)
+                    wait = throttle.retry_after(email, client_ip)
+                    if wait:
+                        st.error(f"Too many failed attempts. Try again in {int(wait // 60) + 1} minute(s).")
+                        st.stop()
+
+                    conn = get_connection()
+                    c = conn.cursor()
+
+                    # Fetch username, hashed password, and status
+                    c.execute(
+                        "SELECT username, password, status FROM users WHERE email=%s",
+                        (email,)
+                    )
+                    user = c.fetchone()
+
+                    if not user:
+                        throttle.record_failure(email, client_ip)
+                        st.error("Invalid credentials")
+                        conn.close()
+
+                    else:
+                        username, stored_password, status = user
+
+                        # ✅ CHECK 1 — Suspension block
+                        if status == "SUSPENDED":
+                            st.error("🚫 Your account has been suspended by admin.")
+                            conn.close()
+                            st.stop()
+
+                        # ✅ CHECK 2 — Password verification (hashed off-thread, rehashed if cost changed)
+                        if verify_and_upgrade(conn, email, password, stored_password):
+                            throttle.record_success(email)
+
+                            with st.spinner("🔄 Synchronizing Market Data..."):
+                                sync_all_stocks(conn)
+
+                            sid = create_session(email, username)
+                            st.session_state.update({
+                                "logged_in": True,
+                                "user_email": email,
+                                "user_name": username,
+                                "sid": sid,
+                                "logged_out": False,
+                                "set_session_cookie": True
+                            })
+
+                            conn.close()
+                            st.rerun()
+
+                        else:
+                            throttle.record_failure(email, client_ip)
+                            st.error("Invalid credentials")
+                            conn.close()
+
+
+        # ---------- SIGN UP PAGE (WITH AGE ELIGIBILITY) ----------
+        elif auth_mode == "Sign Up":
+            st.subheader("Create Account (KYC Required)")
+
+            # --- STEP 1: BASIC DETAILS ---
+            u_col1, u_col2 = st.columns(2)
+            username = u_col1.text_input("Username")
+            email = u_col2.text_input("Email")
+            password = st.text_input("Password (min 6 chars)", type="password")
+
+            p_col1, p_col2, p_col3 = st.columns(3)
+            phone = p_col1.text_input("Phone Number")
+            gender = p_col2.selectbox("Gender", ["Male", "Female", "Other"])
+            dob = p_col3.date_input("Date of Birth", 
+                                    min_value=datetime(1940, 1, 1), 
+                                    max_value=datetime.now(),
+                                    value=datetime(2000, 1, 1))
+
+            i_col1, i_col2 = st.columns(2)
+            aadhar = i_col1.text_input("Aadhar (12 Digits)")
+            pan = i_col2.text_input("PAN (e.g. ABCDE1234F)")
+
+            # --- AGE CALCULATION ---
+            today = datetime.now().date()
+            age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+            if age < 18:
+                st.error(f"You are only {age} years old. You are not Eligible to trade.")
+            else:
+                # --- STEP 2: BANK DETAILS (Only shows if 18+) ---
+                st.success("You are eligible! Please provide your banking details.")
+                st.write("---")
+                st.caption("Bank Details for Settlements")
+
+                b_col1, b_col2, b_col3 = st.columns(3)
+                bank_name = b_col1.text_input("Bank Name")
+                account_no = b_col2.text_input("Account Number")
+                ifsc_code = b_col3.text_input("IFSC Code")
+
+                # Submit button only appears for eligible users
+                if st.button("Register & Complete KYC", use_container_width=True):
+                    # Validation, the single KYC uniqueness probe and the insert all run in register_user
+                    from registration import register_user, RegistrationError
+
+                    conn = get_connection()
+                    try:
+                        register_user(conn, {
+                            "email": email, "username": username, "password": password,
+                            "aadhar": aadhar, "pan": pan, "phone": phone, "gender": gender,
+                            "dob": dob, "bank_name": bank_name, "account_no": account_no,
+                            "ifsc_code": ifsc_code
+                        })
+                        st.success("Registration successful! You can now switch to Login.")
+                    except RegistrationError as e:
+                        st.error(str(e))
+                    finally:
+                        conn.close()
@@ -0,0 +1,67 @@
+"""Admin stock management."""
+import streamlit as st
+
+from market_data import get_live_exchange_price
+from warehouse import update_warehouse, last_open_and_prev_close
+from symbol_search import get_symbol_index, invalidate_symbol_index
+from views.common import add_stock_to_db, note_write, symbol_picker
+
+
+def render(conn, rconn):
+
+    st.header("🛠️ Real-Time Stock Management")
+
+    with st.expander("➕ Add New Stock", expanded=True):
+        col1,col2 = st.columns([3,1])
+        new_ticker = col1.text_input("Ticker Symbol")
+        if col2.button("Add/Update Stock",use_container_width=True):
+            if new_ticker:
+                new_ticker=new_ticker+'.NS'
+                note_write()
+                success=add_stock_to_db(new_ticker.upper(),conn)
+                if success:
+                    st.success("Stock Added/Updated")
+                    st.rerun()
+                else:
+                    st.warning("Enter Valid stock")
+
+    st.divider()
+
+    if len(get_symbol_index(conn)):
+
+        symbol=symbol_picker("Select stock",conn,key="manage_symbol")
+        if symbol is None:
+            return
+        selected_stock=symbol+'.NS'
+
+        btn1,btn2,_=st.columns([1,1,2])
+
+        if btn1.button("🔄 Sync & Preview Data"):
+            symbol=selected_stock.replace('.NS','')
+            update_warehouse([symbol])
+            bars=last_open_and_prev_close(symbol)
+            current_price,last_time=get_live_exchange_price(selected_stock)
+
+            if bars and current_price:
+                t_open,p_close=bars
+
+                note_write()
+                with conn.cursor() as c:
+                    c.execute(
+                        "UPDATE stocks SET today_open=%s,prev_close=%s WHERE symbol=%s",
+                        (t_open,p_close,selected_stock.replace('.NS',''))
+                    )
+                    conn.commit()
+
+                st.success("Database Updated")
+
+        if btn2.button("🗑️ Delete Stock"):
+            note_write()
+            with conn.cursor() as c:
+                c.execute("DELETE FROM stocks WHERE symbol=%s",(symbol,))
+                conn.commit()
+            invalidate_symbol_index()
+            st.warning("Stock removed")
+            st.rerun()
+    else:
+        st.info("Your database is empty. Add a stock symbol to get started.")
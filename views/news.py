@@ -0,0 +1,16 @@
+"""News: NSE market headlines."""
+import streamlit as st
+
+from views.common import fetch_nse_news
+
+
+def render(conn, rconn):
+    st.header("📰 Indian NSE Market News")
+
+    news = fetch_nse_news(20)
+
+    for n in news:
+        st.subheader(n["title"])
+        st.write(n["summary"])
+        st.markdown(f"[Read full article]({n['link']})")
+        st.divider()
@@ -0,0 +1,221 @@
+"""Portfolio: holdings from the FIFO lots, realized P/L, risk analytics, pending orders."""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from charts import frame_key, get_figure_cache, lttb_frame, max_points, top_n
+from lots import get_open_positions, get_open_lots, get_realized_summary, financial_year_start, LONG_TERM_DAYS
+from market_data import get_live_prices
+from orders import cancel_order
+from risk import get_risk_model, portfolio_risk
+from snapshots import get_user_snapshots
+from views.common import note_write
+
+
+MAX_CATEGORIES = 15  # slices / bars beyond this are unreadable at half width
+
+
+def performance_figure(snaps):
+    snaps = lttb_frame(snaps, "snap_date", "total_value", max_points())
+    fig_perf = go.Figure()
+    fig_perf.add_trace(go.Scatter(x=snaps["snap_date"], y=snaps["total_value"], name="Total Value"))
+    fig_perf.add_trace(go.Scatter(x=snaps["snap_date"], y=snaps["holdings_value"], name="Holdings"))
+    fig_perf.add_trace(go.Scatter(x=snaps["snap_date"], y=snaps["pnl"], name="P/L", yaxis="y2"))
+    fig_perf.update_layout(
+        height=350,
+        margin=dict(t=20, b=0, l=0, r=0),
+        yaxis=dict(title="Value (₹)"),
+        yaxis2=dict(title="P/L (₹)", overlaying="y", side="right")
+    )
+    return fig_perf
+
+
+def allocation_figure(alloc):
+    fig_pie = go.Figure(data=[go.Pie(labels=alloc.index, values=alloc.values, hole=.4)])
+    fig_pie.update_layout(height=350, margin=dict(t=0, b=0, l=0, r=0))
+    return fig_pie
+
+
+def pnl_figure(pnl):
+    colors = ['#2ecc71' if val >= 0 else '#e74c3c' for val in pnl]
+    fig_bar = go.Figure(data=[go.Bar(
+        x=pnl.index,
+        y=pnl.values,
+        marker_color=colors
+    )])
+    fig_bar.update_layout(height=350, margin=dict(t=0, b=0, l=0, r=0))
+    return fig_bar
+
+
+def render(conn, rconn):
+    st.header("💼 My Portfolio")
+
+    # Performance over time (from the end-of-day snapshot job)
+    snaps = get_user_snapshots(rconn, st.session_state["user_email"])
+    if not snaps.empty:
+        st.subheader("Performance over time")
+        # Snapshots only change once a day; years of them are thinned to the chart width
+        key = ("performance", st.session_state["user_email"], len(snaps), snaps["snap_date"].iloc[-1],
+               float(snaps["total_value"].iloc[-1]))
+        fig_perf = get_figure_cache().get(key, lambda: performance_figure(snaps))
+        st.plotly_chart(fig_perf, use_container_width=True)
+
+    # Holdings and cost basis straight from the open FIFO lots
+    df = get_open_positions(rconn, st.session_state["user_email"])
+
+    fy_start = financial_year_start()
+    realized_fy = get_realized_summary(rconn, st.session_state["user_email"], since=fy_start)
+    realized_all = get_realized_summary(rconn, st.session_state["user_email"])
+    st.subheader("Realized P/L")
+    g1, g2, g3, g4 = st.columns(4)
+    g1.metric(f"Short-term (FY {fy_start.year}-{(fy_start.year + 1) % 100:02d})", f"₹ {realized_fy['SHORT']:,.2f}")
+    g2.metric(f"Long-term (FY {fy_start.year}-{(fy_start.year + 1) % 100:02d})", f"₹ {realized_fy['LONG']:,.2f}")
+    g3.metric("Short-term (All time)", f"₹ {realized_all['SHORT']:,.2f}")
+    g4.metric("Long-term (All time)", f"₹ {realized_all['LONG']:,.2f}")
+
+    if not df.empty:
+        with st.spinner("Fetching real-time market valuations..."):
+
+            # One batched quote call for every holding
+            df["Current Price"] = df["symbol"].map(get_live_prices(df["symbol"])["price"])
+
+            # Filter out any stocks where the price couldn't be fetched (None)
+            df = df.dropna(subset=["Current Price"])
+
+            # Mathematical calculations using float prices
+            df["Current Value"] = df["Current Price"] * df["qty"]
+            df["P/L"] = df["Current Value"] - df["invested"]
+            df["P/L %"] = (df["P/L"] / df["invested"] * 100).round(2)
+
+            # Summary Metrics
+            total_invested = df["invested"].sum()
+            current_value = df["Current Value"].sum()
+            total_pl = current_value - total_invested
+
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Total Invested", f"₹ {total_invested:,.2f}")
+            m2.metric("Current Value", f"₹ {current_value:,.2f}", delta=f"₹{total_pl:,.2f}")
+            m3.metric("Unrealized P/L", f"₹ {total_pl:,.2f}")
+
+            st.divider()
+
+            col_charts1, col_charts2 = st.columns(2)
+
+            # Chart 1: Asset Allocation (Pie Chart)
+            with col_charts1:
+                st.subheader("Asset Allocation")
+                # Small holdings folded into "Others"; rebuilt only when the values move
+                alloc = top_n(df.set_index("symbol")["Current Value"], MAX_CATEGORIES)
+                fig_pie = get_figure_cache().get(("allocation",) + frame_key(alloc), lambda: allocation_figure(alloc))
+                st.plotly_chart(fig_pie, use_container_width=True)
+
+            # Chart 2: Profit/Loss per Stock (Bar Chart)
+            with col_charts2:
+                st.subheader("Stock-wise P/L")
+                pnl = top_n(df.set_index("symbol")["P/L"], MAX_CATEGORIES)
+                fig_bar = get_figure_cache().get(("stock_pnl",) + frame_key(pnl), lambda: pnl_figure(pnl))
+                st.plotly_chart(fig_bar, use_container_width=True)
+
+            # Detailed Table
+            st.subheader("Holdings Details")
+            st.dataframe(
+                df[["symbol", "qty", "avg_cost", "invested", "Current Price", "Current Value", "P/L", "P/L %"]].rename(
+                    columns={"avg_cost": "Avg Cost"}).round({"Avg Cost": 2, "invested": 2}),
+                use_container_width=True,
+                hide_index=True
+            )
+
+            with st.expander("Open tax lots (FIFO)"):
+                lots_df = get_open_lots(rconn, st.session_state["user_email"])
+                lots_df["Term"] = ((pd.Timestamp.now() - pd.to_datetime(lots_df["buy_date"])).dt.days > LONG_TERM_DAYS).map(
+                    {True: "LONG", False: "SHORT"})
+                st.dataframe(lots_df.round({"cost_per_share": 2}), use_container_width=True, hide_index=True)
+
+            # --- RISK ANALYTICS (shared daily covariance model) ---
+            st.write("---")
+            st.subheader("🛡️ Risk Analytics")
+            try:
+                risk_model = get_risk_model(rconn)
+            except ValueError as e:
+                risk_model = None
+                st.info(f"Risk model unavailable: {e}")
+
+            metrics = portfolio_risk(risk_model, df.set_index("symbol")["Current Value"]) if risk_model else None
+            if metrics:
+                r1, r2, r3, r4, r5 = st.columns(5)
+                r1.metric("Volatility (ann.)", f"{metrics['volatility'] * 100:.2f}%")
+                r2.metric("Beta vs NIFTY", f"{metrics['beta']:.2f}")
+                r3.metric("1-day VaR 95% (param.)", f"₹ {metrics['var_parametric']:,.2f}")
+                r4.metric("1-day VaR 95% (hist.)", f"₹ {metrics['var_historical']:,.2f}")
+                r5.metric("Max Drawdown (1y)", f"{metrics['max_drawdown'] * 100:.2f}%")
+                st.caption(f"Model as of {metrics['as_of']} • covers {metrics['coverage'] * 100:.0f}% of holdings value")
+
+                corr = metrics["correlation"]
+                if len(corr) > 1:
+                    fig_corr = go.Figure(go.Heatmap(
+                        z=corr.values, x=corr.columns, y=corr.index,
+                        zmin=-1, zmax=1, colorscale="RdBu", reversescale=True, text=corr.values, texttemplate="%{text}"
+                    ))
+                    fig_corr.update_layout(height=350, margin=dict(t=20, b=0, l=0, r=0))
+                    st.plotly_chart(fig_corr, use_container_width=True)
+            elif risk_model:
+                st.info("Not enough price history for your holdings yet.")
+
+            # --- INSIDE Portfolio Section ---
+            st.write("---")
+            st.subheader("⏳ Pending Orders")
+
+            # Fetch PENDING orders plus bracket legs WAITING on their entry
+            pending_df = pd.read_sql("""
+                SELECT id, symbol, qty, action, order_type, trigger_price, status,
+                       trail_pct, oco_group, parent_id, expires_at
+                FROM transactions 
+                WHERE email=%s AND status IN ('PENDING', 'WAITING')
+                ORDER BY COALESCE(oco_group, id), id
+            """, rconn, params=(st.session_state["user_email"],))
+
+            if not pending_df.empty:
+                # Header row for the "Manual" table
+                h_col1, h_col2, h_col3, h_col4, h_col5, h_col6, h_col7 = st.columns([2, 1, 1, 3, 2, 2, 1])
+                h_col1.write("**Stock**")
+                h_col2.write("**Qty**")
+                h_col3.write("**Action**")
+                h_col4.write("**Type**")
+                h_col5.write("**Trigger**")
+                h_col6.write("**Valid Till**")
+                h_col7.write("**Cancel**")
+
+                for _, row in pending_df.iterrows():
+                    c1, c2, c3, c4, c5, c6, c7 = st.columns([2, 1, 1, 3, 2, 2, 1])
+
+                    o_label = row['order_type']
+                    if pd.notna(row['trail_pct']):
+                        o_label += f" ({row['trail_pct'] * 100:g}%)"
+                    if pd.notna(row['parent_id']):
+                        o_label += f" • bracket #{int(row['parent_id'])}"
+                    elif pd.notna(row['oco_group']):
+                        o_label += f" • OCO #{int(row['oco_group'])}"
+                    if row['status'] == "WAITING":
+                        o_label += " (waiting for entry)"
+
+                    c1.write(row['symbol'])
+                    c2.write(row['qty'])
+                    c3.write(row['action'])
+                    c4.write(o_label)
+                    c5.write(f"₹{row['trigger_price']}")
+                    c6.write(pd.Timestamp(row['expires_at']).strftime("%d %b %H:%M") if pd.notna(row['expires_at']) else "GTC")
+
+                    # Unique key for each button using transaction ID
+                    if c7.button("❌", key=f"cancel_{row['id']}"):
+                        try:
+                            # Remove it from the DB and the trigger book (bracket legs go with their entry)
+                            note_write()
+                            cancel_order(conn, st.session_state["user_email"], int(row['id']))
+                            st.toast(f"Order for {row['symbol']} cancelled.")
+                            st.rerun()
+                        except Exception as e:
+                            st.error(f"Error: {e}")
+            else:
+                st.info("No pending orders at the moment.")
+    else:
+        st.info("You don't own any stocks yet. Go to 'Live Market' to buy some!")
@@ -0,0 +1,34 @@
+"""Screener: filter and rank the universe on precomputed factors."""
+import streamlit as st
+
+from screener import FACTORS, get_categories, screen
+
+
+def render(conn, rconn):
+    st.header("🔍 Stock Screener")
+
+    f_col1, f_col2 = st.columns([2, 1])
+    categories = f_col1.multiselect("Sector", get_categories(conn))
+    limit = f_col2.number_input("Max results", min_value=10, max_value=2000, value=100, step=10)
+
+    # Range filters on precomputed factors (blank = no bound)
+    ranges = {}
+    with st.expander("Factor filters", expanded=True):
+        for col, label in FACTORS.items():
+            r1, r2, r3 = st.columns([2, 1, 1])
+            r1.write(label)
+            lo = r2.number_input("Min", value=None, key=f"scr_min_{col}", label_visibility="collapsed", placeholder="Min")
+            hi = r3.number_input("Max", value=None, key=f"scr_max_{col}", label_visibility="collapsed", placeholder="Max")
+            if lo is not None or hi is not None:
+                ranges[col] = (lo, hi)
+
+    s_col1, s_col2 = st.columns([3, 1])
+    sort_by = s_col1.selectbox("Sort by", list(FACTORS), format_func=FACTORS.get, index=list(FACTORS).index("change_pct"))
+    descending = s_col2.toggle("Descending", value=True, key="scr_desc")
+
+    results = screen(conn, ranges, categories, sort_by, descending, limit)
+    if results.empty:
+        st.info("No stocks match this screen.")
+    else:
+        st.caption(f"{len(results)} matches • factors as of {results['updated_at'].max()}")
+        st.dataframe(results.drop(columns=["updated_at"]), use_container_width=True, hide_index=True)
@@ -0,0 +1,50 @@
+"""Backtest: parameter sweep of the LIMIT BUY / target / stop strategy."""
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from backtest import run_backtest, param_grid
+from charts import lttb, max_points
+from warehouse import update_warehouse
+
+
+def render(conn, rconn):
+    st.header("🧪 Strategy Backtest")
+    st.caption("LIMIT BUY below the previous close, exit with a LIMIT SELL target or a STOP-LOSS. "
+               "Brokerage: max(₹20, 0.05%) per order.")
+
+    stocks = pd.read_sql("SELECT symbol FROM stocks", conn)
+    symbols = st.multiselect("Stocks", stocks["symbol"], default=stocks["symbol"].head(5).tolist())
+
+    b_col1, b_col2, b_col3, b_col4 = st.columns(4)
+    entry_pct = b_col1.number_input("Buy dip below prev close (%)", min_value=0.0, value=1.0, step=0.5)
+    tp_pct = b_col2.number_input("Take profit (%)", min_value=0.1, value=5.0, step=0.5)
+    sl_pct = b_col3.number_input("Stop-loss (%)", min_value=0.1, value=3.0, step=0.5)
+    capital = b_col4.number_input("Capital per stock (₹)", min_value=1000.0, value=100000.0, step=1000.0)
+    years = st.slider("Years of history", 1, 10, 3)
+
+    if st.button("Run Backtest", use_container_width=True) and symbols:
+        start = pd.Timestamp.now().normalize() - pd.DateOffset(years=years)
+        grid = param_grid([entry_pct / 100], [tp_pct / 100], [sl_pct / 100])
+        try:
+            with st.spinner("Replaying history..."):
+                update_warehouse(symbols)
+                equity, trades, summary = run_backtest(symbols, grid, start=start, capital=capital)
+        except ValueError as e:
+            st.warning(str(e))
+        else:
+            res = summary.iloc[0]
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Final Equity", f"₹ {res['final_equity']:,.2f}", delta=f"{res['total_return_pct']}%")
+            m2.metric("CAGR", f"{res['cagr_pct']}%")
+            m3.metric("Max Drawdown", f"{res['max_drawdown_pct']}%")
+            m4.metric("Win Rate", f"{res['win_rate_pct']}% of {res['trades']}")
+
+            # Years of daily equity thinned to the chart width, peaks and troughs kept
+            keep = lttb(equity.index, equity.iloc[:, 0], max_points())
+            fig_eq = go.Figure(go.Scatter(x=equity.index[keep], y=equity.iloc[keep, 0], name="Equity"))
+            fig_eq.update_layout(height=350, margin=dict(t=20, b=0, l=0, r=0), yaxis_title="Equity (₹)")
+            st.plotly_chart(fig_eq, use_container_width=True)
+
+            st.subheader("Trades")
+            st.dataframe(trades.drop(columns=["run"]), use_container_width=True, hide_index=True)
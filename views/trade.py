@@ -0,0 +1,235 @@
+"""Live Market & Trade: order ticket, intraday chart with indicators, stock news."""
+from datetime import datetime
+
+import plotly.graph_objects as go
+import streamlit as st
+from plotly.subplots import make_subplots
+
+from charts import CHART_WIDTH_PX, PX_PER_CANDLE, bucket_last, get_figure_cache, max_points, ohlc_rebucket
+from indicators import INDICATORS, PRICE_OVERLAYS, get_indicator_cache
+from market_data import get_live_exchange_price
+from market_state import get_market_state
+from orders import calc_brokerage, place_order, place_oco, place_bracket, submit_market_order, MARKET_CLOSE
+from symbol_search import get_symbol_index
+from views.common import note_write, fetch_nse_news, get_intraday_data, symbol_picker
+
+
+def intraday_figure(stock, data, selected_ind, n_candles, chart_date):
+    """Candlesticks plus indicator traces, at most n_candles points per trace"""
+    candles = ohlc_rebucket(data, n_candles)
+
+    # Oscillators (RSI/MACD) get their own panel under the price
+    panels = [n for n in selected_ind if n not in PRICE_OVERLAYS]
+    fig = make_subplots(
+        rows=1 + len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.03,
+        row_heights=[0.6] + [0.4 / len(panels)] * len(panels) if panels else [1.0]
+    )
+
+    # Candlestick Trace
+    fig.add_trace(go.Candlestick(
+        x=candles['Datetime'],
+        open=candles['Open'],
+        high=candles['High'],
+        low=candles['Low'],
+        close=candles['Close'],
+        name='Price'
+    ), row=1, col=1)
+
+    # Cached per (symbol, timeframe, params); only new bars are computed on rerun.
+    # Computed on the full bars, then sampled at each candle's close
+    ind_cache = get_indicator_cache()
+    for name in selected_ind:
+        values = bucket_last(ind_cache.get(stock, "5m", name, data), n_candles)
+        row = 1 if name in PRICE_OVERLAYS else 2 + panels.index(name)
+        for col in values.columns:
+            if col == "MACD Hist":
+                fig.add_trace(go.Bar(x=candles['Datetime'], y=values[col].to_numpy(), name=col), row=row, col=1)
+            else:
+                fig.add_trace(go.Scatter(x=candles['Datetime'], y=values[col].to_numpy(), name=col,
+                                         mode="lines", line=dict(width=1)), row=row, col=1)
+
+    fig.update_layout(
+        height=500 + 150 * len(panels),
+        xaxis_rangeslider_visible=False,
+        template="plotly_white",
+        title=f"<b>{stock}</b> • {chart_date} (5m Interval)",
+        yaxis_title="Price (INR)",
+        margin=dict(l=20, r=20, t=50, b=20)
+    )
+    return fig
+
+
+def render(conn, rconn):
+    c = conn.cursor()
+
+    st.header("📈 Live Trading Terminal")
+    # 1. Stock Selection
+    if not len(get_symbol_index(conn)):
+        st.warning("No stocks found. Go to 'Manage Stocks' to add some.")
+        st.stop()
+
+    col_list, col_chart = st.columns([1, 2])
+
+    with col_list:
+        stock = symbol_picker("Select Stock", conn, key="trade_symbol")
+        if stock is None:
+            st.stop()
+
+        # Simulated Live Price (Fluctuation logic)
+        c.execute("SELECT today_open FROM stocks WHERE symbol=%s", (stock,))
+        row = c.fetchone()
+        if row is None:
+            st.warning("This stock was just removed.")
+            st.stop()
+        base = row[0]
+        price, time_stamp = get_live_exchange_price(stock)
+
+        if price is None:
+            st.warning("📴 Live market data unavailable")
+            st.stop()
+
+        get_market_state().update(stock, price)
+
+        st.metric("Live Price", f"₹ {price:,.2f}", delta=round(price - base, 2))
+
+        st.divider()
+
+        # Trading Panel
+        qty = st.number_input("Quantity", min_value=1, value=1)
+        order_type = st.selectbox("Order Type", [
+            "MARKET", "LIMIT BUY", "LIMIT SELL", "STOP-LOSS", "TRAILING STOP", "OCO", "BRACKET"
+        ])
+
+        # Composite / exit-only types fix the side; the rest let the user pick it
+        if order_type in ["TRAILING STOP", "OCO"]:
+            action = "SELL"
+        elif order_type == "BRACKET":
+            action = "BUY"
+        else:
+            action = st.radio("Action", ["BUY", "SELL"], horizontal=True)
+        st.caption(f"Side: **{action}**")
+
+        trigger_price = trail_pct = target_price = stop_price = None
+        if order_type in ["LIMIT BUY", "LIMIT SELL", "STOP-LOSS"]:
+            trigger_price = st.number_input("Trigger Price (₹)", min_value=0.1, value=float(price))
+        elif order_type == "TRAILING STOP":
+            trail_pct = st.number_input("Trail (%)", min_value=0.1, max_value=50.0, value=2.0, step=0.1) / 100
+            st.caption(f"Initial stop ₹{price * (1 - trail_pct):,.2f}; it rises with every new high.")
+        elif order_type in ["OCO", "BRACKET"]:
+            if order_type == "BRACKET":
+                trigger_price = st.number_input("Entry Price (₹)", min_value=0.1, value=float(price))
+            t_col, s_col = st.columns(2)
+            target_price = t_col.number_input("Target (₹)", min_value=0.1, value=round(float(price) * 1.05, 2))
+            stop_price = s_col.number_input("Stop-loss (₹)", min_value=0.1, value=round(float(price) * 0.95, 2))
+
+        # Good-till-date: pending orders lapse at market close on the chosen day
+        expires_at = None
+        if order_type != "MARKET" and st.checkbox("Good till date (GTT)"):
+            gtt_day = st.date_input("Valid till", value=datetime.now().date(), min_value=datetime.now().date())
+            expires_at = datetime.combine(gtt_day, MARKET_CLOSE)
+
+        total = price * qty
+        st.write(f"**Total Value:** ₹ {total:,.2f}")
+
+        # Buttons
+        if st.button("Confirm Order", use_container_width=True):
+            note_write()
+            # 1. Calculate Costs
+            total_trade_value = price * qty
+            brokerage = calc_brokerage(total_trade_value)
+
+            # Check current user balance
+            c.execute("SELECT balance FROM users WHERE email=%s", (st.session_state["user_email"],))
+            user_balance = c.fetchone()[0]
+
+            # --- INSIDE Confirm Order Logic ---
+            # Trigger orders only record the intent (no balance is deducted yet) and join the trigger book
+            if order_type in ["LIMIT BUY", "LIMIT SELL", "STOP-LOSS", "TRAILING STOP"]:
+                place_order(conn, st.session_state["user_email"], stock, qty, price, action, order_type,
+                            trigger_price, trail_pct=trail_pct, expires_at=expires_at)
+                st.info(f"{order_type} order placed. It will execute when the price hits its trigger.")
+                st.rerun()
+
+            if order_type == "OCO":
+                if not stop_price < price < target_price:
+                    st.error("OCO needs Stop-loss < current price < Target.")
+                else:
+                    place_oco(conn, st.session_state["user_email"], stock, qty, price,
+                              target_price, stop_price, expires_at=expires_at)
+                    st.info("OCO placed: whichever of target / stop-loss fills first cancels the other.")
+                    st.rerun()
+
+            if order_type == "BRACKET":
+                if not stop_price < trigger_price < target_price:
+                    st.error("Bracket needs Stop-loss < Entry < Target.")
+                else:
+                    place_bracket(conn, st.session_state["user_email"], stock, qty, price,
+                                  trigger_price, target_price, stop_price, expires_at=expires_at)
+                    st.info("Bracket placed: target and stop-loss arm once the entry fills.")
+                    st.rerun()
+
+            if order_type == "MARKET":
+                # Group-committed with MARKET orders from other sessions in the same few ms
+                try:
+                    fill = submit_market_order(st.session_state["user_email"], stock, action, qty, price)
+                except Exception as e:
+                    # Timed out or lost the connection: it may still have filled, so no retry from here
+                    print(f"MARKET {action} {qty} {stock} for {st.session_state['user_email']}: status unknown: {e!r}")
+                    fill = {"status": "UNKNOWN"}
+
+                if fill["status"] == "UNKNOWN":
+                    st.warning("Order status unknown: it may still have been filled. "
+                               "Check History before placing it again.")
+                elif fill["status"] == "FILLED":
+                    # The trade-log line is written by the fill writer once the fill commits
+                    if action == "SELL":
+                        st.success(f"Sold successfully! Realized P/L ₹{fill['realized']:,.2f} • ₹{brokerage:.2f} brokerage sent to Admin.")
+                    st.rerun()
+                elif fill["status"] == "UNFUNDED":
+                    st.error(f"Insufficient funds. You need ₹{total_trade_value + brokerage - user_balance:.2f} more.")
+                elif fill["status"] == "REJECTED":
+                    st.error("Not enough shares to sell.")
+                else:
+                    st.error("The order could not be placed. Please try again.")
+
+    with col_chart:
+        # Add a manual refresh button for the chart
+        col_header, col_btn = st.columns([4,1])
+        col_header.subheader(f"{stock} Intraday Chart")
+        if col_btn.button("🔄"):
+            st.rerun()
+
+        selected_ind = st.multiselect("Indicators", list(INDICATORS), key="chart_indicators")
+
+        data = get_intraday_data(stock)
+
+        if data is None or data.empty:
+            st.warning("⚠️ Waiting for market data... (Market might be closed or Ticker invalid)")
+        else:
+            # Get the date string for the title
+            chart_date = data['Datetime'].iloc[0].strftime('%d %b %Y')
+
+            # Built once per (symbol, timeframe, live bar, indicators); candles re-bucketed to the chart width
+            n_candles = max_points(CHART_WIDTH_PX * 2 // 3, PX_PER_CANDLE)
+            last = data.iloc[-1]
+            key = (stock, "5m", last["Datetime"], float(last["High"]), float(last["Low"]), float(last["Close"]),
+                   tuple(selected_ind), n_candles)
+            fig = get_figure_cache().get(key, lambda: intraday_figure(stock, data, selected_ind, n_candles, chart_date))
+
+            st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader(f"📰 News for {stock}")
+    stock_name = stock.split(".")[0].lower()
+    news = fetch_nse_news(30)
+    filtered = [
+        n for n in news
+        if stock_name in n["summary"].lower()
+    ]
+    if filtered:
+        for n in filtered[:5]:
+            st.markdown(f"**{n['title']}**")
+            st.write(n["summary"])
+            st.markdown(f"[Read more]({n['link']})")
+            st.divider()
+    else:
+        st.info("No NSE news found for this stock yet.")
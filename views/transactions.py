@@ -0,0 +1,15 @@
+"""Admin transaction inspector, hot table and archive."""
+import streamlit as st
+
+from archive import read_history
+
+
+def render(conn, rconn):
+
+    st.header("📜 All Transactions")
+
+    rows = st.selectbox("Show", [1000, 10000, 100000], format_func=lambda n: f"Last {n:,} orders")
+    tx = read_history(rconn, limit=rows,
+                      columns=["id", "email", "symbol", "qty", "price", "action", "status", "timestamp"])
+
+    st.dataframe(tx.drop(columns=["id"]),use_container_width=True)
@@ -0,0 +1,83 @@
+"""Watchlist and price alerts."""
+import pandas as pd
+import streamlit as st
+
+from market_data import get_live_prices
+from orders import add_price_alert, get_user_alerts, delete_price_alert
+from views.common import note_write, symbol_picker
+
+
+def render(conn, rconn):
+    c = conn.cursor()
+
+    add_stock = symbol_picker("Add Stock", conn, key="watchlist_symbol")
+
+    if add_stock and st.button("Add to Watchlist"):
+        note_write()
+        try:
+            c.execute("INSERT INTO watchlist (email,symbol) VALUES (%s,%s)",
+                      (st.session_state["user_email"], add_stock))
+            conn.commit()
+            st.success("Added")
+        except:
+            st.warning("Already in watchlist")
+
+    wl_data = pd.read_sql("""
+        SELECT w.symbol, s.today_open, s.prev_close
+        FROM watchlist w JOIN stocks s ON w.symbol=s.symbol
+        WHERE w.email=%s
+    """, conn, params=(st.session_state["user_email"],))
+
+    if not wl_data.empty:
+        # One batched quote call for the whole list
+        quotes = get_live_prices(wl_data["symbol"])
+        wl_data["Live Price"] = wl_data["symbol"].map(quotes["price"])
+        wl_data["Last Update"] = wl_data["symbol"].map(quotes["time"])
+
+        wl_data["Chg vs Open"] = (wl_data["Live Price"] - wl_data["today_open"]).round(2)
+        wl_data["Chg % vs Open"] = (wl_data["Chg vs Open"] / wl_data["today_open"] * 100).round(2)
+        wl_data["Chg vs Prev Close"] = (wl_data["Live Price"] - wl_data["prev_close"]).round(2)
+        wl_data["Chg % vs Prev Close"] = (wl_data["Chg vs Prev Close"] / wl_data["prev_close"] * 100).round(2)
+
+        s_col1, s_col2 = st.columns([3, 1])
+        sort_by = s_col1.selectbox("Sort by", ["symbol", "Live Price", "Chg % vs Open", "Chg % vs Prev Close"])
+        descending = s_col2.toggle("Descending", value=sort_by != "symbol")
+        wl_data = wl_data.sort_values(sort_by, ascending=not descending, na_position="last")
+
+        st.dataframe(wl_data, use_container_width=True, hide_index=True)
+
+        # --- PRICE ALERTS ---
+        st.write("---")
+        st.subheader("🔔 Price Alerts")
+
+        a_col1, a_col2, a_col3, a_col4 = st.columns([2, 2, 2, 1])
+        alert_symbol = a_col1.selectbox("Stock", wl_data["symbol"].sort_values())
+        direction = a_col2.selectbox("Notify when price is", ["ABOVE", "BELOW"])
+        default_target = wl_data.loc[wl_data["symbol"] == alert_symbol, "Live Price"].iloc[0]
+        target = a_col3.number_input(
+            "Target Price (₹)", min_value=0.1,
+            value=float(default_target) if pd.notna(default_target) else 100.0
+        )
+        a_col4.write("")
+        if a_col4.button("Set Alert", use_container_width=True):
+            note_write()
+            add_price_alert(conn, st.session_state["user_email"], alert_symbol, direction, target)
+            st.success(f"Alert set for {alert_symbol} {direction.lower()} ₹{target:,.2f}")
+            st.rerun()
+
+        alerts_df = get_user_alerts(conn, st.session_state["user_email"])
+        if not alerts_df.empty:
+            for _, row in alerts_df.iterrows():
+                c1, c2, c3, c4 = st.columns([2, 3, 3, 1])
+                c1.write(row["symbol"])
+                c2.write(f"{row['direction']} ₹{row['target_price']:,.2f}")
+                if row["status"] == "TRIGGERED":
+                    c3.write(f"✅ Hit at ₹{row['triggered_price']:,.2f}")
+                else:
+                    c3.write("⏳ Active")
+                if c4.button("❌", key=f"alert_{row['id']}"):
+                    note_write()
+                    delete_price_alert(conn, st.session_state["user_email"], int(row["id"]))
+                    st.rerun()
+        else:
+            st.info("No price alerts set.")
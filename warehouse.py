@@ -0,0 +1,361 @@
+"""
+Local daily-bar warehouse.
+
+Each symbol gets a folder of column files under WAREHOUSE_DIR:
+
+    warehouse/TCS/date.npy    datetime64[D]
+    warehouse/TCS/open.npy    float64   (also high, low, close, volume)
+    warehouse/TCS/meta.json   {"rows": N}
+
+Columns are memory-mapped read-only, so loading years of bars maps the
+files instead of copying them. Writers hold a per-symbol file lock and
+work in place: new bars are written after the stored rows, the last bar
+is overwritten only when a re-fetch changed it, and the .npy header's
+shape is updated within its padding. meta.json (row count and a write
+counter) is swapped in last and readers never look past its row count,
+so column files are never replaced under a live mapping.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from market_data import to_ticker
+
+WAREHOUSE_DIR = os.environ.get("QUANTIFY_WAREHOUSE_DIR", "warehouse")
+HISTORY_YEARS = 10
+COLUMNS = ("date", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = COLUMNS[1:]
+DTYPES = {c: np.dtype("datetime64[D]" if c == "date" else np.float64) for c in COLUMNS}
+YF_COLUMNS = {"open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"}
+
+
+def _symbol_dir(symbol):
+    return os.path.join(WAREHOUSE_DIR, symbol.upper())
+
+
+def _meta_path(symbol):
+    return os.path.join(_symbol_dir(symbol), "meta.json")
+
+
+# ==========================================
+# READ PATH (ZERO-COPY)
+# ==========================================
+_maps = {}
+_maps_lock = threading.Lock()
+
+
+def _row_count(symbol):
+    try:
+        with open(_meta_path(symbol)) as f:
+            meta = json.load(f)
+        rows = meta["rows"]
+        return rows, (rows, meta.get("writes"), os.path.getmtime(_meta_path(symbol)))
+    except (OSError, ValueError, KeyError):
+        return 0, None
+
+
+def load_bars(symbol):
+    """
+    Memory-mapped columns for one symbol as {column: ndarray}, or None.
+    Mappings are cached per process and re-opened only after an append.
+    """
+    rows, version = _row_count(symbol)
+    if rows == 0:
+        return None
+
+    key = symbol.upper()
+    cached = _maps.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    folder = _symbol_dir(symbol)
+    cols = {c: _map_column(os.path.join(folder, f"{c}.npy"), c, rows) for c in COLUMNS}
+    with _maps_lock:
+        _maps[key] = (version, cols)
+    return cols
+
+
+def _data_offset(f):
+    """Start of the array data in an open .npy file (the prefix holding it never changes)"""
+    f.seek(0)
+    prefix = f.read(12)
+    if prefix[:6] != b"\x93NUMPY":
+        raise ValueError(f"{f.name} is not a .npy file")
+    if prefix[6] == 1:
+        return 10 + int.from_bytes(prefix[8:10], "little")
+    return 12 + int.from_bytes(prefix[8:12], "little")
+
+
+def _map_column(path, column, rows):
+    """Read-only map of the first rows of a column; the header's shape may lag behind meta.json"""
+    with open(path, "rb") as f:
+        offset = _data_offset(f)
+    return np.memmap(path, dtype=DTYPES[column], mode="r", offset=offset, shape=(rows,))
+
+
+def _drop_maps(symbol):
+    """Forget this process's mappings of a symbol, so its files can be replaced (Windows refuses otherwise)"""
+    with _maps_lock:
+        _maps.pop(symbol.upper(), None)
+
+
+def load_range(symbol, start=None, end=None):
+    """Zero-copy slice of a symbol's bars between two dates (inclusive)"""
+    cols = load_bars(symbol)
+    if cols is None:
+        return None
+    dates = cols["date"]
+    lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start).date(), "D"), "left")
+    hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end).date(), "D"), "right")
+    return {c: arr[lo:hi] for c, arr in cols.items()}
+
+
+def load_frame(symbol, start=None, end=None):
+    """Bars as a DataFrame indexed by date (copies the selected range)"""
+    cols = load_range(symbol, start, end)
+    if cols is None:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+    return pd.DataFrame({c: np.asarray(cols[c]) for c in PRICE_COLUMNS},
+                        index=pd.DatetimeIndex(np.asarray(cols["date"]), name="date"))
+
+
+def load_closes(symbols, start=None, end=None):
+    """Close prices for many symbols, aligned on date (one column per symbol)"""
+    series = {}
+    for sym in symbols:
+        cols = load_range(sym, start, end)
+        if cols is not None and len(cols["date"]):
+            series[sym] = pd.Series(np.asarray(cols["close"]), index=pd.DatetimeIndex(np.asarray(cols["date"])))
+    if not series:
+        return pd.DataFrame()
+    return pd.DataFrame(series).sort_index()
+
+
+def last_open_and_prev_close(symbol):
+    """Same semantics as fetch_stock_data: today's open and the previous session's close"""
+    cols = load_bars(symbol)
+    if cols is None or len(cols["date"]) < 2:
+        return None
+    return round(float(cols["open"][-1]), 2), round(float(cols["close"][-2]), 2)
+
+
+def last_date(symbol):
+    cols = load_bars(symbol)
+    if cols is None:
+        return None
+    return pd.Timestamp(cols["date"][-1]).date()
+
+
+# ==========================================
+# WRITE PATH (INCREMENTAL APPEND)
+# ==========================================
+@contextmanager
+def _symbol_lock(symbol):
+    """Exclusive lock on one symbol's files, across threads and processes"""
+    folder = _symbol_dir(symbol)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, ".lock"), "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10 s; keep waiting
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _swap(path, write):
+    """Write to a temp file of this writer's own, then atomically replace path"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        for attempt in range(50):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                # Windows: a reader has the file open for a moment
+                if os.name != "nt" or attempt == 49:
+                    raise
+                time.sleep(0.02)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _header(f, column, rows):
+    """(position, bytes) of a column file's header rewritten for rows, or None if it has no room"""
+    offset = _data_offset(f)
+    f.seek(6)
+    prefix = 10 if f.read(1)[0] == 1 else 12
+    header = (f"{{'descr': {np.lib.format.dtype_to_descr(DTYPES[column])!r}, "
+              f"'fortran_order': False, 'shape': ({rows},), }}").encode("latin1")
+    if len(header) + 1 > offset - prefix:
+        return None
+    return prefix, header.ljust(offset - prefix - 1) + b"\n"
+
+
+def _header_fits(path, column, rows):
+    with open(path, "rb") as f:
+        return _header(f, column, rows) is not None
+
+
+def _write_column(path, column, start, values, rows):
+    """Write values at row start of a column file in place, then set the header's shape to rows"""
+    with open(path, "r+b") as f:
+        pos, header = _header(f, column, rows)
+        f.seek(_data_offset(f) + start * DTYPES[column].itemsize)
+        f.write(np.ascontiguousarray(values, dtype=DTYPES[column]).tobytes())
+        f.seek(pos)
+        f.write(header)
+
+
+def _store(symbol, new):
+    """
+    Merge a frame of bars (date index, OHLCV columns) into a symbol's files:
+    the stored last bar is overwritten if new has it with different values
+    (it may have been captured mid-session) and later bars are appended.
+    Nothing is written when nothing changed. Returns rows appended.
+    """
+    with _symbol_lock(symbol):
+        # Re-read under the lock: another writer may have stored bars since the download
+        old = load_bars(symbol)
+        _, version = _row_count(symbol)
+        new_dates = new.index.values.astype("datetime64[D]")
+        rows = 0 if old is None else len(old["date"])
+        start = rows  # first row to write
+
+        if old is not None:
+            hit = np.flatnonzero(new_dates == old["date"][-1])
+            if len(hit):
+                bar = new.iloc[hit[-1]]
+                fresh_bar = np.array([float(bar[YF_COLUMNS[c]]) for c in PRICE_COLUMNS])
+                stored_bar = np.array([float(old[c][-1]) for c in PRICE_COLUMNS])
+                if not np.array_equal(fresh_bar, stored_bar, equal_nan=True):
+                    start = rows - 1
+            keep = new_dates >= old["date"][-1] if start < rows else new_dates > old["date"][-1]
+            new, new_dates = new[keep], new_dates[keep]
+
+        if not len(new):
+            return 0
+        values = {"date": new_dates}
+        for c in PRICE_COLUMNS:
+            values[c] = new[YF_COLUMNS[c]].to_numpy(dtype=np.float64)
+        total = start + len(new)
+
+        folder = _symbol_dir(symbol)
+        paths = {c: os.path.join(folder, f"{c}.npy") for c in COLUMNS}
+        if old is not None and all(_header_fits(paths[c], c, total) for c in COLUMNS):
+            for c in COLUMNS:
+                _write_column(paths[c], c, start, values[c], total)
+        else:
+            # New symbol, or a header without room to grow (written by an old numpy): rewrite the
+            # columns, with this process's maps released first so Windows lets the files be replaced
+            heads = {c: np.array(old[c][:start]) if old is not None else np.empty(0, DTYPES[c]) for c in COLUMNS}
+            old = None
+            _drop_maps(symbol)
+            for c in COLUMNS:
+                column = np.concatenate([heads[c], values[c].astype(DTYPES[c])])
+                _swap(paths[c], lambda f, arr=column: np.save(f, arr))
+        meta = {
+            "rows": total,
+            "writes": ((version[1] or 0) if version else 0) + 1,
+            "updated": datetime.now().isoformat(timespec="seconds"),
+        }
+        _swap(_meta_path(symbol), lambda f: f.write(json.dumps(meta).encode()))
+        return total - rows
+
+
+def _download(symbols, start):
+    """One yfinance call for a group of symbols sharing the same start date"""
+    tickers = [to_ticker(s) for s in symbols]
+    raw = yf.download(tickers, start=start, interval="1d",
+                      auto_adjust=False, progress=False, group_by="ticker")
+    if raw.empty:
+        return {}
+
+    frames = {}
+    for sym, tic in zip(symbols, tickers):
+        if isinstance(raw.columns, pd.MultiIndex):
+            if tic not in raw.columns.get_level_values(0):
+                continue
+            df = raw[tic]
+        else:
+            df = raw
+        df = df.dropna(subset=["Close"])
+        if df.empty:
+            continue
+        idx = pd.DatetimeIndex(df.index)
+        if idx.tz is not None:
+            idx = idx.tz_localize(None)
+        df.index = idx.normalize()
+        frames[sym] = df[~df.index.duplicated(keep="last")]
+    return frames
+
+
+def update_warehouse(symbols):
+    """
+    Incremental append job: fetch only the bars after each symbol's last
+    stored date. Symbols are grouped by start date so a normal daily run
+    is a single batched download. Returns {symbol: rows_appended}.
+    """
+    today = datetime.now().date()
+    default_start = today - timedelta(days=365 * HISTORY_YEARS)
+
+    groups = {}
+    for sym in dict.fromkeys(s.upper() for s in symbols):
+        last = last_date(sym)
+        # Re-fetch the last stored day too: today's bar is replaced once the session closes
+        start = default_start if last is None else last
+        if start <= today:
+            groups.setdefault(start, []).append(sym)
+
+    appended = {}
+    for start, group in groups.items():
+        try:
+            frames = _download(group, start)
+        except Exception as e:
+            print(f"Warehouse download error: {e}")
+            continue
+        for sym, df in frames.items():
+            appended[sym] = _store(sym, df)
+    return appended
+
+
+if __name__ == "__main__":
+    from db import get_connection
+
+    conn = get_connection()
+    try:
+        c = conn.cursor()
+        c.execute("SELECT symbol FROM stocks")
+        syms = [row[0] for row in c.fetchall()] + sys.argv[1:]
+    finally:
+        conn.close()
+
+    result = update_warehouse(syms)
+    print(f"Appended bars for {len(result)} symbols ({sum(result.values())} rows)")